@@ -33,37 +33,52 @@ function doGet(e) {
 
 /**
  * Handle HTTP POST requests (quiz results)
+ *
+ * Accepts a single result object, a batch {"results": [...]} or a bare array,
+ * and a batch compressed by the game as
+ * {"encoding": "gzip+base64", "payload": "..."}.
  */
 function doPost(e) {
   try {
     // Parse the request
-    const data = JSON.parse(e.postData.contents);
+    let data = JSON.parse(e.postData.contents);
     
     // Validate token (optional security measure)
     if (data.token && data.token !== SECRET_TOKEN) {
       return createResponse(403, "Invalid token");
     }
     
-    // Get or create the sheet
-    const sheet = getOrCreateSheet(SHEET_NAME);
+    if (data.encoding === "gzip+base64") {
+      data = JSON.parse(decodePayload(data.payload));
+    }
     
-    // Extract data
-    const timestamp = data.timestamp ? new Date(data.timestamp * 1000) : new Date();
-    const questionId = data.question_id || "N/A";
-    const question = data.question || "N/A";
-    const correct = data.correct ? "Yes" : "No";
-    const coinsEarned = data.coins_earned || 0;
+    let results;
+    if (Array.isArray(data)) {
+      results = data;
+    } else if (Array.isArray(data.results)) {
+      results = data.results;
+    } else {
+      results = [data];
+    }
     
-    // Append row to sheet
-    sheet.appendRow([
-      timestamp,
-      questionId,
-      question,
-      correct,
-      coinsEarned
-    ]);
+    if (results.length === 0) {
+      return createResponse(200, "No quiz results to log");
+    }
     
-    return createResponse(200, "Quiz result logged successfully");
+    // Build all rows, then write them with a single call
+    const rows = results.map(toRow);
+    
+    // Serialize writers so concurrent batches don't claim the same rows
+    const lock = LockService.getScriptLock();
+    lock.waitLock(30000);
+    try {
+      const sheet = getOrCreateSheet(SHEET_NAME);
+      sheet.getRange(sheet.getLastRow() + 1, 1, rows.length, rows[0].length).setValues(rows);
+    } finally {
+      lock.releaseLock();
+    }
+    
+    return createResponse(200, rows.length + " quiz result(s) logged successfully");
     
   } catch (error) {
     Logger.log("Error: " + error.toString());
@@ -71,6 +86,34 @@ function doPost(e) {
   }
 }
 
+/**
+ * Convert one quiz result into a sheet row
+ */
+function toRow(data) {
+  const timestamp = data.timestamp ? new Date(data.timestamp * 1000) : new Date();
+  const questionId = data.question_id || "N/A";
+  const question = data.question || "N/A";
+  const correct = data.correct ? "Yes" : "No";
+  const coinsEarned = data.coins_earned || 0;
+  
+  return [
+    timestamp,
+    questionId,
+    question,
+    correct,
+    coinsEarned
+  ];
+}
+
+/**
+ * Decode a gzip+base64 payload back to JSON text
+ */
+function decodePayload(payload) {
+  const bytes = Utilities.base64Decode(payload);
+  const blob = Utilities.newBlob(bytes, "application/x-gzip");
+  return Utilities.ungzip(blob).getDataAsString("UTF-8");
+}
+
 /**
  * Get existing sheet or create new one with headers
  */
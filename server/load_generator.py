@@ -0,0 +1,154 @@
+"""
+Load generator for the quiz results server.
+
+Simulates many game clients posting quiz results at once, each over its own
+keep-alive connection, and reports ingest latency percentiles. With no --url
+it starts server/results_server.py in-process on a temporary database.
+
+Usage:
+    python server/load_generator.py --clients 2000 --posts 5
+    python server/load_generator.py --url http://127.0.0.1:8080/ --clients 500 --batch 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from results_server import ResultStore, ResultsServer
+
+
+QUESTIONS = [
+    (1, "What is the capital of France?"),
+    (2, "What is 7 x 8?"),
+    (3, "Which planet is known as the Red Planet?"),
+    (4, "What is the largest ocean on Earth?"),
+]
+
+
+def make_result(rng: random.Random) -> dict:
+    question_id, question = rng.choice(QUESTIONS)
+    correct = rng.random() < 0.7
+    return {
+        'timestamp': time.time(),
+        'question_id': question_id,
+        'question': question,
+        'correct': correct,
+        'coins_earned': 10 if correct else 0
+    }
+
+
+async def client(host: str, port: int, path: str, posts: int, batch: int, think: float,
+                 seed: int, latencies: List[float], errors: List[str]):
+    """One simulated game: connect, then post `posts` requests of `batch` results."""
+    rng = random.Random(seed)
+    await asyncio.sleep(rng.random() * think)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        errors.append(f"connect: {e}")
+        return
+    try:
+        for _ in range(posts):
+            results = [make_result(rng) for _ in range(batch)]
+            body = json.dumps(results[0] if batch == 1 else {'results': results}).encode('utf-8')
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+            start = time.perf_counter()
+            writer.write(request.encode('latin-1') + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+            await asyncio.sleep(rng.random() * think)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(f"request: {e!r}")
+    finally:
+        writer.close()
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run_load(url: Optional[str], clients: int, posts: int, batch: int, think: float, seed: int):
+    server = store = None
+    if url is None:
+        db_dir = tempfile.mkdtemp(prefix="results-load-")
+        store = ResultStore(os.path.join(db_dir, "quiz_results.db"))
+        server = await asyncio.start_server(ResultsServer(store).handle, "127.0.0.1", 0, backlog=4096)
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/"
+        print(f"Started in-process server at {url}")
+    parts = urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path or "/"
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, path, posts, batch, think, seed + i, latencies, errors)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    if server:
+        server.close()
+        await server.wait_closed()
+        await asyncio.to_thread(store.close)
+
+    ordered = sorted(latencies)
+    print(f"{clients} clients x {posts} posts x {batch} result(s) in {elapsed:.2f}s")
+    print(f"  requests: {len(latencies)} responses, {len(errors)} errors")
+    print(f"  throughput: {len(latencies) / elapsed:,.0f} requests/s, "
+          f"{len(latencies) * batch / elapsed:,.0f} results/s")
+    if ordered:
+        print(f"  latency p50 {percentile(ordered, 0.50) * 1000:.1f} ms, "
+              f"p99 {percentile(ordered, 0.99) * 1000:.1f} ms, max {ordered[-1] * 1000:.1f} ms")
+    if store:
+        print(f"  server committed {store.rows} results in {store.commits} transactions")
+    for error in sorted(set(errors))[:5]:
+        print(f"  error: {error}")
+
+
+def raise_file_limit(clients: int):
+    """Each client holds a socket (two when the server runs in-process)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, clients * 2 + 256)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+
+def main():
+    """Entry point for the load generator."""
+    parser = argparse.ArgumentParser(description="Load test the quiz results server")
+    parser.add_argument("--url", default=None, help="server to test (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=2000, help="concurrent game clients")
+    parser.add_argument("--posts", type=int, default=5, help="requests per client")
+    parser.add_argument("--batch", type=int, default=1, help="results per request")
+    parser.add_argument("--think", type=float, default=0.5, help="max seconds between a client's posts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raise_file_limit(args.clients)
+    asyncio.run(run_load(args.url, args.clients, args.posts, args.batch, args.think, args.seed))
+
+
+if __name__ == "__main__":
+    main()
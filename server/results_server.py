@@ -0,0 +1,361 @@
+"""
+Self-hosted quiz results server - a drop-in replacement for the Google Apps
+Script endpoint, using only the Python standard library.
+
+Speaks the same POST contract as server/google_apps_script.gs: a single
+result object, a batch {"results": [...]} or a bare array, optionally
+compressed as {"encoding": "gzip+base64", "payload": "..."}, with an
+optional "token". Results are stored in SQLite (WAL mode). Inserts from all
+connections are queued to one writer thread that commits them in batches,
+and a request is answered only after its rows are committed.
+
+Endpoints:
+    GET  /                 health check
+    POST /                 log quiz results
+    GET  /stats            totals
+    GET  /stats/questions  attempts and accuracy per question
+    GET  /stats/daily      attempts, accuracy and coins per day
+
+Usage:
+    python server/results_server.py --port 8080 --db quiz_results.db [--token SECRET]
+
+Then set server_url="http://<host>:8080/" in src/snake_game.py.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import math
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    question_id TEXT,
+    question TEXT,
+    correct INTEGER NOT NULL,
+    coins_earned INTEGER NOT NULL,
+    received REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp);
+CREATE INDEX IF NOT EXISTS results_question ON results (question_id);
+"""
+
+INSERT = ("INSERT INTO results (timestamp, question_id, question, correct, coins_earned, received) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+
+# Largest accepted request body
+MAX_BODY = 4 * 1024 * 1024
+
+
+class RequestError(Exception):
+    """Raised for a request that should be answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def decode_results(body: bytes, token: Optional[str]) -> List[Dict]:
+    """
+    Parse a POST body into result dicts.
+
+    Raises:
+        RequestError: Malformed body (400) or wrong token (403)
+    """
+    try:
+        data = json.loads(body)
+        if isinstance(data, dict):
+            # Like the Apps Script: only a token that is present and wrong is refused
+            if token and data.get('token') and data['token'] != token:
+                raise RequestError(403, "Invalid token")
+            if data.get('encoding') == 'gzip+base64':
+                data = json.loads(gzip.decompress(base64.b64decode(data['payload'])))
+        if isinstance(data, list):
+            results = data
+        elif isinstance(data.get('results'), list):
+            results = data['results']
+        else:
+            results = [data]
+        if not all(isinstance(result, dict) for result in results):
+            raise ValueError("results must be objects")
+        return results
+    except RequestError:
+        raise
+    except Exception as e:
+        raise RequestError(400, f"Invalid request body: {e}")
+
+
+def to_row(result: Dict, received: float) -> Tuple:
+    """
+    Convert one quiz result into an insert row (same defaults as the Apps Script).
+
+    Raises:
+        RequestError: A field of the wrong type (400), so a client drops the
+                      result instead of retrying it
+    """
+    question_id = result.get('question_id')
+    question = result.get('question') or "N/A"
+    try:
+        timestamp = float(result.get('timestamp') or received)
+        coins_earned = int(result.get('coins_earned') or 0)
+        if not math.isfinite(timestamp):
+            raise ValueError("timestamp must be finite")
+        if not -2 ** 63 <= coins_earned < 2 ** 63:
+            raise ValueError("coins_earned out of range")
+        if not isinstance(question, str):
+            raise ValueError("question must be a string")
+    except (TypeError, ValueError, OverflowError) as e:
+        raise RequestError(400, f"Invalid quiz result: {e}")
+    return (
+        timestamp,
+        str(question_id) if question_id is not None else "N/A",
+        question,
+        1 if result.get('correct') else 0,
+        coins_earned,
+        received
+    )
+
+
+class ResultStore:
+    """
+    SQLite result storage. Writes go through one thread that commits
+    everything queued since its last commit in a single transaction.
+    """
+
+    def __init__(self, path: str, max_batch: int = 5000):
+        """
+        Open (or create) the database and start the writer.
+
+        Args:
+            path: SQLite database file
+            max_batch: Most requests committed in one transaction
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self.commits = 0
+        self.rows = 0
+
+        self._writes = queue.Queue()
+        writer_db = self._connect()
+        writer_db.executescript(SCHEMA)
+        writer_db.commit()
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._write_loop, args=(writer_db,),
+                                         name="results-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    async def insert(self, rows: List[Tuple]):
+        """Queue rows for the writer and wait until they are committed."""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._writes.put((rows, loop, done))
+        await done
+
+    def _write_loop(self, db: sqlite3.Connection):
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            # Take everything that queued up while the last commit ran
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)
+                    break
+                batch.append(item)
+
+            error = None
+            try:
+                with db:
+                    for rows, _, _ in batch:
+                        db.executemany(INSERT, rows)
+                self.commits += 1
+                self.rows += sum(len(rows) for rows, _, _ in batch)
+            except sqlite3.Error as e:
+                error = e
+            for _, loop, done in batch:
+                loop.call_soon_threadsafe(self._settle, done, error)
+        db.close()
+
+    @staticmethod
+    def _settle(done: asyncio.Future, error: Optional[Exception]):
+        if done.cancelled():
+            return
+        if error:
+            done.set_exception(error)
+        else:
+            done.set_result(None)
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a read-only query (WAL lets it run alongside the writer)."""
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def totals(self) -> Dict:
+        total, correct, coins = self.query(
+            "SELECT COUNT(*), COALESCE(SUM(correct), 0), COALESCE(SUM(coins_earned), 0) FROM results")[0]
+        return {
+            'total_quizzes': total,
+            'correct_answers': correct,
+            'accuracy': (correct / total * 100) if total > 0 else 0.0,
+            'total_coins': coins
+        }
+
+    def by_question(self) -> Dict:
+        rows = self.query("SELECT question_id, MAX(question), COUNT(*), SUM(correct) "
+                          "FROM results GROUP BY question_id ORDER BY question_id")
+        return {qid: {'question': question, 'total': total, 'correct': correct,
+                      'accuracy': correct / total * 100}
+                for qid, question, total, correct in rows}
+
+    def by_day(self) -> Dict:
+        rows = self.query("SELECT date(timestamp, 'unixepoch', 'localtime') AS day, COUNT(*), "
+                          "SUM(correct), SUM(coins_earned) FROM results GROUP BY day ORDER BY day")
+        return {day: {'total': total, 'correct': correct, 'coins': coins,
+                      'accuracy': correct / total * 100}
+                for day, total, correct, coins in rows}
+
+    def close(self):
+        """Commit what's queued and close the database."""
+        self._writes.put(None)
+        self._thread.join()
+        self._reader.close()
+
+
+class ResultsServer:
+    """Minimal HTTP/1.1 server (keep-alive aware) on asyncio streams."""
+
+    def __init__(self, store: ResultStore, token: Optional[str] = None):
+        self.store = store
+        self.token = token
+        self.stats_routes = {
+            '/stats': store.totals,
+            '/stats/questions': store.by_question,
+            '/stats/daily': store.by_day,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {'status': 'error', 'message': e.message}
+                except Exception as e:
+                    status, payload = 500, {'status': 'error', 'message': f"Error processing request: {e}"}
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(None, 2)
+        except ValueError:
+            raise ConnectionError("Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            raise ConnectionError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == 'POST':
+            results = decode_results(body, self.token)
+            if not results:
+                return 200, {'status': 'ok', 'message': "No quiz results to log"}
+            received = time.time()
+            # Every row is checked before any is stored: a bad result rejects its whole request
+            await self.store.insert([to_row(result, received) for result in results])
+            return 200, {'status': 'ok', 'message': f"{len(results)} quiz result(s) logged successfully"}
+        if method == 'GET':
+            if path == '/':
+                return 200, {'status': 'ok',
+                             'message': "Snake Game Quiz Results API is running. "
+                                        "Send POST requests to log quiz results."}
+            route = self.stats_routes.get(path.rstrip('/'))
+            if route:
+                return 200, await asyncio.to_thread(route)
+        raise RequestError(404, f"No route for {method} {path}")
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload).encode('utf-8')
+        reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found"}.get(status, "Error")
+        head = (f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host: str, port: int, db_path: str, token: Optional[str]):
+    """Run the server until interrupted."""
+    store = ResultStore(db_path)
+    app = ResultsServer(store, token)
+    server = await asyncio.start_server(app.handle, host, port, backlog=4096)
+    print(f"Quiz results server listening on http://{host}:{port}/ (database: {db_path})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        store.close()
+        print(f"Stored {store.rows} results in {store.commits} commits")
+
+
+def main():
+    """Entry point for the results server."""
+    parser = argparse.ArgumentParser(description="Self-hosted Snake quiz results server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default="quiz_results.db", help="SQLite database file")
+    parser.add_argument("--token", default=None, help="refuse POSTs carrying a different token")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.token))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1138 @@
+"""
+Benchmarks - Performance checks for the Snake game internals.
+
+Usage:
+    python src/benchmarks.py board
+    python src/benchmarks.py engine
+    python src/benchmarks.py batch        (needs numpy)
+    python src/benchmarks.py quiz-frame   (needs pygame; runs with a dummy display)
+    python src/benchmarks.py uploader     (local stand-in server with latency and failures)
+    python src/benchmarks.py storage      (JSON vs file log vs SQLite as history grows)
+    python src/benchmarks.py prizes       (weighted prize draws: random.choices vs alias table)
+    python src/benchmarks.py questions    (question bank load time, pick cost and memory vs bank size)
+    python src/benchmarks.py schedule     (spaced-repetition selection with synthetic players)
+    python src/benchmarks.py quiz-timer   (headless fast-forward of quiz timing on a simulated clock)
+    python src/benchmarks.py events       (event bus cost per event, with and without subscribers)
+    python src/benchmarks.py profiler     (frame profiler cost per frame, enabled and disabled)
+    python src/benchmarks.py telemetry    (metric recording cost, export cost and memory with a slow sink)
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from snake_board import SnakeBoard
+from snake_engine import SnakeEngine, DIRECTIONS
+from snake_agents import hamiltonian_cycle
+
+
+def bench_board(width: int, height: int, seed: int):
+    """Fill the whole board along a Hamiltonian cycle and report tick cost by length."""
+    board = SnakeBoard(width, height)
+    successor = hamiltonian_cycle(width, height)
+    rng = random.Random(seed)
+
+    # Start with a 3-segment snake lying on the cycle, head first
+    predecessor = [0] * board.size
+    for cell, nxt in enumerate(successor):
+        predecessor[nxt] = cell
+    head = 1
+    board.reset([head, predecessor[head], predecessor[predecessor[head]]])
+    apple = board.random_free_cell(rng)
+
+    buckets = 10
+    bucket_ticks = [0] * buckets
+    bucket_time = [0.0] * buckets
+    ticks = 0
+    perf_counter = time.perf_counter
+
+    start = perf_counter()
+    while apple is not None:
+        bucket = len(board) * buckets // (board.size + 1)
+        t0 = perf_counter()
+        n = 0
+        # Run ticks at a constant length until the apple is eaten
+        while True:
+            head = successor[board.head()]
+            if head in board:
+                raise RuntimeError("Hamiltonian snake collided with itself")
+            board.push_head(head)
+            n += 1
+            if head == apple:
+                apple = board.random_free_cell(rng)
+                break
+            board.pop_tail()
+        bucket_time[bucket] += perf_counter() - t0
+        bucket_ticks[bucket] += n
+        ticks += n
+    total = perf_counter() - start
+
+    print(f"Board {width}x{height}: filled in {ticks} ticks, {total:.2f}s")
+    print(f"{'length':>16} {'ticks':>10} {'ns/tick':>10}")
+    for b in range(buckets):
+        if bucket_ticks[b]:
+            lo = b * (board.size + 1) // buckets
+            hi = (b + 1) * (board.size + 1) // buckets - 1
+            ns = bucket_time[b] / bucket_ticks[b] * 1e9
+            print(f"{lo:>7}-{hi:<8} {bucket_ticks[b]:>10} {ns:>10.0f}")
+
+
+def bench_engine(width: int, height: int, steps: int, seed: int):
+    """Measure headless SnakeEngine throughput with a random-turn policy."""
+    engine = SnakeEngine(width, height, seed=seed)
+    rng = random.Random(seed)
+
+    # Pre-draw the actions so the timing covers the engine only
+    actions = [rng.choice(DIRECTIONS) if rng.random() < 0.2 else None for _ in range(steps)]
+
+    games = 0
+    step = engine.step
+    start = time.perf_counter()
+    for action in actions:
+        step(action)
+        if engine.game_over:
+            engine.reset()
+            games += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"SnakeEngine {width}x{height}: {steps} steps, {games} games in {elapsed:.2f}s")
+    print(f"{steps / elapsed:,.0f} steps/sec")
+
+
+def check_batch_parity(n: int, width: int, height: int, steps: int, seed: int):
+    """
+    Step BatchSnakeEngine and one SnakeEngine per board with the same actions
+    and apples, comparing every board on every tick, and fail on the first
+    disagreement.
+
+    Even boards follow HamiltonianAgent, which never dies, so they grow until
+    the board is full: long snakes, the batch engine's fallback apple spawn
+    on nearly full boards and the board_full ending are all covered. Odd
+    boards turn at random and die early against walls and themselves. Fails
+    unless at least one board filled up within `steps` ticks.
+    """
+    import numpy as np
+    from snake_agents import HamiltonianAgent
+    from snake_batch import BatchSnakeEngine, NO_ACTION
+
+    direction_index = {direction: i for i, direction in enumerate(DIRECTIONS)}
+    batch = BatchSnakeEngine(n, width, height, seed=seed, auto_reset=False)
+    engines = [SnakeEngine(width, height, seed=seed + i) for i in range(n)]
+    agents = [HamiltonianAgent() if i % 2 == 0 else None for i in range(n)]
+    for i, engine in enumerate(engines):
+        engine.apple = int(batch.apple[i])
+        if agents[i]:
+            agents[i].reset(engine)
+
+    rng = np.random.default_rng(seed)
+    for t in range(steps):
+        actions = np.where(rng.random(n) < 0.3, rng.integers(0, 4, n), NO_ACTION)
+        for i, agent in enumerate(agents):
+            if agent and not engines[i].game_over:
+                actions[i] = direction_index[agent.act(engines[i])]
+        rewards, _ = batch.step(actions)
+        for i, engine in enumerate(engines):
+            action = None if actions[i] == NO_ACTION else DIRECTIONS[actions[i]]
+            reward = engine.step(action)
+            if engine.apple is not None and batch.apple[i] >= 0:
+                # Apple placement differs by design; share the batch's choice
+                engine.apple = int(batch.apple[i])
+            state = (reward, engine.score, engine.game_over, engine.death_cause, list(engine.board))
+            batch_state = (int(rewards[i]), int(batch.score[i]), bool(batch.done[i]),
+                           batch.cause_of_death(i), batch.body_cells(i))
+            if state != batch_state:
+                raise AssertionError(f"board {i} diverged at tick {t}: {state} != {batch_state}")
+            if batch.apple[i] >= 0 and batch.occupied[i, batch.apple[i]]:
+                raise AssertionError(f"board {i}: apple spawned on the snake at tick {t}")
+        if batch.done.all():
+            break
+    causes = [engine.death_cause for engine in engines]
+    if "board_full" not in causes:
+        raise AssertionError(f"no board filled up in {steps} ticks; raise steps to cover full boards")
+    longest = max(len(engine.board) for engine in engines)
+    print(f"Parity OK: {n} boards {width}x{height}, {t + 1} ticks, "
+          f"{causes.count('board_full')} filled up (longest snake {longest}), "
+          f"{sum(1 for c in causes if c in ('wall', 'self'))} died")
+
+
+def bench_batch(n: int, width: int, height: int, steps: int, seed: int):
+    """Measure aggregate BatchSnakeEngine throughput with random turns."""
+    import numpy as np
+    from snake_batch import BatchSnakeEngine, NO_ACTION
+
+    batch = BatchSnakeEngine(n, width, height, seed=seed)
+    rng = np.random.default_rng(seed)
+    # A pool of pre-drawn action vectors so the timing covers the engine only
+    pool = [np.where(rng.random(n) < 0.2, rng.integers(0, 4, n), NO_ACTION).astype(np.int32)
+            for _ in range(64)]
+
+    start = time.perf_counter()
+    for t in range(steps):
+        batch.step(pool[t % len(pool)])
+    elapsed = time.perf_counter() - start
+
+    total = n * steps
+    print(f"BatchSnakeEngine N={n} {width}x{height}: {steps} ticks, "
+          f"{batch.games_finished} games in {elapsed:.2f}s")
+    print(f"{total / elapsed:,.0f} aggregate steps/sec")
+
+
+def bench_quiz_frame(frames: int):
+    """
+    Compare quiz overlay frame time before text/overlay caching (every string
+    rendered, overlay allocated and question re-wrapped per frame) and after.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from snake_game import SnakeGame, WINDOW_WIDTH, WINDOW_HEIGHT, BLACK, WHITE, YELLOW, GRAY
+
+    game = SnakeGame()
+    quiz = game.quiz_manager
+    question = max(quiz.questions, key=lambda q: len(q['question']))
+    quiz.current_question = question
+    quiz.quiz_active = True
+
+    def draw_quiz_uncached():
+        screen = game.screen
+        screen.fill(BLACK)
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        overlay.set_alpha(230)
+        overlay.fill(BLACK)
+        screen.blit(overlay, (0, 0))
+        title = game.font.render("QUIZ TIME!", True, YELLOW)
+        screen.blit(title, title.get_rect(center=(WINDOW_WIDTH // 2, 100)))
+        y_offset = 160
+        for line in game.wrap_text(question['question'], 700):
+            text = game.small_font.render(line, True, WHITE)
+            screen.blit(text, text.get_rect(center=(WINDOW_WIDTH // 2, y_offset)))
+            y_offset += 30
+        y_offset += 20
+        for i, choice in enumerate(question['choices']):
+            text = game.small_font.render(f"{i+1}. {choice}", True, WHITE)
+            screen.blit(text, text.get_rect(center=(WINDOW_WIDTH // 2, y_offset)))
+            y_offset += 40
+        text = game.small_font.render("Press 1-4 to answer", True, GRAY)
+        screen.blit(text, text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 50)))
+        pygame.display.flip()
+
+    timings = {}
+    for label, draw in (("before (uncached)", draw_quiz_uncached), ("after (cached)", game.draw_full)):
+        draw()
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        timings[label] = (time.perf_counter() - start) / frames
+
+    print(f"Quiz overlay frame time over {frames} frames:")
+    for label, seconds in timings.items():
+        print(f"  {label:<18} {seconds * 1e6:8.0f} us/frame")
+    before, after = timings.values()
+    print(f"  speedup            {before / after:8.1f}x")
+    pygame.quit()
+
+
+class FlakyResultServer:
+    """
+    Local stand-in for the results endpoint. Each request is delayed by
+    `latency` seconds and fails with probability `fail_rate`, either with a
+    500 or by dropping the connection. Received results are kept by id.
+    """
+
+    def __init__(self, latency: float, fail_rate: float, seed: int, port: int = 0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import json
+        import threading
+        from quiz.uploader import decode_batch
+
+        self.received = {}
+        self.stopped = False
+        self.requests = 0
+        self.bytes = 0
+        self.connections = set()
+        rng = random.Random(seed)
+        lock = threading.Lock()
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if owner.stopped:
+                    # Keep-alive connections outlive shutdown(); drop them like a dead server
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with lock:
+                    owner.requests += 1
+                    owner.bytes += len(body)
+                    owner.connections.add(self.client_address)
+                    roll = rng.random()
+                time.sleep(latency)
+                if roll < fail_rate / 2:
+                    self.send_response(500)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if roll < fail_rate:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                results = decode_batch(json.loads(body))
+                with lock:
+                    for result in results:
+                        owner.received[result['id']] = owner.received.get(result['id'], 0) + 1
+                reply = b'{"status":"ok"}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.stopped = True
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def bench_uploader(results: int, latency: float, fail_rate: float, batch_size: int,
+                   kiosks: int, seed: int):
+    """
+    Drive ResultUploader against a flaky local server, then through an
+    outage, and check that submit() never blocks and nothing is lost. Then
+    compare one request per result with batched, pooled delivery from
+    several kiosks sharing the server.
+    """
+    import json
+    import tempfile
+    import requests
+    from quiz.uploader import ResultUploader
+
+    def make_result(i):
+        return {'id': i, 'timestamp': time.time(), 'question_id': i % 8 + 1,
+                'question': "What is the capital of France?", 'correct': i % 2 == 0,
+                'coins_earned': 10 if i % 2 == 0 else 0}
+
+    server = FlakyResultServer(latency, fail_rate, seed)
+    spool = tempfile.mkdtemp(prefix="upload-spool-")
+    max_memory = 64
+    uploader = ResultUploader(server.url, spool_dir=spool, max_memory=max_memory, batch_size=batch_size,
+                              batch_window=0.05, timeout=1.0, base_delay=0.05, max_delay=0.5)
+
+    submit_times = []
+    perf_counter = time.perf_counter
+
+    def submit(i):
+        t0 = perf_counter()
+        uploader.submit(make_result(i))
+        submit_times.append(perf_counter() - t0)
+
+    # Phase 1: flaky but reachable server
+    start = perf_counter()
+    for i in range(results):
+        submit(i)
+    uploader.flush()
+    online = perf_counter() - start
+    sent_online = uploader.sent
+    spilled_online = uploader.spilled
+
+    # Phase 2: outage - results pile up and spill to disk
+    port = server.port
+    server.stop()
+    online_server = server
+    # A first batch is retried from memory (with more queued behind it) until
+    # the queue spills, then the rest arrive
+    first = min(results, max_memory - 1)
+    for i in range(results, results + first):
+        submit(i)
+    time.sleep(0.5)
+    for i in range(results + first, 2 * results):
+        submit(i)
+    time.sleep(1.0)
+    spilled = uploader.spilled - spilled_online
+    on_disk = len(os.listdir(spool))
+
+    # Phase 3: server comes back and the backlog drains
+    server = FlakyResultServer(latency, fail_rate, seed + 1, port=port)
+    start = perf_counter()
+    uploader.flush()
+    recovery = perf_counter() - start
+    uploader.close()
+    server.stop()
+
+    missing = 2 * results - len(server.received) - sent_online
+    # received keeps ids in the order they first arrived
+    in_order = all(list(s.received) == sorted(s.received) for s in (online_server, server))
+    ordered = sorted(submit_times)
+    print(f"Uploader against stand-in server ({latency * 1000:.0f} ms latency, {fail_rate:.0%} failures):")
+    print(f"  submit() p50/p99/max   {ordered[len(ordered) // 2] * 1e6:.1f} / "
+          f"{ordered[int(len(ordered) * 0.99)] * 1e6:.1f} / {ordered[-1] * 1e6:.1f} us")
+    print(f"  online: {sent_online} results delivered in {online:.2f}s, {uploader.failures} failed attempts total")
+    print(f"  outage: {spilled} results spilled to {on_disk} spool file(s)")
+    print(f"  recovery: backlog drained in {recovery:.2f}s, spool files left: {len(os.listdir(spool))}")
+    print(f"  delivered {uploader.sent}/{2 * results}, missing {max(0, missing)}, "
+          f"in submission order: {'yes' if in_order else 'NO'}")
+
+    # Shutdown mid-chunk: two spooled chunks, the server dies after the first
+    # batch, then close(). The rest of the first chunk must still go first.
+    spool = tempfile.mkdtemp(prefix="upload-spool-")
+    for chunk_id, ids in ((1, range(0, 5)), (2, range(5, 10))):
+        with open(os.path.join(spool, f"{chunk_id:08d}.jsonl"), 'w') as f:
+            for i in ids:
+                f.write(json.dumps(make_result(i)) + "\n")
+    server = FlakyResultServer(latency, 0.0, seed)
+    uploader = ResultUploader(server.url, spool_dir=spool, batch_size=2, batch_window=0.05,
+                              timeout=1.0, base_delay=0.05, max_delay=0.5)
+    while not server.received:
+        time.sleep(0.001)
+    server.stop()
+    uploader.close(timeout=0.5)
+    before = list(server.received)
+    spooled = []
+    for name in sorted(os.listdir(spool)):
+        with open(os.path.join(spool, name)) as f:
+            spooled.append([json.loads(line)['id'] for line in f])
+    server = FlakyResultServer(latency, 0.0, seed, port=server.port)
+    uploader = ResultUploader(server.url, spool_dir=spool, batch_window=0.05)
+    uploader.flush()
+    uploader.close()
+    server.stop()
+    order = before + list(server.received)
+    print(f"  shutdown mid-chunk: sent {before}, spooled {spooled}, then {list(server.received)}; "
+          f"in submission order: {'yes' if order == list(range(10)) else 'NO'}")
+
+    # Per-result posts (old behaviour) vs batched pooled delivery, no failures
+    print(f"\n{kiosks} kiosks x {results} results, {latency * 1000:.0f} ms latency:")
+    server = FlakyResultServer(latency, 0.0, seed)
+    start = perf_counter()
+    for i in range(kiosks * results):
+        requests.post(server.url, json=make_result(i), timeout=5)
+    single = (perf_counter() - start, server.requests, server.bytes, len(server.connections))
+    server.stop()
+
+    server = FlakyResultServer(latency, 0.0, seed)
+    uploaders = [ResultUploader(server.url, spool_dir=tempfile.mkdtemp(prefix="upload-spool-"),
+                                max_memory=kiosks * results, batch_size=batch_size, batch_window=0.05)
+                 for _ in range(kiosks)]
+    start = perf_counter()
+    for i in range(kiosks * results):
+        uploaders[i % kiosks].submit(make_result(i))
+    for kiosk in uploaders:
+        kiosk.close(timeout=60)
+    batched = (perf_counter() - start, server.requests, server.bytes, len(server.connections))
+    server.stop()
+
+    raw_bytes = sum(len(json.dumps(make_result(i))) for i in range(kiosks * results))
+    print(f"  {'':<22}{'seconds':>9}{'requests':>10}{'bytes':>11}{'connections':>13}")
+    for label, (seconds, count, size, conns) in (("one post per result", single),
+                                                 (f"batched ({batch_size}) + pooled", batched)):
+        print(f"  {label:<22}{seconds:9.2f}{count:10d}{size:11d}{conns:13d}")
+    print(f"  uncompressed JSON would be {raw_bytes} bytes")
+
+
+def bench_storage(sizes, answers: int, seed: int):
+    """
+    Startup time (stats + inventory) and per-answer cost for the old
+    rewrite-everything JSON file, FileStorage and SqliteStorage at growing
+    history sizes.
+    """
+    import json
+    import tempfile
+    from storage import FileStorage, SqliteStorage
+
+    rng = random.Random(seed)
+    perf_counter = time.perf_counter
+
+    def make_result():
+        correct = rng.random() < 0.7
+        return {'timestamp': time.time() - rng.random() * 86400 * 365, 'question_id': rng.randint(1, 8),
+                'question': "What is the capital of France?", 'correct': correct,
+                'coins_earned': 10 if correct else 0}
+
+    def time_answers(add, count):
+        start = perf_counter()
+        for _ in range(count):
+            add(make_result())
+        return (perf_counter() - start) / count
+
+    print(f"{'records':>9} {'backend':<8} {'startup ms':>11} {'per answer us':>14} {'disk KB':>9}")
+    for size in sizes:
+        history = [make_result() for _ in range(size)]
+        items = {name: size // 60 for name in ("Golden Apple", "Speed Boost", "Star Badge")}
+        workdir = tempfile.mkdtemp(prefix="storage-bench-")
+
+        # Old behaviour: whole list parsed at startup and rewritten per answer
+        legacy = os.path.join(workdir, "quiz_results.json")
+        with open(legacy, 'w') as f:
+            json.dump(history, f, indent=2)
+        start = perf_counter()
+        with open(legacy) as f:
+            results = json.load(f)
+        sum(r['coins_earned'] for r in results)
+        startup = perf_counter() - start
+
+        def add_legacy(result):
+            results.append(result)
+            with open(legacy, 'w') as f:
+                json.dump(results, f, indent=2)
+
+        per_answer = time_answers(add_legacy, max(1, min(answers, 2_000_000 // max(size, 1))))
+        print(f"{size:>9} {'json':<8} {startup * 1000:>11.1f} {per_answer * 1e6:>14.0f} "
+              f"{os.path.getsize(legacy) // 1024:>9}")
+
+        backends = (
+            ("files", lambda: FileStorage(os.path.join(workdir, "quiz_results.jsonl"), None,
+                                          os.path.join(workdir, "quiz_results.stats.json"),
+                                          os.path.join(workdir, "store_state.json"))),
+            ("sqlite", lambda: SqliteStorage(os.path.join(workdir, "snake_game.db"))),
+        )
+        for name, open_backend in backends:
+            # Previous sessions: history stored and a stats snapshot taken
+            storage = open_backend()
+            if isinstance(storage, SqliteStorage):
+                storage.import_results(history)
+            else:
+                for result in history:
+                    storage.add_results([result])
+            storage.add_items(items)
+            storage.quiz_stats()
+            storage.close()
+
+            start = perf_counter()
+            storage = open_backend()
+            stats = storage.quiz_stats()
+            storage.load_inventory()
+            startup = perf_counter() - start
+
+            def add(result):
+                storage.add_results([result])
+                stats.add(result)
+                stats.log_offset = storage.results_position()
+
+            per_answer = time_answers(add, answers)
+            storage.close()
+            disk = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir)
+                       if f.startswith("snake_game.db" if name == "sqlite" else "quiz_results.jsonl"))
+            print(f"{size:>9} {name:<8} {startup * 1000:>11.1f} {per_answer * 1e6:>14.0f} {disk // 1024:>9}")
+
+
+def bench_prizes(draws: int, sizes, seed: int):
+    """
+    Time weighted prize draws with random.choices (cumulative weights and a
+    bisect per call) against the alias table, one at a time and in bulk, and
+    check the drawn frequencies against the weights.
+    """
+    from store import AliasSampler
+
+    perf_counter = time.perf_counter
+    print(f"{draws:,} weighted draws:")
+    print(f"  {'prizes':>7} {'method':<26} {'ns/draw':>9} {'max freq error':>15}")
+    for size in sizes:
+        rng = random.Random(seed)
+        # Rarity tiers: most prizes common, a few very rare
+        weights = {f"prize-{i}": rng.choice((100, 100, 100, 30, 5, 1)) for i in range(size)}
+        total = sum(weights.values())
+        names = list(weights)
+        values = list(weights.values())
+        sampler = AliasSampler(weights, random.Random(seed))
+
+        def choices_single():
+            choose = random.Random(seed).choices
+            counts = {}
+            for _ in range(draws):
+                prize = choose(names, values)[0]
+                counts[prize] = counts.get(prize, 0) + 1
+            return counts
+
+        def alias_single():
+            draw = sampler.draw
+            counts = {}
+            for _ in range(draws):
+                prize = draw()
+                counts[prize] = counts.get(prize, 0) + 1
+            return counts
+
+        def alias_bulk():
+            return sampler.draw_counts(draws)
+
+        for label, run in (("random.choices per draw", choices_single),
+                           ("alias draw()", alias_single),
+                           ("alias draw_counts(n)", alias_bulk)):
+            start = perf_counter()
+            counts = run()
+            elapsed = perf_counter() - start
+            error = max(abs(counts.get(name, 0) / draws - weight / total) for name, weight in weights.items())
+            print(f"  {size:>7} {label:<26} {elapsed / draws * 1e9:>9.0f} {error:>15.5f}")
+
+
+def bench_questions(sizes, seed: int):
+    """
+    Generated question banks: plain json.load, first (validating) compile and
+    cached (mapped) load times, the cost of picking a question at random and
+    by id, and the Python heap used by a cached load plus 1000 picks.
+    """
+    import json
+    import tempfile
+    import tracemalloc
+    from quiz.question_bank import cache_path, load_bank
+
+    rng = random.Random(seed)
+    perf_counter = time.perf_counter
+    print(f"{'questions':>10} {'json.load ms':>13} {'compile ms':>11} {'cached ms':>10} "
+          f"{'pick us':>8} {'by id us':>9} {'heap KB':>8} {'cache KB':>9}")
+    for size in sizes:
+        bank = [{
+            'id': i + 1,
+            'question': f"Question {i + 1}: what is {rng.randint(2, 99)} x {rng.randint(2, 99)}?",
+            'choices': [str(rng.randint(4, 9801)) for _ in range(4)],
+            'correct': rng.randrange(4),
+            'explanation': "Multiply the two numbers."
+        } for i in range(size)]
+        source = os.path.join(tempfile.mkdtemp(prefix="question-bench-"), "questions.json")
+        with open(source, 'w') as f:
+            json.dump(bank, f, indent=2)
+
+        start = perf_counter()
+        with open(source) as f:
+            json.load(f)
+        plain = perf_counter() - start
+
+        start = perf_counter()
+        load_bank(source)[0].close()
+        cold = perf_counter() - start
+
+        runs = 20
+        start = perf_counter()
+        for _ in range(runs):
+            questions, cached = load_bank(source)
+            questions.close()
+        warm = (perf_counter() - start) / runs
+        assert cached and len(questions) == size
+
+        picks = 1000
+        tracemalloc.start()
+        questions, _ = load_bank(source)
+        for _ in range(picks):
+            rng.choice(questions)
+        heap = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = perf_counter()
+        for _ in range(picks):
+            rng.choice(questions)
+        pick = (perf_counter() - start) / picks
+        ids = [rng.randint(1, size) for _ in range(picks)]
+        start = perf_counter()
+        for question_id in ids:
+            assert questions.by_id(question_id)['id'] == question_id
+        by_id = (perf_counter() - start) / picks
+        questions.close()
+
+        print(f"{size:>10} {plain * 1000:>13.2f} {cold * 1000:>11.2f} {warm * 1000:>10.3f} "
+              f"{pick * 1e6:>8.1f} {by_id * 1e6:>9.1f} {heap // 1024:>8} "
+              f"{os.path.getsize(cache_path(source)) // 1024:>9}")
+
+
+def check_schedule_coverage(seed: int):
+    """
+    Fail unless every question is asked within len(bank) * NEW_EVERY quizzes,
+    even for a player who answers everything wrong (missed questions come
+    back every two quizzes and must not crowd out the rest of the bank).
+    """
+    from quiz.question_bank import QuestionBank, pack_bank
+    from quiz.scheduler import NEW_EVERY, QuestionScheduler
+
+    players = {
+        "all wrong": lambda n, question: False,
+        "1 in 4 right": lambda n, question: n % 4 == question['correct'],
+    }
+    for size in (8, 50, 1000):
+        bank = QuestionBank(pack_bank([{
+            'id': i + 1, 'question': f"Question {i + 1}", 'choices': ["a", "b", "c", "d"],
+            'correct': 0, 'explanation': ""
+        } for i in range(size)], b"", 0, 0))
+        limit = size * NEW_EVERY
+        for label, answer in players.items():
+            schedule = QuestionScheduler(bank, random.Random(seed))
+            for n in range(limit):
+                question = schedule.next_question()
+                schedule.record(question['id'], answer(n, question))
+                if len(schedule.cards) == size:
+                    break
+            if len(schedule.cards) < size:
+                raise AssertionError(f"{size} questions, {label}: only {len(schedule.cards)} asked "
+                                     f"in {limit} quizzes")
+            print(f"Coverage OK: {size} questions, {label}: all asked within {n + 1} quizzes")
+
+
+def bench_schedule(sizes, players: int, answers: int, seed: int):
+    """
+    Synthetic players answer `answers` quizzes each. A player gets a question
+    right with a chance that grows with how often they got it right before,
+    so reviewing pays off. Reports selection + update cost early and late in
+    the history (it should not grow), accuracy against random.choice, and
+    the snapshot size and load time.
+    """
+    from quiz.question_bank import QuestionBank, pack_bank
+    from quiz.scheduler import QuestionScheduler
+
+    perf_counter = time.perf_counter
+    window = min(1000, answers // 2)
+    print(f"{'questions':>10} {'first us':>9} {'last us':>8} {'cards':>7} {'accuracy':>9} "
+          f"{'random acc':>11} {'snapshot KB':>12} {'load ms':>8}")
+    for size in sizes:
+        bank = QuestionBank(pack_bank([{
+            'id': i + 1, 'question': f"Question {i + 1}", 'choices': ["a", "b", "c", "d"],
+            'correct': i % 4, 'explanation': ""
+        } for i in range(size)], b"", 0, 0))
+        first = last = accuracy = random_accuracy = 0.0
+        snapshot = b""
+        load = 0.0
+        for player in range(players):
+            rng = random.Random(seed * 1000 + player)
+            skill = 0.3 + 0.5 * player / max(players - 1, 1)
+
+            def answer(known, question_id):
+                right = rng.random() < min(0.97, skill + 0.15 * known.get(question_id, 0))
+                if right:
+                    known[question_id] = known.get(question_id, 0) + 1
+                return right
+
+            schedule = QuestionScheduler(bank, random.Random(seed + player))
+            known = {}
+            right_late = 0
+            for n in range(answers):
+                start = perf_counter()
+                question = schedule.next_question()
+                elapsed = perf_counter() - start
+                right = answer(known, question['id'])
+                start = perf_counter()
+                schedule.record(question['id'], right)
+                elapsed += perf_counter() - start
+                if n < window:
+                    first += elapsed
+                elif n >= answers - window:
+                    last += elapsed
+                    right_late += right
+            accuracy += right_late / window
+
+            known = {}
+            right_late = 0
+            for n in range(answers):
+                right = answer(known, rng.choice(bank)['id'])
+                if n >= answers - window:
+                    right_late += right
+            random_accuracy += right_late / window
+
+            snapshot = schedule.to_bytes()
+            start = perf_counter()
+            QuestionScheduler.from_bytes(snapshot, bank)
+            load += perf_counter() - start
+
+        runs = players * window
+        print(f"{size:>10} {first / runs * 1e6:>9.1f} {last / runs * 1e6:>8.1f} {len(schedule.cards):>7} "
+              f"{accuracy / players:>9.0%} {random_accuracy / players:>11.0%} "
+              f"{len(snapshot) / 1024:>12.1f} {load / players * 1000:>8.2f}")
+
+
+def bench_quiz_timer(hours: float, interval: float, tick_rate: float, seed: int):
+    """
+    Headless fast-forward: a simulated clock advances one tick at a time, a
+    QuizManager checks for a quiz every tick and each quiz is answered at
+    once. The store is opened for random stretches, which must not count
+    toward the next quiz.
+    """
+    import contextlib
+    import io
+    import tempfile
+    from storage import FileStorage
+    from quiz.quiz_manager import QuizManager
+
+    perf_counter = time.perf_counter
+    simulated = [0.0]
+    workdir = tempfile.mkdtemp(prefix="quiz-timer-bench-")
+    storage = FileStorage(os.path.join(workdir, "quiz_results.jsonl"), None,
+                          os.path.join(workdir, "quiz_results.stats.json"),
+                          os.path.join(workdir, "store_state.json"),
+                          schedule_file=os.path.join(workdir, "quiz_schedule.bin"))
+    quiz = QuizManager(os.path.join(os.path.dirname(__file__), "quiz", "questions.json"),
+                       quiz_interval=interval, rng=random.Random(seed),
+                       clock=lambda: simulated[0], storage=storage)
+
+    rng = random.Random(seed)
+    tick = 1.0 / tick_rate
+    ticks = int(hours * 3600 * tick_rate)
+    store_open = False
+    active = 0.0
+    quizzes = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = perf_counter()
+        for _ in range(ticks):
+            if rng.random() < 0.002:
+                store_open = not store_open
+                if store_open:
+                    quiz.pause_timer()
+                else:
+                    quiz.resume_timer()
+            simulated[0] += tick
+            if not store_open:
+                active += tick
+            if quiz.check_and_show_quiz(simulated[0]):
+                quizzes += 1
+                quiz.submit_answer(0)
+        elapsed = perf_counter() - start
+        quiz.close()
+
+    checks = 1_000_000
+    now = simulated[0]
+    check = quiz.check_and_show_quiz
+    start = perf_counter()
+    for _ in range(checks):
+        check(now)
+    per_check = (perf_counter() - start) / checks
+
+    print(f"Simulated {hours:g} h of play ({ticks:,} ticks at {tick_rate:g}/s) in {elapsed:.2f}s "
+          f"({hours * 3600 / elapsed:,.0f}x real time)")
+    print(f"  quizzes: {quizzes:,} ({quizzes / elapsed:,.0f} per second), "
+          f"expected {active / interval:,.0f} from {active / 3600:.2f} h of play outside the store")
+    print(f"  check_and_show_quiz between quizzes: {per_check * 1e9:.0f} ns")
+
+
+def bench_events(count: int):
+    """
+    Game-thread cost of one AppleEaten event: nobody subscribed (guarded,
+    emit and publish), against the old `if callback:` check, with a synchronous
+    handler, and queued for a ThreadedSubscriber.
+    """
+    from events import AppleEaten, EventBus, ThreadedSubscriber
+
+    perf_counter = time.perf_counter
+
+    def timed(label, run):
+        start = perf_counter()
+        run()
+        print(f"  {label:<42} {(perf_counter() - start) / count * 1e9:>7.0f} ns/event")
+
+    bus = EventBus()
+    callback = None
+
+    def old_callback():
+        for i in range(count):
+            if callback:
+                callback(i, 3)
+
+    def guarded():
+        for i in range(count):
+            if AppleEaten in bus.subscribed:
+                bus.publish(AppleEaten(i, 3))
+
+    def emit():
+        for i in range(count):
+            bus.emit(AppleEaten, i, 3)
+
+    def publish():
+        for i in range(count):
+            bus.publish(AppleEaten(i, 3))
+
+    print(f"{count:,} events")
+    timed("no subscriber: `if callback:` (before)", old_callback)
+    timed("no subscriber: `if ... in bus.subscribed`", guarded)
+    timed("no subscriber: emit()", emit)
+    timed("no subscriber: publish(AppleEaten(...))", publish)
+
+    handled = []
+    bus.subscribe(AppleEaten, handled.append)
+    timed("synchronous handler: emit()", emit)
+    bus.unsubscribe(AppleEaten, handled.append)
+
+    seen = [0]
+
+    def count_event(event):
+        seen[0] += 1
+
+    subscriber = ThreadedSubscriber(count_event, max_pending=count).attach(bus, [AppleEaten])
+    timed("threaded subscriber: emit() (queue only)", emit)
+    start = perf_counter()
+    subscriber.flush()
+    drained = perf_counter() - start
+    subscriber.close()
+    print(f"  subscriber thread handled {seen[0]:,} events, "
+          f"{drained * 1000:.0f} ms after the last was queued")
+
+
+def bench_profiler(frames: int):
+    """
+    Game-loop cost of the frame profiler per frame: disabled (the loop's
+    `if profiler:` checks) and enabled (begin, four laps, end), plus the
+    time to build the exit summary.
+    """
+    from frame_profiler import FrameProfiler, INPUT, UPDATE, DRAW, WAIT
+
+    perf_counter = time.perf_counter
+
+    def loop(profiler):
+        for _ in range(frames):
+            if profiler:
+                profiler.begin_frame()
+            if profiler:
+                profiler.lap(INPUT)
+            if profiler:
+                profiler.lap(UPDATE)
+            if profiler:
+                profiler.lap(DRAW)
+            if profiler:
+                profiler.lap(WAIT)
+                profiler.end_frame("play")
+
+    results = {}
+    for label, profiler in (("disabled", None), ("enabled", FrameProfiler())):
+        start = perf_counter()
+        loop(profiler)
+        results[label] = (perf_counter() - start) / frames
+    print(f"{frames:,} frames")
+    for label, seconds in results.items():
+        print(f"  {label:<9} {seconds * 1e6:>7.2f} us/frame ({seconds * 60 * 100:.3f}% of a frame at 60 fps)")
+    start = perf_counter()
+    profiler.summary()
+    print(f"  summary   {(perf_counter() - start) * 1000:>7.2f} ms")
+
+
+def bench_telemetry(count: int, seconds: float, sink_delay: float):
+    """
+    Game-thread cost of recording a metric (against printing the same line
+    to a console), the exporter's cost per snapshot, and memory while a
+    sink takes longer than the export interval.
+    """
+    import io
+    import threading
+    import tracemalloc
+    from contextlib import redirect_stdout
+    from telemetry import NdjsonSink, Telemetry, TelemetryExporter, prometheus_text
+
+    perf_counter = time.perf_counter
+    registry = Telemetry()
+    counter = registry.counter("events")
+    timing = registry.timing("durations")
+
+    def timed(label, run):
+        start = perf_counter()
+        run()
+        print(f"  {label:<34} {(perf_counter() - start) / count * 1e9:>7.0f} ns")
+
+    def prints():
+        with redirect_stdout(io.StringIO()):
+            for i in range(count):
+                print(f"Purchased: item {i}")
+
+    def incs():
+        for _ in range(count):
+            counter.inc()
+
+    def records():
+        for i in range(count):
+            timing.record(i * 1e-7)
+
+    def timed_blocks():
+        for _ in range(count):
+            with timing.time():
+                pass
+
+    print(f"{count:,} records")
+    timed("print() to a buffer (before)", prints)
+    timed("Counter.inc()", incs)
+    timed("Timing.record()", records)
+    timed("with Timing.time(): (empty block)", timed_blocks)
+
+    # A registry the size of the game's, with samples in every timing
+    for n in range(20):
+        registry.counter(f"counter_{n}").inc(n)
+        registry.gauge(f"gauge_{n}", fn=lambda n=n: n)
+        for i in range(100):
+            registry.timing(f"timing_{n}").record(i * 1e-4)
+    start = perf_counter()
+    snapshot = registry.snapshot()
+    snap_ms = (perf_counter() - start) * 1000
+    start = perf_counter()
+    text = prometheus_text(snapshot)
+    render_ms = (perf_counter() - start) * 1000
+    print(f"  snapshot of {len(registry.counters)} counters, {len(registry.gauges)} gauges, "
+          f"{len(registry.timings)} timings: {snap_ms:.2f} ms, Prometheus text {render_ms:.2f} ms "
+          f"({len(text):,} bytes)")
+
+    class SlowSink:
+        """Takes sink_delay seconds per write, far longer than the export interval."""
+
+        def __init__(self):
+            self.writes = 0
+
+        def write(self, snapshot):
+            time.sleep(sink_delay)
+            self.writes += 1
+
+        def close(self):
+            pass
+
+    directory = os.path.join("/tmp" if os.path.isdir("/tmp") else ".", f"telemetry-bench-{os.getpid()}")
+    file_sink = NdjsonSink(os.path.join(directory, "metrics.ndjson"), max_bytes=64 * 1024, backups=2)
+    slow = SlowSink()
+    tracemalloc.start()
+    exporter = TelemetryExporter([slow, file_sink], registry=registry, interval=0.001)
+    stop = threading.Event()
+    recorded = [0]
+
+    def game_thread():
+        while not stop.is_set():
+            for _ in range(1000):
+                counter.inc()
+                timing.record(0.016)
+            recorded[0] += 1000
+
+    worker = threading.Thread(target=game_thread)
+    worker.start()
+    samples = []
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        time.sleep(seconds / 10)
+        samples.append(tracemalloc.get_traced_memory()[0])
+    stop.set()
+    worker.join()
+    exporter.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    files = sorted(os.listdir(directory))
+    disk = sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    for name in files:
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    print(f"Slow sink ({sink_delay * 1000:.0f} ms per write, exporting every 1 ms) for {seconds:g}s:")
+    print(f"  {recorded[0]:,} samples recorded, {exporter.exports} snapshots exported, "
+          f"{slow.writes} slow writes")
+    print(f"  traced memory: {min(samples) / 1024:.0f} - {max(samples) / 1024:.0f} KB "
+          f"(peak {peak / 1024:.0f} KB)")
+    print(f"  NDJSON files: {len(files)} ({disk / 1024:.0f} KB, rotating at 64 KB with 2 backups)")
+
+
+def main():
+    """Entry point for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Snake game benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    board = sub.add_parser("board", help="tick cost of SnakeBoard from length 3 to a full board")
+    board.add_argument("--width", type=int, default=40)
+    board.add_argument("--height", type=int, default=30)
+    board.add_argument("--seed", type=int, default=0)
+
+    engine = sub.add_parser("engine", help="headless SnakeEngine steps per second")
+    engine.add_argument("--width", type=int, default=40)
+    engine.add_argument("--height", type=int, default=30)
+    engine.add_argument("--steps", type=int, default=1_000_000)
+    engine.add_argument("--seed", type=int, default=0)
+
+    batch = sub.add_parser("batch", help="vectorized BatchSnakeEngine steps per second")
+    batch.add_argument("-n", type=int, default=4096, help="number of boards")
+    batch.add_argument("--width", type=int, default=40)
+    batch.add_argument("--height", type=int, default=30)
+    batch.add_argument("--steps", type=int, default=500)
+    batch.add_argument("--seed", type=int, default=0)
+    batch.add_argument("--check", action="store_true",
+                       help="verify parity with SnakeEngine (12x10 boards, played until full) before timing")
+
+    quiz_frame = sub.add_parser("quiz-frame", help="quiz overlay frame time before/after text caching")
+    quiz_frame.add_argument("--frames", type=int, default=500)
+
+    uploader = sub.add_parser("uploader", help="background result upload against a flaky local server")
+    uploader.add_argument("--results", type=int, default=200)
+    uploader.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    uploader.add_argument("--fail-rate", type=float, default=0.3)
+    uploader.add_argument("--batch-size", type=int, default=50)
+    uploader.add_argument("--kiosks", type=int, default=10)
+    uploader.add_argument("--seed", type=int, default=0)
+
+    storage = sub.add_parser("storage", help="startup and per-answer cost of the storage backends")
+    storage.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000])
+    storage.add_argument("--answers", type=int, default=200)
+    storage.add_argument("--seed", type=int, default=0)
+
+    prizes = sub.add_parser("prizes", help="weighted prize draws per second")
+    prizes.add_argument("--draws", type=int, default=1_000_000)
+    prizes.add_argument("--sizes", type=int, nargs="+", default=[10, 1000])
+    prizes.add_argument("--seed", type=int, default=0)
+
+    questions = sub.add_parser("questions", help="question bank load time as the bank grows")
+    questions.add_argument("--sizes", type=int, nargs="+", default=[8, 1000, 20000, 100000])
+    questions.add_argument("--seed", type=int, default=0)
+
+    schedule = sub.add_parser("schedule", help="spaced-repetition question selection cost and effect")
+    schedule.add_argument("--sizes", type=int, nargs="+", default=[1000, 20000, 100000])
+    schedule.add_argument("--players", type=int, default=3)
+    schedule.add_argument("--answers", type=int, default=20000, help="quizzes answered per player")
+    schedule.add_argument("--seed", type=int, default=0)
+
+    quiz_timer = sub.add_parser("quiz-timer", help="fast-forward quiz timing on a simulated clock")
+    quiz_timer.add_argument("--hours", type=float, default=10.0, help="simulated play time")
+    quiz_timer.add_argument("--interval", type=float, default=1.0, help="seconds of play between quizzes")
+    quiz_timer.add_argument("--tick-rate", type=float, default=100.0)
+    quiz_timer.add_argument("--seed", type=int, default=0)
+
+    events = sub.add_parser("events", help="event bus publish cost")
+    events.add_argument("--count", type=int, default=1_000_000)
+
+    profiler = sub.add_parser("profiler", help="frame profiler overhead")
+    profiler.add_argument("--frames", type=int, default=200_000)
+
+    telemetry = sub.add_parser("telemetry", help="telemetry recording and export cost")
+    telemetry.add_argument("--count", type=int, default=1_000_000)
+    telemetry.add_argument("--seconds", type=float, default=5.0, help="slow-sink run time")
+    telemetry.add_argument("--sink-delay", type=float, default=0.2, help="seconds per slow sink write")
+
+    args = parser.parse_args()
+    if args.bench == "board":
+        try:
+            hamiltonian_cycle(args.width, args.height)
+        except ValueError as e:
+            parser.error(str(e))
+        bench_board(args.width, args.height, args.seed)
+    elif args.bench == "engine":
+        bench_engine(args.width, args.height, args.steps, args.seed)
+    elif args.bench == "batch":
+        if args.check:
+            # Small boards, so the Hamiltonian boards fill up in a few thousand ticks
+            check_batch_parity(32, 12, 10, 20000, args.seed)
+        bench_batch(args.n, args.width, args.height, args.steps, args.seed)
+    elif args.bench == "quiz-frame":
+        bench_quiz_frame(args.frames)
+    elif args.bench == "uploader":
+        bench_uploader(args.results, args.latency, args.fail_rate, args.batch_size,
+                       args.kiosks, args.seed)
+    elif args.bench == "storage":
+        bench_storage(args.sizes, args.answers, args.seed)
+    elif args.bench == "prizes":
+        bench_prizes(args.draws, args.sizes, args.seed)
+    elif args.bench == "questions":
+        bench_questions(args.sizes, args.seed)
+    elif args.bench == "schedule":
+        check_schedule_coverage(args.seed)
+        bench_schedule(args.sizes, args.players, args.answers, args.seed)
+    elif args.bench == "quiz-timer":
+        bench_quiz_timer(args.hours, args.interval, args.tick_rate, args.seed)
+    elif args.bench == "events":
+        bench_events(args.count)
+    elif args.bench == "profiler":
+        bench_profiler(args.frames)
+    elif args.bench == "telemetry":
+        bench_telemetry(args.count, args.seconds, args.sink_delay)
+
+
+if __name__ == "__main__":
+    main()
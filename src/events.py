@@ -0,0 +1,231 @@
+"""
+Events - Game event bus
+
+The game, QuizManager and Store publish what happens; anything interested
+subscribes instead of being wired in with a callback:
+
+    AppleEaten     the snake ate an apple
+    QuizStarted    a quiz question is on screen (the game pauses)
+    QuizAnswered   the player answered it (the game resumes)
+    ItemPurchased  a store purchase
+    PurchaseFailed a purchase the player couldn't afford
+    GameOver       the snake died
+
+Handlers subscribed with subscribe() run synchronously on the game thread,
+so keep them short. Slow work (printing, telemetry, uploads) belongs in a
+ThreadedSubscriber, which only queues events on the game thread and handles
+them on its own thread.
+
+Publishing an event nobody listens to costs one dict lookup. With emit()
+the event object isn't even created, and a hot path can skip the call too:
+
+    if AppleEaten in bus.subscribed:
+        bus.publish(AppleEaten(score, length))
+"""
+import collections
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Type
+
+
+class Event:
+    """Base class for game events."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class AppleEaten(Event):
+    """The snake ate an apple (score and length after eating it)."""
+
+    __slots__ = ('score', 'length')
+
+    def __init__(self, score: int, length: int):
+        self.score = score
+        self.length = length
+
+
+class QuizStarted(Event):
+    """A quiz question is on screen."""
+
+    __slots__ = ('question_id',)
+
+    def __init__(self, question_id):
+        self.question_id = question_id
+
+
+class QuizAnswered(Event):
+    """The current quiz question was answered."""
+
+    __slots__ = ('question_id', 'correct', 'coins_earned')
+
+    def __init__(self, question_id, correct: bool, coins_earned: int):
+        self.question_id = question_id
+        self.correct = correct
+        self.coins_earned = coins_earned
+
+
+class ItemPurchased(Event):
+    """An item was bought from the store for cost coins."""
+
+    __slots__ = ('item', 'cost')
+
+    def __init__(self, item: str, cost: int):
+        self.item = item
+        self.cost = cost
+
+
+class PurchaseFailed(Event):
+    """A purchase costing cost coins was refused (the player only had coins)."""
+
+    __slots__ = ('cost', 'coins')
+
+    def __init__(self, cost: int, coins: int):
+        self.cost = cost
+        self.coins = coins
+
+
+class GameOver(Event):
+    """The snake died (cause as reported by SnakeEngine)."""
+
+    __slots__ = ('score', 'cause')
+
+    def __init__(self, score: int, cause: Optional[str]):
+        self.score = score
+        self.cause = cause
+
+
+Handler = Callable[[Event], None]
+
+
+class EventBus:
+    """
+    Delivers events to the handlers subscribed to their type.
+
+    The handler table is copied on every subscribe/unsubscribe and only read
+    when publishing, so publishing takes no lock. Subscribe from setup code
+    rather than from inside a handler.
+    """
+
+    def __init__(self):
+        """Initialize with no subscribers."""
+        self._handlers: Dict[Type[Event], Tuple[Handler, ...]] = {}
+        self._lock = threading.Lock()
+        # Event types with at least one handler
+        self.subscribed = frozenset()
+
+    def subscribe(self, event_type: Type[Event], handler: Handler):
+        """Call handler(event) for every event of this type."""
+        with self._lock:
+            handlers = dict(self._handlers)
+            handlers[event_type] = handlers.get(event_type, ()) + (handler,)
+            self._handlers = handlers
+            self.subscribed = frozenset(handlers)
+
+    def unsubscribe(self, event_type: Type[Event], handler: Handler):
+        """Stop calling a handler (does nothing if it wasn't subscribed)."""
+        with self._lock:
+            handlers = dict(self._handlers)
+            remaining = tuple(h for h in handlers.get(event_type, ()) if h != handler)
+            if remaining:
+                handlers[event_type] = remaining
+            else:
+                handlers.pop(event_type, None)
+            self._handlers = handlers
+            self.subscribed = frozenset(handlers)
+
+    def publish(self, event: Event):
+        """Deliver an event to its subscribers, in subscription order."""
+        handlers = self._handlers.get(type(event))
+        if handlers:
+            for handler in handlers:
+                handler(event)
+
+    def emit(self, event_type: Type[Event], *args):
+        """Create and publish an event, only if anyone subscribed to its type."""
+        handlers = self._handlers.get(event_type)
+        if handlers:
+            event = event_type(*args)
+            for handler in handlers:
+                handler(event)
+
+
+class ThreadedSubscriber:
+    """
+    Handles events on a background thread. Subscribe the instance itself to
+    a bus: on the game thread it only appends the event to a deque (no lock;
+    deque appends are atomic), and the thread drains the deque every
+    poll_interval seconds.
+
+    At most max_pending events wait; if the handler falls that far behind,
+    the oldest are dropped.
+    """
+
+    def __init__(self, handler: Handler, poll_interval: float = 0.05, max_pending: int = 10000,
+                 name: str = "event-subscriber"):
+        """
+        Args:
+            handler: Called with each event, on the subscriber's thread
+            poll_interval: Seconds between checks for new events
+            max_pending: Events kept waiting before the oldest are dropped
+            name: Thread name
+        """
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self._pending = collections.deque(maxlen=max_pending)
+        self._stop = threading.Event()
+        self.handled = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Event):
+        self._pending.append(event)
+
+    def attach(self, bus: EventBus, event_types: Iterable[Type[Event]]) -> "ThreadedSubscriber":
+        """Subscribe to several event types at once."""
+        for event_type in event_types:
+            bus.subscribe(event_type, self)
+        return self
+
+    def pending_count(self) -> int:
+        """Number of events not handled yet."""
+        return len(self._pending)
+
+    def _drain(self):
+        pending = self._pending
+        while pending:
+            event = pending.popleft()
+            try:
+                self.handler(event)
+                self.handled += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Event handler failed on {event!r}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self._drain()
+        self._drain()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued so far is handled.
+
+        Returns:
+            True if the queue emptied within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending and self._thread.is_alive():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval / 4)
+        return not self._pending
+
+    def close(self, timeout: float = 2.0):
+        """Handle what is queued, then stop the thread. Unsubscribe it from buses first."""
+        self._stop.set()
+        self._thread.join(timeout)
@@ -0,0 +1,251 @@
+"""
+FrameProfiler - Where each frame of SnakeGame.run goes
+
+Every frame is split into phases (input, update, draw, wait in clock.tick).
+Each phase, the frame's work (everything but the wait) and the whole frame
+keep:
+
+- a ring buffer of the last `capacity` samples, preallocated, for the
+  recent view shown in the debug overlay
+- a log-linear (HDR-style) histogram over the whole session, for p50 / p95 /
+  p99 / max that stay accurate to ~3% at any frame time and never grow
+
+The frames with the most work are kept with what was on screen at the
+time, which is what finds a stutter when the quiz or store opens.
+
+Enable with `python src/snake_game.py --profile` or SNAKE_PROFILE=1. When
+disabled no profiler exists and the game loop does no timing work.
+"""
+import heapq
+import json
+import os
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+
+PHASES = ("input", "update", "draw", "wait")
+INPUT, UPDATE, DRAW, WAIT = range(len(PHASES))
+
+# Histogram layout: microsecond values, 32 linear sub-buckets per power of two
+_SUB_BITS = 5
+_SUB_COUNT = 1 << _SUB_BITS
+_MAGNITUDES = 32  # Up to 2**36 us (~19 hours); longer values land in the last bucket
+
+
+class Histogram:
+    """Log-linear histogram of durations, recorded in microseconds."""
+
+    def __init__(self):
+        """Initialize empty (fixed size: ~1000 counters)."""
+        self.counts = array('Q', bytes(8 * _SUB_COUNT * (_MAGNITUDES + 1)))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @staticmethod
+    def bucket(us: int) -> int:
+        """Bucket index of a value; values below 64 us get exact buckets."""
+        if us < 2 * _SUB_COUNT:
+            return us
+        shift = us.bit_length() - _SUB_BITS - 1
+        return min((shift + 1) * _SUB_COUNT + (us >> shift) - _SUB_COUNT, _SUB_COUNT * (_MAGNITUDES + 1) - 1)
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """Lowest value in a bucket."""
+        if index < 2 * _SUB_COUNT:
+            return index
+        shift = index // _SUB_COUNT - 1
+        return (index % _SUB_COUNT + _SUB_COUNT) << shift
+
+    def record(self, seconds: float):
+        """Add one sample."""
+        us = int(seconds * 1e6)
+        self.counts[self.bucket(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, p: float) -> float:
+        """Value at or below which a fraction p of samples fall, in milliseconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(self.count * p + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_value(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> Dict:
+        """Count, mean, p50 / p95 / p99 and max in milliseconds."""
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max_us / 1000
+        }
+
+
+class RingBuffer:
+    """The last `capacity` samples (seconds), preallocated."""
+
+    def __init__(self, capacity: int):
+        """Allocate the buffer."""
+        self.samples = array('d', bytes(8 * capacity))
+        self.capacity = capacity
+        self.next = 0
+        self.filled = 0
+
+    def append(self, seconds: float):
+        """Overwrite the oldest sample."""
+        self.samples[self.next] = seconds
+        self.next = (self.next + 1) % self.capacity
+        if self.filled < self.capacity:
+            self.filled += 1
+
+    def values(self) -> List[float]:
+        """Samples oldest first."""
+        if self.filled < self.capacity:
+            return self.samples[:self.filled].tolist()
+        return (self.samples[self.next:] + self.samples[:self.next]).tolist()
+
+
+class FrameProfiler:
+    """
+    Per-phase frame timing for the game loop:
+
+        profiler.begin_frame()
+        handle_input();  profiler.lap(INPUT)
+        update();        profiler.lap(UPDATE)
+        ...
+        profiler.end_frame(state)
+    """
+
+    def __init__(self, capacity: int = 600, worst: int = 10,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            capacity: Recent frames kept per phase (600 = 10 s at 60 fps)
+            worst: Number of frames with the most work remembered with their state
+            clock: High-resolution time source in seconds
+        """
+        self.clock = clock
+        self.names = PHASES + ("work", "frame")
+        self.recent = [RingBuffer(capacity) for _ in self.names]
+        self.histograms = [Histogram() for _ in self.names]
+        self.frames = 0
+        self.worst_kept = worst
+        self._worst = []  # Min-heap of (work seconds, frame, state, frame seconds, phase seconds)
+        self._phase_seconds = [0.0] * len(PHASES)
+        self._frame_start = self._lap_start = 0.0
+        self._overlay_text = ""
+        self._overlay_at = -1.0
+
+    def begin_frame(self):
+        """Mark the start of a frame."""
+        self._frame_start = self._lap_start = self.clock()
+
+    def lap(self, phase: int):
+        """Charge the time since the previous lap (or frame start) to a phase."""
+        now = self.clock()
+        seconds = now - self._lap_start
+        self._lap_start = now
+        self._phase_seconds[phase] = seconds
+        self.recent[phase].append(seconds)
+        self.histograms[phase].record(seconds)
+
+    def end_frame(self, state: Optional[str] = None):
+        """
+        Mark the end of a frame.
+
+        Args:
+            state: What was on screen (e.g. "quiz"), kept with the slowest frames
+        """
+        seconds = self._lap_start - self._frame_start
+        work = seconds - self._phase_seconds[WAIT]
+        self.frames += 1
+        self.recent[-2].append(work)
+        self.histograms[-2].record(work)
+        self.recent[-1].append(seconds)
+        self.histograms[-1].record(seconds)
+        worst = self._worst
+        if len(worst) < self.worst_kept or work > worst[0][0]:
+            entry = (work, self.frames, state, seconds, tuple(self._phase_seconds))
+            if len(worst) < self.worst_kept:
+                heapq.heappush(worst, entry)
+            else:
+                heapq.heapreplace(worst, entry)
+
+    def worst_frames(self) -> List[Dict]:
+        """The frames with the most work, most first."""
+        return [{
+            'frame': frame,
+            'work_ms': round(work * 1000, 3),
+            'ms': round(seconds * 1000, 3),
+            'state': state,
+            'phases_ms': {name: round(s * 1000, 3) for name, s in zip(PHASES, phases)}
+        } for work, frame, state, seconds, phases in sorted(self._worst, reverse=True)]
+
+    def summary(self) -> Dict:
+        """Whole-session percentiles per phase and the frames with the most work."""
+        return {
+            'frames': self.frames,
+            'phases': {name: histogram.summary() for name, histogram in zip(self.names, self.histograms)},
+            'worst_frames': self.worst_frames()
+        }
+
+    def recent_summary(self, index: int) -> Dict:
+        """p50 / p99 / max in milliseconds over the recent frames of one series (index into names)."""
+        values = sorted(self.recent[index].values())
+        if not values:
+            return {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'p50_ms': values[len(values) // 2] * 1000,
+            'p99_ms': values[min(len(values) - 1, int(len(values) * 0.99))] * 1000,
+            'max_ms': values[-1] * 1000
+        }
+
+    def overlay_text(self, refresh: float = 0.5) -> str:
+        """
+        One line for the debug overlay, over the recent frames. Recomputed at
+        most every `refresh` seconds so the HUD text (and its redraw) only
+        changes that often.
+        """
+        now = self.clock()
+        if now - self._overlay_at >= refresh:
+            self._overlay_at = now
+            frame = self.recent_summary(-1)
+            work = self.recent_summary(-2)
+            draw = self.recent_summary(DRAW)
+            self._overlay_text = (f"frame p50 {frame['p50_ms']:.1f} p99 {frame['p99_ms']:.1f} "
+                                  f"max {frame['max_ms']:.1f} ms | work p99 {work['p99_ms']:.1f} "
+                                  f"max {work['max_ms']:.1f} | draw p99 {draw['p99_ms']:.1f}")
+        return self._overlay_text
+
+    def dump(self, directory: str = "profiles", **context) -> str:
+        """
+        Write the session summary as JSON.
+
+        Args:
+            directory: Where to write profile-<date>.json
+            context: Extra fields to include (e.g. tick_rate, seed)
+
+        Returns:
+            Path of the file written
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("profile-%Y%m%d-%H%M%S.json"))
+        data = dict(context, **self.summary())
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+def profiling_requested() -> bool:
+    """Check the SNAKE_PROFILE environment variable."""
+    return os.environ.get("SNAKE_PROFILE", "").lower() not in ("", "0", "false", "no")
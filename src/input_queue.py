@@ -0,0 +1,113 @@
+"""
+TurnQueue - Buffers direction changes between simulation ticks so quick key
+sequences are applied one per tick instead of overwriting each other.
+"""
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from snake_engine import SnakeEngine
+
+
+class LatencyStats:
+    """Tracks keypress-to-tick latency over the session."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize the stats.
+
+        Args:
+            window: Number of recent samples kept for percentiles
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        """Add one latency sample."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def summary(self) -> Dict:
+        """
+        Get latency statistics in milliseconds.
+
+        Returns:
+            Dictionary with count, mean_ms, p95_ms (over recent samples) and max_ms
+        """
+        if not self.count:
+            return {'count': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(self.recent)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000,
+            'p95_ms': p95 * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class TurnQueue:
+    """
+    Bounded FIFO of pending turns. Each turn is validated against the turn
+    queued before it (or the current direction when the queue is empty), so
+    a fast double turn can never reverse the snake into itself.
+    """
+
+    def __init__(self, max_size: int = 3):
+        """
+        Initialize the queue.
+
+        Args:
+            max_size: Maximum pending turns; extra key presses are dropped
+        """
+        self.max_size = max_size
+        self.turns = deque()
+        self.latency = LatencyStats()
+
+    def push(self, direction: Tuple[int, int], current: Tuple[int, int], timestamp: float) -> bool:
+        """
+        Queue a turn.
+
+        Args:
+            direction: Requested direction (dx, dy)
+            current: Direction the snake is moving in now
+            timestamp: Time of the key press (perf_counter seconds)
+
+        Returns:
+            True if the turn was queued, False if it was redundant, a reversal
+            or the queue was full
+        """
+        last = self.turns[-1][0] if self.turns else current
+        if direction == last or SnakeEngine.is_reverse(direction, last):
+            return False
+        if len(self.turns) >= self.max_size:
+            return False
+        self.turns.append((direction, timestamp))
+        return True
+
+    def pop(self, now: float) -> Optional[Tuple[int, int]]:
+        """
+        Take the next turn for this tick and record its latency.
+
+        Args:
+            now: Time the tick is applied (perf_counter seconds)
+
+        Returns:
+            Direction (dx, dy), or None to keep going straight
+        """
+        if not self.turns:
+            return None
+        direction, timestamp = self.turns.popleft()
+        self.latency.record(now - timestamp)
+        return direction
+
+    def clear(self):
+        """Drop all pending turns."""
+        self.turns.clear()
+
+    def __len__(self) -> int:
+        return len(self.turns)
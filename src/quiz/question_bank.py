@@ -0,0 +1,360 @@
+"""
+QuestionBank - Validates quiz question sources and caches them precompiled.
+
+Sources can be a JSON list (src/quiz/questions.json, "choices" key) or a
+Python module defining `quiz_questions` (games/quiz_data.py, "options"
+key). Both are normalized to:
+
+    {"id": int, "question": str, "choices": [str, ...], "correct": int, "explanation": str}
+
+The normalized bank is compiled to __pycache__/<source>.bank: a header
+with the source's size, mtime and SHA-256, an offset index, an id index
+and the records as compact JSON. The cache is rebuilt when the source
+changes. A bank is memory-mapped rather than read: looking a question up by
+position or id touches only its index entries and its record, so load time
+and resident memory stay flat however large the bank is.
+
+Bank file layout (little-endian):
+    b"QBNK" | format u8 | sha256 32s | source size u64 | source mtime_ns u64 | count u32
+    offsets:  (count + 1) x u64, relative to the start of the records
+    id index: count x (id hash u64, position u32), sorted by hash
+    records:  compact JSON objects, back to back
+
+Usage:
+    python src/quiz/question_bank.py check src/quiz/questions.json games/quiz_data.py
+    python src/quiz/question_bank.py compile src/quiz/questions.json
+"""
+import argparse
+import ast
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"QBNK"
+BANK_FORMAT = 2
+_HEADER = struct.Struct("<4sB32sQQI")
+_OFFSET = struct.Struct("<Q")
+_SPAN = struct.Struct("<QQ")
+_ID_ENTRY = struct.Struct("<QI")
+
+# The game answers with keys 1-4
+MIN_CHOICES = 2
+MAX_CHOICES = 4
+
+
+class QuestionError(ValueError):
+    """Raised when a question source is malformed."""
+
+
+def normalize_question(raw: Dict, index: int, source: str) -> Dict:
+    """
+    Validate one question and convert it to the normalized schema.
+
+    Args:
+        raw: Question as written in the source
+        index: Position in the source (used for messages and as id fallback)
+        source: Source name for messages
+
+    Raises:
+        QuestionError: Describing what is wrong and where
+    """
+    where = f"{source}: question {index + 1}"
+    if not isinstance(raw, dict):
+        raise QuestionError(f"{where}: expected an object, got {type(raw).__name__}")
+
+    question = raw.get('question')
+    if not isinstance(question, str) or not question.strip():
+        raise QuestionError(f"{where}: 'question' must be non-empty text")
+
+    if 'choices' in raw and 'options' in raw:
+        raise QuestionError(f"{where}: has both 'choices' and 'options'")
+    choices = raw.get('choices', raw.get('options'))
+    if not isinstance(choices, list) or not all(isinstance(c, str) and c.strip() for c in choices):
+        raise QuestionError(f"{where}: 'choices'/'options' must be a list of non-empty text")
+    if not MIN_CHOICES <= len(choices) <= MAX_CHOICES:
+        raise QuestionError(f"{where}: needs {MIN_CHOICES}-{MAX_CHOICES} choices, has {len(choices)}")
+
+    correct = raw.get('correct')
+    if isinstance(correct, bool) or not isinstance(correct, int) or not 0 <= correct < len(choices):
+        raise QuestionError(f"{where}: 'correct' must be an index from 0 to {len(choices) - 1}, got {correct!r}")
+
+    question_id = raw.get('id', index + 1)
+    if isinstance(question_id, bool) or not isinstance(question_id, (int, str)):
+        raise QuestionError(f"{where}: 'id' must be a number or text")
+
+    explanation = raw.get('explanation', "")
+    if not isinstance(explanation, str):
+        raise QuestionError(f"{where}: 'explanation' must be text")
+
+    return {
+        'id': question_id,
+        'question': question.strip(),
+        'choices': [c.strip() for c in choices],
+        'correct': correct,
+        'explanation': explanation.strip()
+    }
+
+
+def parse_source(data: bytes, path: str) -> List:
+    """Read the raw question list from JSON or a quiz_data.py module (without running it)."""
+    if path.endswith(".py"):
+        try:
+            tree = ast.parse(data, filename=path)
+        except (SyntaxError, ValueError, MemoryError, RecursionError) as e:
+            raise QuestionError(f"{path}: not a valid Python module ({e})")
+        for node in tree.body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1 and
+                    isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'quiz_questions'):
+                try:
+                    return ast.literal_eval(node.value)
+                except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+                    raise QuestionError(f"{path}: quiz_questions must be a literal list ({e})")
+        raise QuestionError(f"{path}: no quiz_questions list found")
+    try:
+        questions = json.loads(data)
+    except (ValueError, RecursionError) as e:
+        raise QuestionError(f"{path}: invalid JSON ({e})")
+    if not isinstance(questions, list):
+        raise QuestionError(f"{path}: expected a JSON list of questions")
+    return questions
+
+
+def compile_questions(data: bytes, path: str) -> List[Dict]:
+    """
+    Validate and normalize a whole source.
+
+    Raises:
+        QuestionError: On the first malformed question or a duplicate id
+    """
+    questions = [normalize_question(raw, i, path) for i, raw in enumerate(parse_source(data, path))]
+    seen = set()
+    for question in questions:
+        if question['id'] in seen:
+            raise QuestionError(f"{path}: duplicate question id {question['id']!r}")
+        seen.add(question['id'])
+    return questions
+
+
+def id_hash(question_id) -> int:
+    """Key of a question id in the id index (ids may be numbers or text)."""
+    key = json.dumps(question_id).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def pack_bank(questions: List[Dict], sha256: bytes, source_size: int, source_mtime_ns: int) -> bytes:
+    """Encode normalized questions as a bank file."""
+    offsets = [0]
+    records = []
+    for question in questions:
+        record = json.dumps(question, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        records.append(record)
+        offsets.append(offsets[-1] + len(record))
+    id_index = sorted((id_hash(question['id']), i) for i, question in enumerate(questions))
+    return b"".join([
+        _HEADER.pack(MAGIC, BANK_FORMAT, sha256, source_size, source_mtime_ns, len(questions)),
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        b"".join(_ID_ENTRY.pack(key, i) for key, i in id_index),
+        *records
+    ])
+
+
+class QuestionBank(Sequence):
+    """
+    Read-only sequence of normalized questions over a bank file image
+    (bytes, or a memory map from QuestionBank.open). Nothing is decoded up
+    front; each access decodes one record. Use random.choice(bank),
+    bank[i] or bank.by_id(...).
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data: Complete bank file contents
+
+        Raises:
+            ValueError: If the data is not a complete bank file of this format
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Truncated question bank")
+        magic, version, sha256, size, mtime_ns, count = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != BANK_FORMAT:
+            raise ValueError("Not a question bank of this format")
+        self._data = data
+        self._count = count
+        self._offsets_at = _HEADER.size
+        self._ids_at = self._offsets_at + (count + 1) * _OFFSET.size
+        self._records_at = self._ids_at + count * _ID_ENTRY.size
+        if (len(data) < self._records_at or
+                len(data) != self._records_at + _OFFSET.unpack_from(data, self._ids_at - _OFFSET.size)[0]):
+            raise ValueError("Truncated question bank")
+        self.sha256 = sha256
+        self.source_size = size
+        self.source_mtime_ns = mtime_ns
+
+    @classmethod
+    def open(cls, path: str) -> "QuestionBank":
+        """
+        Map a bank file. Pages are read by the OS as records are accessed
+        and can be dropped again under memory pressure.
+
+        Raises:
+            OSError: If the file can't be opened or mapped
+            ValueError: If it is not a complete bank file of this format
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(data)
+        except ValueError:
+            data.close()
+            raise
+
+    @classmethod
+    def from_questions(cls, questions: List[Dict]) -> "QuestionBank":
+        """In-memory bank of already normalized questions."""
+        return cls(pack_bank(questions, b"", 0, 0))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("question index out of range")
+        start, end = _SPAN.unpack_from(self._data, self._offsets_at + index * _OFFSET.size)
+        return json.loads(self._data[self._records_at + start:self._records_at + end])
+
+    def by_id(self, question_id) -> Optional[Dict]:
+        """Get a question by id (binary search of the id index)."""
+        key = id_hash(question_id)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _ID_ENTRY.unpack_from(self._data, self._ids_at + mid * _ID_ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Different ids can share a hash; check each candidate's record
+        while lo < self._count:
+            entry_key, index = _ID_ENTRY.unpack_from(self._data, self._ids_at + lo * _ID_ENTRY.size)
+            if entry_key != key:
+                break
+            question = self[index]
+            if question['id'] == question_id:
+                return question
+            lo += 1
+        return None
+
+    def restamped(self, source_size: int, source_mtime_ns: int) -> bytes:
+        """This bank's file contents with new source stat fields."""
+        header = _HEADER.pack(MAGIC, BANK_FORMAT, self.sha256, source_size, source_mtime_ns, self._count)
+        return header + self._data[_HEADER.size:]
+
+    def close(self):
+        """Release the memory map (the bank can't be used afterwards)."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def cache_path(source: str) -> str:
+    """Where the compiled bank for a source is kept."""
+    directory, name = os.path.split(os.path.abspath(source))
+    return os.path.join(directory, "__pycache__", name + ".bank")
+
+
+def _open_cache(path: str) -> Optional[QuestionBank]:
+    try:
+        return QuestionBank.open(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path: str, data: bytes) -> bool:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        # Read-only install: still works, just compiles every time
+        print(f"Could not cache question bank at {path}: {e}")
+        return False
+
+
+def load_bank(source: str, use_cache: bool = True) -> Tuple[QuestionBank, bool]:
+    """
+    Load a question source, mapping the compiled cache when the source is unchanged.
+
+    Returns:
+        (questions, True if served from the cache)
+
+    Raises:
+        OSError: If the source can't be read
+        QuestionError: If the source is malformed
+    """
+    stat = os.stat(source)
+    cached_path = cache_path(source)
+    cached = _open_cache(cached_path) if use_cache else None
+    if cached and cached.source_size == stat.st_size and cached.source_mtime_ns == stat.st_mtime_ns:
+        return cached, True
+
+    with open(source, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).digest()
+    if cached and cached.sha256 == digest:
+        # Touched but not changed: only the stat fields need refreshing
+        image = cached.restamped(stat.st_size, stat.st_mtime_ns)
+    else:
+        image = pack_bank(compile_questions(data, source), digest, stat.st_size, stat.st_mtime_ns)
+    if cached:
+        cached.close()
+    if use_cache and _write_cache(cached_path, image):
+        bank = _open_cache(cached_path)
+        if bank:
+            return bank, False
+    return QuestionBank(image), False
+
+
+def main():
+    """Entry point for the question bank tool."""
+    parser = argparse.ArgumentParser(description="Validate and precompile quiz question banks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="validate sources without writing a cache")
+    check.add_argument("sources", nargs="+")
+    compile_ = sub.add_parser("compile", help="validate sources and (re)build their caches")
+    compile_.add_argument("sources", nargs="+")
+    args = parser.parse_args()
+
+    failed = False
+    for source in args.sources:
+        start = time.perf_counter()
+        try:
+            if args.command == "check":
+                with open(source, 'rb') as f:
+                    questions = compile_questions(f.read(), source)
+                cached = False
+            else:
+                questions, cached = load_bank(source)
+        except (OSError, QuestionError) as e:
+            print(f"ERROR {e}")
+            failed = True
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        note = " (cache up to date)" if cached else ""
+        print(f"OK    {source}: {len(questions)} questions in {elapsed:.2f} ms{note}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
 """
 QuizManager - Manages quiz timing, display, and result tracking
 """
-import json
 import time
 import random
-import os
-from typing import Callable, Optional, Dict, List
-import requests
+from typing import Callable, Optional, Dict
+
+from events import EventBus, QuizAnswered, QuizStarted
+from storage import FileStorage, StorageBackend
+from telemetry import metrics
+from .question_bank import QuestionBank, QuestionError, load_bank
+from .quiz_timer import QuizTimer
+from .uploader import ResultUploader
+
+_RESULT_SAVES = metrics.timing("result_save_seconds", "Time to store one quiz result")
+_SNAPSHOT_SAVES = metrics.timing("snapshot_save_seconds", "Time to write the stats and schedule snapshots")
+_SAVE_ERRORS = metrics.counter("quiz_save_errors", "Quiz results or snapshots that failed to save")
 
 
 class QuizManager:
@@ -19,126 +27,148 @@ class QuizManager:
         self,
         questions_file: str,
         quiz_interval: float = 180.0,
-        pause_callback: Optional[Callable] = None,
-        resume_callback: Optional[Callable] = None,
-        on_answer_callback: Optional[Callable[[bool, int], None]] = None,
+        events: Optional[EventBus] = None,
         server_url: Optional[str] = None,
-        demo_mode: bool = False
+        demo_mode: bool = False,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+        storage: Optional[StorageBackend] = None
     ):
         """
         Initialize the QuizManager.
         
         Args:
-            questions_file: Path to JSON file with quiz questions
-            quiz_interval: Time in seconds between quizzes (default 180 = 3 minutes)
-            pause_callback: Function to call when pausing the game for quiz
-            resume_callback: Function to call when resuming the game after quiz
-            on_answer_callback: Function to call when answer is submitted (receives correct: bool, coins: int)
+            questions_file: Question source (questions.json or a quiz_data.py module)
+            quiz_interval: Seconds of active play between quizzes (default 180 = 3 minutes)
+            events: Bus to publish QuizStarted / QuizAnswered on (the game pauses and resumes on them)
             server_url: Optional URL to POST quiz results to
             demo_mode: If True, show first quiz after 10 seconds for quick testing
+            rng: Random generator for the order new questions are asked in (seed it for reproducible sessions)
+            clock: Monotonic function returning seconds, used for quiz timing
+            storage: Where results are persisted (default: FileStorage in the working directory)
         """
         self.questions_file = questions_file
         self.quiz_interval = quiz_interval
-        self.pause_callback = pause_callback
-        self.resume_callback = resume_callback
-        self.on_answer_callback = on_answer_callback
+        self.events = events or EventBus()
         self.server_url = server_url
         self.demo_mode = demo_mode
+        self.rng = rng or random.Random()
+        self.clock = clock
         
         # Load questions
         self.questions = self._load_questions()
         
-        # Quiz state
-        self.last_quiz_time = time.time()
+        # Quiz state (demo mode: first quiz comes after 10 seconds)
+        self.timer = QuizTimer(quiz_interval, clock, first_delay=10.0 if demo_mode else None)
         self.current_question = None
         self.quiz_active = False
-        self.results_file = "quiz_results.json"
-        self.results = self._load_results()
-        
-        # Demo mode: first quiz comes after 10 seconds
-        if self.demo_mode:
-            self.last_quiz_time = time.time() - (self.quiz_interval - 10.0)
+        self._owns_storage = storage is None
+        self.storage = storage or FileStorage()
+        self.stats = self.storage.quiz_stats()
+        # Spaced repetition: questions come back sooner when answered wrong
+        self.schedule = self.storage.quiz_schedule(self.questions, self.rng)
+        self.snapshot_every = 20  # Answers between stats and schedule snapshots
+        self._answers_since_snapshot = 0
+        
+        # Results are posted from a background thread so answering never waits on the network
+        self.uploader = ResultUploader(server_url) if server_url else None
     
-    def _load_questions(self) -> List[Dict]:
-        """Load questions from JSON file."""
+    def _load_questions(self) -> QuestionBank:
+        """Load validated questions (from the compiled cache when the source is unchanged)."""
         try:
-            with open(self.questions_file, 'r') as f:
-                questions = json.load(f)
+            questions, _ = load_bank(self.questions_file)
             return questions
-        except Exception as e:
+        except (OSError, QuestionError) as e:
             print(f"Error loading questions: {e}")
-            return []
-    
-    def _load_results(self) -> List[Dict]:
-        """Load quiz results from local file."""
-        if os.path.exists(self.results_file):
-            try:
-                with open(self.results_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
-    
-    def _save_results(self):
-        """Save quiz results to local file."""
+            return QuestionBank.from_questions([])
+    
+    def _save_stats(self):
+        """Write the stats and schedule snapshots."""
         try:
-            with open(self.results_file, 'w') as f:
-                json.dump(self.results, f, indent=2)
+            with _SNAPSHOT_SAVES.time():
+                self.storage.save_quiz_stats(self.stats)
+                self.storage.save_quiz_schedule(self.schedule.to_bytes())
         except Exception as e:
-            print(f"Error saving results: {e}")
+            _SAVE_ERRORS.inc()
+            print(f"Error saving stats: {e}")
     
-    def _post_result_to_server(self, result: Dict):
-        """Post quiz result to server if URL is configured."""
-        if not self.server_url:
-            return
-        
+    def _save_result(self, result: Dict):
+        """Store a quiz result and count it."""
         try:
-            response = requests.post(
-                self.server_url,
-                json=result,
-                timeout=5
-            )
-            if response.status_code == 200:
-                print("Quiz result posted to server successfully")
-            else:
-                print(f"Server returned status code: {response.status_code}")
+            with _RESULT_SAVES.time():
+                self.storage.add_results([result])
         except Exception as e:
-            print(f"Error posting to server: {e}")
+            _SAVE_ERRORS.inc()
+            print(f"Error saving results: {e}")
+            return
+        
+        self.stats.add(result)
+        self.schedule.add(result)
+        self.stats.log_offset = self.schedule.log_offset = self.storage.results_position()
+        self._answers_since_snapshot += 1
+        if self._answers_since_snapshot >= self.snapshot_every:
+            self._save_stats()
+            self._answers_since_snapshot = 0
     
-    def check_and_show_quiz(self) -> bool:
+    def _post_result_to_server(self, result: Dict):
+        """Queue quiz result for upload if URL is configured (returns immediately)."""
+        if self.uploader:
+            self.uploader.submit(result)
+    
+    def check_and_show_quiz(self, now: Optional[float] = None) -> bool:
         """
         Check if it's time to show a quiz. Call this from game loop.
         
+        Args:
+            now: Current clock time, if the caller already has it
+        
         Returns:
             True if quiz is now active, False otherwise
         """
         if self.quiz_active:
             return True
         
-        current_time = time.time()
-        if current_time - self.last_quiz_time >= self.quiz_interval:
+        if self.timer.due(now):
             self.start_quiz()
-            return True
+            return self.quiz_active
         
         return False
     
-    def start_quiz(self):
-        """Start a new quiz by selecting a question and pausing the game."""
+    def pause_timer(self):
+        """Stop counting time toward the next quiz (e.g. while the store is open)."""
+        self.timer.pause()
+    
+    def resume_timer(self):
+        """Count time toward the next quiz again."""
+        if not self.quiz_active:
+            self.timer.resume()
+    
+    def start_quiz(self, question_id=None):
+        """
+        Start a new quiz by selecting a question and pausing the game.
+        
+        Args:
+            question_id: Ask this question instead of a random one
+        """
         if not self.questions:
             print("No questions available!")
+            self.timer.restart()
             return
         
-        # Select a random question
-        self.current_question = random.choice(self.questions)
+        # Select a question (only that record is decoded from the bank)
+        if question_id is None:
+            self.current_question = self.schedule.next_question()
+        else:
+            self.current_question = self.questions.by_id(question_id)
+            if self.current_question is None:
+                print(f"No question with id {question_id!r}")
+                self.timer.restart()
+                return
         self.quiz_active = True
+        self.timer.pause()
         
-        # Pause the game
-        if self.pause_callback:
-            self.pause_callback()
-        
-        print(f"\n{'='*50}")
-        print(f"QUIZ TIME!")
-        print(f"{'='*50}")
+        # The game pauses on this
+        self.events.emit(QuizStarted, self.current_question['id'])
     
     def get_current_question(self) -> Optional[Dict]:
         """Get the current quiz question."""
@@ -169,47 +199,50 @@ class QuizManager:
             'coins_earned': coins_earned
         }
         
-        self.results.append(result)
-        self._save_results()
+        self._save_result(result)
         
         # Post to server if configured
         self._post_result_to_server(result)
         
         # End quiz
         self.quiz_active = False
-        self.last_quiz_time = time.time()
+        self.timer.restart()
+        self.timer.resume()
+        question_id = self.current_question['id']
         self.current_question = None
         
-        # Resume game
-        if self.resume_callback:
-            self.resume_callback()
-        
-        # Notify callback
-        if self.on_answer_callback:
-            self.on_answer_callback(correct, coins_earned)
+        # The game resumes and pays out on this
+        self.events.emit(QuizAnswered, question_id, correct, coins_earned)
         
         return correct
     
     def get_total_coins_earned(self) -> int:
         """Get total coins earned from all quizzes."""
-        return sum(r['coins_earned'] for r in self.results)
+        return self.stats.coins
     
     def get_quiz_stats(self) -> Dict:
-        """Get quiz statistics."""
-        if not self.results:
-            return {
-                'total_quizzes': 0,
-                'correct_answers': 0,
-                'accuracy': 0.0,
-                'total_coins': 0
-            }
-        
-        correct = sum(1 for r in self.results if r['correct'])
-        total = len(self.results)
-        
-        return {
-            'total_quizzes': total,
-            'correct_answers': correct,
-            'accuracy': (correct / total * 100) if total > 0 else 0.0,
-            'total_coins': self.get_total_coins_earned()
-        }
+        """Get quiz statistics (O(1), safe to call every frame)."""
+        return self.stats.summary()
+    
+    def get_question_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get attempts and correct answers per question id."""
+        return {qid: counts.copy() for qid, counts in self.stats.by_question.items()}
+    
+    def get_daily_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get attempts, correct answers and coins per day (YYYY-MM-DD)."""
+        return {day: counts.copy() for day, counts in self.stats.by_day.items()}
+    
+    def close(self):
+        """
+        Flush pending results and the stats snapshot to storage. Call when the
+        game exits. Storage passed in by the caller is left open for it to close.
+        """
+        if self.uploader:
+            # Undelivered results stay in the spool and are sent next session
+            self.uploader.close()
+        self.storage.flush()
+        self.stats.log_offset = self.schedule.log_offset = self.storage.results_position()
+        self._save_stats()
+        if self._owns_storage:
+            self.storage.close()
+        self.questions.close()
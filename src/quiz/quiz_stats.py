@@ -0,0 +1,95 @@
+"""
+QuizStats - Running quiz aggregates kept up to date answer by answer
+"""
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class QuizStats:
+    """
+    Totals, per-question and per-day counters over all quiz results.
+
+    Updated incrementally as answers come in and persisted as a small JSON
+    snapshot next to the result log. The snapshot remembers how many bytes of
+    the log it covers, so a stale snapshot is brought up to date by reading
+    only the records appended after it.
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.total = 0
+        self.correct = 0
+        self.coins = 0
+        self.by_question: Dict[str, Dict[str, int]] = {}
+        self.by_day: Dict[str, Dict[str, int]] = {}
+        self.log_offset = 0
+
+    def add(self, result: Dict):
+        """Count one quiz result."""
+        correct = 1 if result['correct'] else 0
+        coins = result['coins_earned']
+        self.total += 1
+        self.correct += correct
+        self.coins += coins
+
+        question = self.by_question.setdefault(str(result['question_id']), {'total': 0, 'correct': 0})
+        question['total'] += 1
+        question['correct'] += correct
+
+        day_key = time.strftime('%Y-%m-%d', time.localtime(result['timestamp']))
+        day = self.by_day.setdefault(day_key, {'total': 0, 'correct': 0, 'coins': 0})
+        day['total'] += 1
+        day['correct'] += correct
+        day['coins'] += coins
+
+    def summary(self) -> Dict:
+        """Get the totals in QuizManager.get_quiz_stats() form."""
+        return {
+            'total_quizzes': self.total,
+            'correct_answers': self.correct,
+            'accuracy': (self.correct / self.total * 100) if self.total > 0 else 0.0,
+            'total_coins': self.coins
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialize the counters."""
+        return {
+            'total': self.total,
+            'correct': self.correct,
+            'coins': self.coins,
+            'by_question': self.by_question,
+            'by_day': self.by_day,
+            'log_offset': self.log_offset
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuizStats":
+        """Restore counters from to_dict() output."""
+        stats = cls()
+        stats.total = data['total']
+        stats.correct = data['correct']
+        stats.coins = data['coins']
+        stats.by_question = data['by_question']
+        stats.by_day = data['by_day']
+        stats.log_offset = data['log_offset']
+        return stats
+
+    @classmethod
+    def load(cls, path: str) -> Optional["QuizStats"]:
+        """Load a snapshot, or None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return cls.from_dict(json.load(f))
+        except Exception:
+            return None
+
+    def save(self, path: str):
+        """Write the snapshot atomically (temp file + rename)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
@@ -0,0 +1,67 @@
+"""
+QuizTimer - Counts active play time until the next quiz
+
+Runs on a monotonic clock, so wall-clock changes (NTP corrections, a laptop
+resuming from suspend with the clock reset) can't trigger or swallow a
+quiz. Time only counts while the timer is running; the game pauses it while
+a quiz, the store or the game-over screen is up.
+"""
+import math
+import time
+from typing import Callable, Optional
+
+
+class QuizTimer:
+    """
+    Active-time countdown to the next quiz.
+
+    While running, the deadline on the clock is known in advance, so due()
+    is a single comparison. Pausing banks the time left; resuming sets a
+    new deadline from it.
+    """
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic,
+                 first_delay: Optional[float] = None, running: bool = True):
+        """
+        Args:
+            interval: Seconds of active play between quizzes
+            clock: Monotonic time source in seconds (inject a simulated clock to fast-forward)
+            first_delay: Seconds until the first quiz (default: interval)
+            running: Start counting right away
+        """
+        self.interval = interval
+        self.clock = clock
+        self._remaining = interval if first_delay is None else first_delay
+        self._deadline = math.inf
+        self.running = False
+        if running:
+            self.resume()
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Check whether a quiz is due (pass now to skip reading the clock)."""
+        return (self.clock() if now is None else now) >= self._deadline
+
+    def remaining(self) -> float:
+        """Active seconds left until the next quiz."""
+        if self.running:
+            return max(0.0, self._deadline - self.clock())
+        return self._remaining
+
+    def pause(self):
+        """Stop counting (time passing from now on isn't play time)."""
+        if self.running:
+            self._remaining = max(0.0, self._deadline - self.clock())
+            self._deadline = math.inf
+            self.running = False
+
+    def resume(self):
+        """Start counting again from where pause() left off."""
+        if not self.running:
+            self._deadline = self.clock() + self._remaining
+            self.running = True
+
+    def restart(self, delay: Optional[float] = None):
+        """Start a new countdown (after a quiz); keeps the running/paused state."""
+        self._remaining = self.interval if delay is None else delay
+        if self.running:
+            self._deadline = self.clock() + self._remaining
@@ -0,0 +1,166 @@
+"""
+ResultLog - Append-only JSON Lines log of quiz results
+"""
+import json
+import os
+import time
+from typing import Dict, Iterator, Optional
+
+
+class ResultLog:
+    """
+    Stores quiz results one JSON object per line. Answers are appended
+    instead of rewriting the whole history, fsync is batched, and a record
+    torn by a crash mid-write is cut off the next time the log is opened.
+    """
+
+    # How far back from the end to look for the last complete record
+    TAIL_BLOCK = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        legacy_file: Optional[str] = None,
+        sync_every: int = 8,
+        sync_interval: float = 1.0
+    ):
+        """
+        Open (or create) the log.
+
+        Args:
+            path: Path of the .jsonl log file
+            legacy_file: Old JSON-array results file imported when the log doesn't exist yet
+            sync_every: fsync after this many appends...
+            sync_interval: ...or when this many seconds have passed since the last fsync
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        if not os.path.exists(path) and legacy_file and os.path.exists(legacy_file):
+            self._import_legacy(legacy_file)
+
+        self.recovered_bytes = self._recover()
+        self.damaged_lines = 0
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _import_legacy(self, legacy_file: str):
+        """Convert the old quiz_results.json array into a log (the old file is left in place)."""
+        try:
+            with open(legacy_file, 'r') as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"Error importing {legacy_file}: {e}")
+            return
+        self._write_atomic(records)
+
+    def _write_atomic(self, records):
+        """Write records to a temp file and swap it in."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(self.encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _recover(self) -> int:
+        """
+        Cut off a torn or corrupt last record left by a crash. Only the tail
+        of the file is read.
+
+        Returns:
+            Number of bytes removed
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return 0
+            start = max(0, size - self.TAIL_BLOCK)
+            f.seek(start)
+            tail = f.read()
+
+            # Drop a trailing partial line, then any complete lines at the end that don't parse
+            end = tail.rfind(b"\n") + 1
+            while end > 0:
+                line_start = tail.rfind(b"\n", 0, end - 1) + 1
+                if line_start == 0 and start > 0:
+                    # Line begins before the tail block; keep it
+                    break
+                try:
+                    json.loads(tail[line_start:end])
+                    break
+                except ValueError:
+                    end = line_start
+
+            good = start + end
+            if good < size:
+                f.truncate(good)
+                print(f"Recovered {self.path}: dropped {size - good} bytes of incomplete records")
+            return size - good
+
+    @staticmethod
+    def encode(record: Dict) -> str:
+        """Encode one record as a compact JSON line."""
+        return json.dumps(record, separators=(',', ':')) + "\n"
+
+    def append(self, record: Dict):
+        """Append a record; it reaches the OS immediately and disk on the next batched fsync."""
+        self._file.write(self.encode(record))
+        self._file.flush()
+        self._unsynced += 1
+        if (self._unsynced >= self.sync_every or
+                time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Force appended records to disk."""
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Stream every record from disk, skipping lines that don't parse."""
+        return self.iter_from(0)
+
+    def iter_from(self, offset: int) -> Iterator[Dict]:
+        """Stream records starting at a byte offset (must be a line start)."""
+        self._file.flush()
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    self.damaged_lines += 1
+
+    def size(self) -> int:
+        """Get the log size in bytes."""
+        self._file.flush()
+        return os.path.getsize(self.path)
+
+    def compact(self):
+        """
+        Rewrite the log atomically, keeping only records that parse. Run
+        after a crash left damaged lines or to normalize an imported log.
+        """
+        self.sync()
+        records = list(self)
+        self._file.close()
+        self._write_atomic(records)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.damaged_lines = 0
+
+    def close(self):
+        """Flush, fsync and close the log, compacting it if damaged lines were seen."""
+        if not self._file.closed:
+            if self.damaged_lines:
+                self.compact()
+            self.sync()
+            self._file.close()
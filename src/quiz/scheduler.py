@@ -0,0 +1,228 @@
+"""
+QuestionScheduler - Spaced-repetition question selection (Leitner boxes)
+
+Each question a player has answered is a card in a box. A correct answer
+moves the card up one box, a wrong one sends it back to box 0, and the box
+decides how many quizzes pass before the card is due again: 2 for box 0,
+doubling with every box. Because intervals keep growing, a learned question
+costs only a handful of reviews and new questions keep coming in. Time is counted
+in quizzes answered, not seconds, so clock changes and long breaks between
+sessions don't matter.
+
+Due cards usually come first, but while questions remain that were never
+asked, at least one quiz in every NEW_EVERY asks one of them. Otherwise a
+player who keeps missing a couple of questions would see only those (each
+comes back every two quizzes) and never reach the rest of the bank.
+
+Cards live in a heap ordered by due quiz, so the next question is found in
+O(log n) however large the bank is. Questions never asked come from a
+shuffled walk over the bank that needs no per-question memory.
+"""
+import heapq
+import json
+import math
+import random
+import zlib
+from typing import Dict, Iterable, Optional
+
+SCHEDULE_FORMAT = 1
+
+# Quizzes until a card in box b is due again: FIRST_INTERVAL * 2 ** b
+FIRST_INTERVAL = 2
+MAX_BOX = 20
+
+# At least one quiz in this many asks a new question, while any are left
+NEW_EVERY = 4
+
+
+class QuestionScheduler:
+    """
+    Picks the next quiz question for one player: the most overdue card if
+    any is due (unless a new question's turn has come, see NEW_EVERY),
+    otherwise a question not asked yet, otherwise the card due soonest.
+    record() updates a card in O(log n).
+
+    The schedule is rebuilt from results like QuizStats: the snapshot
+    remembers the result position it covers and later results are replayed
+    with add().
+    """
+
+    def __init__(self, bank, rng: Optional[random.Random] = None):
+        """
+        Args:
+            bank: Question sequence (a QuestionBank: indexable, with by_id)
+            rng: Random generator for the order new questions come in
+        """
+        self.bank = bank
+        self.rng = rng or random.Random()
+        self.step = 0
+        self.log_offset = 0
+        self.since_new = 0  # Quizzes answered since the last new question
+        # Question id -> [box, due step, version]; the heap holds
+        # (due step, version, id) and entries whose version is stale are skipped
+        self.cards: Dict[object, list] = {}
+        self._heap = []
+        self._version = 0
+        self._new_walk()
+
+    def _new_walk(self):
+        """Shuffle the order new questions come in: index k -> (a * k + b) mod n, a coprime to n."""
+        n = len(self.bank)
+        self._walk_size = n
+        self._walk_taken = 0
+        self._walk_a, self._walk_b = 1, 0
+        if n > 1:
+            self._walk_b = self.rng.randrange(n)
+            self._walk_a = self.rng.randrange(1, n)
+            while math.gcd(self._walk_a, n) != 1:
+                self._walk_a = self.rng.randrange(1, n)
+
+    def _push(self, question_id, box: int, due: int):
+        self._version += 1
+        self.cards[question_id] = [box, due, self._version]
+        heapq.heappush(self._heap, (due, self._version, question_id))
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            self._heap = [(due, version, qid) for qid, (_, due, version) in self.cards.items()]
+            heapq.heapify(self._heap)
+
+    def _top(self):
+        """Heap entry of the card due soonest, dropping stale entries."""
+        heap = self._heap
+        while heap:
+            due, version, question_id = heap[0]
+            card = self.cards.get(question_id)
+            if card is not None and card[2] == version:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _next_new(self) -> Optional[Dict]:
+        n = self._walk_size
+        while self._walk_taken < n:
+            index = (self._walk_a * self._walk_taken + self._walk_b) % n
+            question = self.bank[index]
+            if question['id'] not in self.cards:
+                # Stays at the head of the walk until it is answered
+                return question
+            self._walk_taken += 1
+        return None
+
+    def next_question(self) -> Optional[Dict]:
+        """
+        Choose the next question (None if the bank is empty). Doesn't change
+        the schedule; call record() with the answer.
+        """
+        new_turn = self.since_new >= NEW_EVERY - 1
+        while True:
+            top = self._top()
+            if new_turn:
+                question = self._next_new()
+                if question is not None:
+                    return question
+                new_turn = False
+            if top is not None and top[0] <= self.step:
+                question = self.bank.by_id(top[2])
+            else:
+                question = self._next_new()
+                if question is not None:
+                    return question
+                if top is None:
+                    return None
+                question = self.bank.by_id(top[2])
+            if question is not None:
+                return question
+            # No longer in the bank (prune() wasn't run): skip it this session
+            heapq.heappop(self._heap)
+
+    def prune(self) -> int:
+        """
+        Drop cards for questions no longer in the bank (one id lookup per
+        card, so run it once at load time, not per quiz).
+
+        Returns:
+            Number of cards dropped
+        """
+        missing = [question_id for question_id in self.cards if self.bank.by_id(question_id) is None]
+        for question_id in missing:
+            del self.cards[question_id]
+        if missing:
+            self._heap = [(due, version, qid) for qid, (_, due, version) in self.cards.items()]
+            heapq.heapify(self._heap)
+        return len(missing)
+
+    def record(self, question_id, correct: bool):
+        """Update a question's card after an answer."""
+        card = self.cards.get(question_id)
+        self.since_new = 0 if card is None else self.since_new + 1
+        if not correct:
+            box = 0
+        elif card is None:
+            box = 1
+        else:
+            box = min(card[0] + 1, MAX_BOX)
+        due = self.step + (FIRST_INTERVAL << box)
+        self.step += 1
+        self._push(question_id, box, due)
+
+    def add(self, result: Dict):
+        """Replay one stored quiz result."""
+        self.record(result['question_id'], result['correct'])
+
+    def add_all(self, results: Iterable[Dict]):
+        """Replay stored quiz results in order."""
+        for result in results:
+            self.add(result)
+
+    def due_count(self) -> int:
+        """Number of cards due now (O(cards); for reporting, not per frame)."""
+        return sum(1 for box, due, _ in self.cards.values() if due <= self.step)
+
+    def box_counts(self) -> Dict[int, int]:
+        """Cards per box."""
+        counts: Dict[int, int] = {}
+        for box, _, _ in self.cards.values():
+            counts[box] = counts.get(box, 0) + 1
+        return counts
+
+    def to_bytes(self) -> bytes:
+        """Serialize as zlib-compressed columns."""
+        ids, boxes, dues = [], [], []
+        for question_id, (box, due, _) in self.cards.items():
+            ids.append(question_id)
+            boxes.append(box)
+            dues.append(self.step - due)
+        data = {
+            'format': SCHEDULE_FORMAT,
+            'step': self.step,
+            'log_offset': self.log_offset,
+            'since_new': self.since_new,
+            'walk': [self._walk_size, self._walk_a, self._walk_b, self._walk_taken],
+            'ids': ids,
+            'boxes': boxes,
+            'due': dues
+        }
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, bank, rng: Optional[random.Random] = None) -> Optional["QuestionScheduler"]:
+        """Restore a schedule from to_bytes() output (None if it can't be read)."""
+        try:
+            data = json.loads(zlib.decompress(blob))
+            if data['format'] != SCHEDULE_FORMAT:
+                return None
+            schedule = cls(bank, rng)
+            schedule.step = data['step']
+            schedule.log_offset = data['log_offset']
+            schedule.since_new = data.get('since_new', 0)
+            size, a, b, taken = data['walk']
+            if size == len(bank):
+                schedule._walk_a, schedule._walk_b, schedule._walk_taken = a, b, taken
+            # A changed bank gets a fresh walk; questions already seen are skipped
+            for question_id, box, due in zip(data['ids'], data['boxes'], data['due']):
+                schedule._version += 1
+                schedule.cards[question_id] = [box, schedule.step - due, schedule._version]
+            schedule._heap = [(due, version, qid) for qid, (_, due, version) in schedule.cards.items()]
+            heapq.heapify(schedule._heap)
+            return schedule
+        except (ValueError, KeyError, TypeError, zlib.error):
+            return None
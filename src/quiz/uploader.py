@@ -0,0 +1,334 @@
+"""
+ResultUploader - Delivers quiz results to the server from a background thread
+"""
+import base64
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import metrics
+
+_UPLOAD_REQUESTS = metrics.timing("upload_request_seconds", "Time to POST one batch of quiz results")
+_UPLOAD_FAILURES = metrics.counter("upload_failures", "Result uploads that failed and will be retried")
+_RESULTS_UPLOADED = metrics.counter("results_uploaded", "Quiz results delivered to the server")
+
+
+def encode_batch(results: List[Dict], compress_min: int = 1024) -> Dict:
+    """
+    Build the POST body for a batch of results.
+
+    Small batches are sent as {"results": [...]}. Larger ones are gzipped and
+    wrapped as {"encoding": "gzip+base64", "payload": "..."}, where payload
+    decodes to the plain body. The envelope (rather than Content-Encoding)
+    is used because Apps Script only sees the request body as text.
+    """
+    body = {'results': results}
+    raw = json.dumps(body, separators=(',', ':')).encode('utf-8')
+    if len(raw) < compress_min:
+        return body
+    packed = base64.b64encode(gzip.compress(raw)).decode('ascii')
+    return {'encoding': 'gzip+base64', 'payload': packed}
+
+
+def decode_batch(body: Dict) -> List[Dict]:
+    """Get the results from a POST body: a batch, a compressed batch or a single result."""
+    if body.get('encoding') == 'gzip+base64':
+        body = json.loads(gzip.decompress(base64.b64decode(body['payload'])))
+    if 'results' in body:
+        return body['results']
+    return [body]
+
+
+class ResultUploader:
+    """
+    Posts quiz results to the server without ever blocking the game thread.
+
+    submit() only appends to an in-memory queue. A worker thread collects
+    results into batches (up to batch_size, or whatever arrived within
+    batch_window seconds) and sends them oldest first over one keep-alive
+    Session, retrying failures with exponential backoff and jitter. While
+    the server is unreachable, or when the in-memory queue grows past
+    max_memory, results are spilled to chunk files in spool_dir and
+    delivered from there later, including after a restart. Everything on
+    disk is older than everything in memory, so spooled chunks go first and
+    results still arrive in the order they were submitted. Delivery is
+    at-least-once: a crash mid-chunk can resend a few results.
+    """
+
+    # Consecutive failures before the in-memory queue is moved to disk
+    SPILL_AFTER_FAILURES = 3
+
+    def __init__(
+        self,
+        url: str,
+        spool_dir: str = "quiz_upload_spool",
+        max_memory: int = 256,
+        batch_size: int = 50,
+        batch_window: float = 5.0,
+        timeout: float = 5.0,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        session: Optional[requests.Session] = None
+    ):
+        """
+        Start the uploader.
+
+        Args:
+            url: Endpoint to POST result batches to
+            spool_dir: Directory for results waiting on disk
+            max_memory: Results kept in memory before spilling to disk
+            batch_size: Most results sent in one request
+            batch_window: Seconds to wait for a batch to fill before sending
+            timeout: HTTP timeout in seconds
+            base_delay: First retry delay in seconds (doubles per failure)
+            max_delay: Longest retry delay in seconds
+            session: HTTP session to send with (default: a pooled keep-alive session)
+        """
+        self.url = url
+        self.spool_dir = spool_dir
+        self.max_memory = max(1, max_memory)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session = session
+
+        # Counters (read from any thread)
+        self.sent = 0
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.spilled = 0
+
+        # Entries are (monotonic time queued, result)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._draining = False
+        self._idle = False
+
+        # Worker-only state: spool chunk files and the chunk being delivered
+        os.makedirs(spool_dir, exist_ok=True)
+        self._spool = sorted(
+            os.path.join(spool_dir, name) for name in os.listdir(spool_dir) if name.endswith(".jsonl")
+        )
+        self._chunk_path = None
+        self._chunk = deque()
+        self._next_chunk_id = self._last_chunk_id() + 1
+
+        self._thread = threading.Thread(target=self._run, name="result-uploader", daemon=True)
+        self._thread.start()
+
+    def submit(self, result: Dict):
+        """Queue a result for delivery. O(1), no I/O - safe on the game thread."""
+        with self._cond:
+            self._pending.append((time.monotonic(), result))
+            self._idle = False
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def pending_count(self) -> int:
+        """Get the number of results waiting in memory (not counting disk)."""
+        return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send everything queued so far, in memory and on disk, without waiting
+        for batches to fill.
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        with self._cond:
+            self._draining = True
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._idle, timeout=timeout)
+            finally:
+                self._draining = False
+
+    def close(self, timeout: float = 2.0):
+        """
+        Try to send what's queued, then stop the worker. Anything still
+        undelivered is kept on disk for next time.
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.session.close()
+
+    # Worker thread
+
+    def _run(self):
+        attempt = 0
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._chunk or self._spool:
+                        break
+                    if not self._pending:
+                        self._idle = True
+                        self._cond.notify_all()
+                        self._cond.wait()
+                        continue
+                    # Wait for the batch to fill or its window to close
+                    wait = self._pending[0][0] + self.batch_window - time.monotonic()
+                    if self._draining or len(self._pending) >= self.batch_size or wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    break
+                overflow = self._take_pending(len(self._pending) - self.max_memory)
+            if overflow:
+                self._spill(overflow)
+
+            batch = self._peek()
+            status = self._deliver(batch)
+            if status != 'retry':
+                self._pop(len(batch))
+                attempt = 0
+                continue
+
+            attempt += 1
+            self.failures += 1
+            _UPLOAD_FAILURES.inc()
+            if attempt >= self.SPILL_AFTER_FAILURES:
+                # Server looks down: move what's in memory to disk. A batch
+                # being retried from memory goes too, at the head of the new
+                # chunk, so it is still sent before anything newer
+                with self._cond:
+                    offline = self._take_pending(len(self._pending))
+                if offline:
+                    self._spill(offline)
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping, timeout=delay)
+
+        self._shutdown()
+
+    def _take_pending(self, count: int) -> List[Dict]:
+        """Remove up to count results from the memory queue, oldest first (lock held)."""
+        count = max(0, min(count, len(self._pending)))
+        return [self._pending.popleft()[1] for _ in range(count)]
+
+    def _peek(self) -> List[Dict]:
+        """Get the oldest undelivered batch: disk first, then memory."""
+        if not self._chunk and self._spool:
+            self._chunk_path = self._spool.pop(0)
+            self._chunk = deque(self._read_chunk(self._chunk_path))
+            if not self._chunk:
+                self._delete_chunk()
+                return self._peek()
+        if self._chunk:
+            return [self._chunk[i] for i in range(min(self.batch_size, len(self._chunk)))]
+        with self._cond:
+            return [self._pending[i][1] for i in range(min(self.batch_size, len(self._pending)))]
+
+    def _pop(self, count: int):
+        """Drop the batch returned by _peek() once it is settled."""
+        if self._chunk:
+            for _ in range(count):
+                self._chunk.popleft()
+            if not self._chunk:
+                self._delete_chunk()
+        else:
+            with self._cond:
+                for _ in range(count):
+                    self._pending.popleft()
+
+    def _deliver(self, batch: List[Dict]) -> str:
+        """
+        POST one batch.
+
+        Returns:
+            'sent', 'rejected' (4xx, retrying would not help) or 'retry'
+        """
+        self.requests += 1
+        try:
+            with _UPLOAD_REQUESTS.time():
+                response = self.session.post(self.url, json=encode_batch(batch), timeout=self.timeout)
+        except Exception:
+            return 'retry'
+        if 200 <= response.status_code < 300:
+            self.sent += len(batch)
+            _RESULTS_UPLOADED.inc(len(batch))
+            return 'sent'
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            self.rejected += len(batch)
+            print(f"Server rejected {len(batch)} quiz results with status code: {response.status_code}")
+            return 'rejected'
+        return 'retry'
+
+    def _last_chunk_id(self) -> int:
+        if not self._spool:
+            return 0
+        return int(os.path.basename(self._spool[-1]).split(".")[0])
+
+    def _spill(self, results: List[Dict]):
+        """Write results to a new spool chunk (delivered after older chunks)."""
+        path = os.path.join(self.spool_dir, f"{self._next_chunk_id:08d}.jsonl")
+        self._next_chunk_id += 1
+        self._write_chunk(path, results)
+        self._spool.append(path)
+        self.spilled += len(results)
+
+    @staticmethod
+    def _write_chunk(path: str, results: List[Dict]):
+        """Write a chunk file atomically (replacing any file at path)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_chunk(path: str) -> List[Dict]:
+        results = []
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        results.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return results
+
+    def _delete_chunk(self):
+        try:
+            os.remove(self._chunk_path)
+        except OSError:
+            pass
+        self._chunk_path = None
+
+    def _shutdown(self):
+        """Persist undelivered results so the next session sends them."""
+        if self._chunk:
+            # Rewrite the partly delivered chunk in place so delivered results
+            # aren't resent; it keeps its id and is still sent first next time
+            self._write_chunk(self._chunk_path, list(self._chunk))
+            self._chunk.clear()
+            self._chunk_path = None
+        with self._cond:
+            rest = self._take_pending(len(self._pending))
+        if rest:
+            self._spill(rest)
@@ -0,0 +1,301 @@
+"""
+Replay - Compact binary recording of a play session and deterministic playback.
+
+A replay stores the game seed and only the inputs that changed something,
+each tagged with the simulation tick it happened on. Because SnakeEngine is
+deterministic for a given seed, that is enough to rebuild every game exactly,
+headlessly at engine speed or rendered by SnakeGame at any speed.
+
+File layout (little-endian):
+    header: b"SNKR" | version u8 | seed u64 | width u16 | height u16 | tick_rate f32
+    events: varint(ticks since previous event) | code u8 ...
+    last event is END
+
+Usage:
+    python src/replay.py summary replays/<file>.snkr
+    python src/replay.py play replays/<file>.snkr --speed 30
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+MAGIC = b"SNKR"
+VERSION = 1
+_HEADER = struct.Struct("<4sBQHHf")
+
+# Seeds are stored as an unsigned 64-bit integer
+MAX_SEED = 2 ** 64
+
+# Event codes
+TURN = 0x00          # 0x00-0x03: turn to DIRECTIONS[code], applied on this tick
+RESET = 0x04         # new game before this tick
+PURCHASE = 0x05      # store purchase
+QUIZ_ANSWER = 0x10   # 0x10-0x13: quiz answer choice (code - QUIZ_ANSWER)
+END = 0xFF           # end of session
+
+_DIRECTION_CODES = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+# (tick, code)
+Event = Tuple[int, int]
+
+
+def _write_varint(out: bytearray, value: int):
+    """Append an unsigned LEB128 integer."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read an unsigned LEB128 integer, returning (value, new position)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def check_seed(seed: int) -> int:
+    """Return seed if a replay can store it (0 <= seed < MAX_SEED), else raise ValueError."""
+    if not 0 <= seed < MAX_SEED:
+        raise ValueError(f"Seed {seed} out of range: must be 0 to {MAX_SEED - 1}")
+    return seed
+
+
+class Replay:
+    """Seed, board settings and the event list of one session."""
+
+    def __init__(self, seed: int, width: int, height: int, tick_rate: float,
+                 events: Optional[List[Event]] = None):
+        self.seed = check_seed(seed)
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.events = events if events is not None else []
+
+    def to_bytes(self) -> bytes:
+        """Encode the replay in the binary format."""
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.seed, self.width, self.height, self.tick_rate))
+        previous = 0
+        for tick, code in self.events:
+            _write_varint(out, tick - previous)
+            out.append(code)
+            previous = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        """Decode a replay. A truncated file yields the events read so far."""
+        magic, version, seed, width, height, tick_rate = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a snake replay file")
+        events = []
+        pos = _HEADER.size
+        tick = 0
+        try:
+            while pos < len(data):
+                delta, pos = _read_varint(data, pos)
+                tick += delta
+                events.append((tick, data[pos]))
+                pos += 1
+        except IndexError:
+            pass
+        return cls(seed, width, height, tick_rate, events)
+
+    def save(self, path: str):
+        """Write the replay to a file."""
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Read a replay from a file."""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    @property
+    def ticks(self) -> int:
+        """Number of simulation ticks covered."""
+        return self.events[-1][0] if self.events else 0
+
+
+class ReplayRecorder:
+    """Builds a Replay from the inputs of a live session."""
+
+    def __init__(self, seed: int, width: int, height: int, tick_rate: float):
+        self.replay = Replay(seed, width, height, tick_rate)
+        self.tick = 0
+
+    def step(self, turn: Optional[Tuple[int, int]]):
+        """Record one simulation tick and the turn applied on it, if any."""
+        if turn is not None:
+            self.replay.events.append((self.tick, TURN + _DIRECTION_CODES[turn]))
+        self.tick += 1
+
+    def reset(self):
+        """Record the start of a new game."""
+        self.replay.events.append((self.tick, RESET))
+
+    def quiz_answer(self, choice: int):
+        """Record a quiz answer."""
+        self.replay.events.append((self.tick, QUIZ_ANSWER + choice))
+
+    def purchase(self):
+        """Record a store purchase."""
+        self.replay.events.append((self.tick, PURCHASE))
+
+    def finish(self) -> Replay:
+        """Close the session and return the replay."""
+        if not self.replay.events or self.replay.events[-1][1] != END:
+            self.replay.events.append((self.tick, END))
+        return self.replay
+
+    def save(self, directory: str) -> str:
+        """
+        Finish and write the replay to <directory>/<time>-<seed>.snkr.
+
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.replay.seed}.snkr"
+        path = os.path.join(directory, name)
+        self.finish().save(path)
+        return path
+
+
+class ReplayPlayer:
+    """Feeds a Replay back into a SnakeEngine one tick at a time."""
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.index = 0
+        self.tick = 0
+        self.resets = 0
+        self.games: List[Dict] = []
+        self.quiz_answers: List[Tuple[int, int]] = []
+        self.purchases: List[int] = []
+
+    def create_engine(self) -> SnakeEngine:
+        """Create an engine seeded like the recorded session."""
+        return SnakeEngine(self.replay.width, self.replay.height, seed=self.replay.seed)
+
+    def advance(self, engine: SnakeEngine) -> bool:
+        """
+        Apply the events due at the current tick and run one engine step.
+
+        Returns:
+            False once the replay has ended
+        """
+        events = self.replay.events
+        turn = None
+        while self.index < len(events) and events[self.index][0] == self.tick:
+            code = events[self.index][1]
+            if code == END:
+                return False
+            self.index += 1
+            if code < RESET:
+                turn = DIRECTIONS[code]
+                break
+            if code == RESET:
+                engine.reset()
+                self.resets += 1
+            elif code == PURCHASE:
+                self.purchases.append(self.tick)
+            elif code >= QUIZ_ANSWER:
+                self.quiz_answers.append((self.tick, code - QUIZ_ANSWER))
+
+        if turn is None and self.index >= len(events):
+            # Truncated file without END
+            return False
+
+        was_over = engine.game_over
+        engine.step(turn)
+        self.tick += 1
+        if engine.game_over and not was_over:
+            self.games.append(self.describe_end(engine))
+        return True
+
+    def describe_end(self, engine: SnakeEngine) -> Dict:
+        """Summarize how a game ended."""
+        x, y = engine.board.coords(engine.board.head())
+        return {
+            'game': len(self.games) + 1,
+            'tick': self.tick,
+            'score': engine.score,
+            'length': engine.length,
+            'cause': engine.death_cause,
+            'head': (x, y),
+            'direction': engine.direction
+        }
+
+    def play(self) -> List[Dict]:
+        """
+        Run the whole replay headlessly.
+
+        Returns:
+            Summary of every game that ended during the session
+        """
+        engine = self.create_engine()
+        while self.advance(engine):
+            pass
+        return self.games
+
+
+def print_summary(path: str):
+    """Print replay details and why each game ended."""
+    replay = Replay.load(path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    games = player.play()
+    elapsed = time.perf_counter() - start
+
+    size = os.path.getsize(path)
+    print(f"Replay: {path}")
+    print(f"Seed {replay.seed}, board {replay.width}x{replay.height}, {replay.tick_rate:g} ticks/sec")
+    print(f"{replay.ticks} ticks in {size} bytes ({size / max(replay.ticks, 1):.3f} bytes/tick)")
+    print(f"Played back in {elapsed * 1000:.1f} ms ({player.tick / max(elapsed, 1e-9):,.0f} ticks/sec)")
+    print(f"Quiz answers: {len(player.quiz_answers)}, purchases: {len(player.purchases)}")
+    for game in games:
+        print(f"Game {game['game']}: ended at tick {game['tick']} by {game['cause']} "
+              f"at {game['head']} moving {game['direction']}, score {game['score']}")
+
+
+def main():
+    """Entry point for the replay tool."""
+    parser = argparse.ArgumentParser(description="Snake replay tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summary", help="play back headlessly and explain how each game ended")
+    summary.add_argument("file")
+
+    play = sub.add_parser("play", help="watch a replay")
+    play.add_argument("file")
+    play.add_argument("--speed", type=float, default=0, help="ticks per second (default: as recorded)")
+
+    args = parser.parse_args()
+    if args.command == "summary":
+        print_summary(args.file)
+    elif args.command == "play":
+        from snake_game import SnakeGame
+        replay = Replay.load(args.file)
+        game = SnakeGame(tick_rate=args.speed or replay.tick_rate, replay=replay)
+        game.run()
+
+
+if __name__ == "__main__":
+    main()
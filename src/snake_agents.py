@@ -0,0 +1,208 @@
+"""
+Snake Agents - Scripted policies that play SnakeEngine games (used by the
+tournament runner and benchmarks).
+"""
+import random
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def hamiltonian_cycle(width: int, height: int) -> List[int]:
+    """
+    Build a Hamiltonian cycle over the grid. One of width and height must be
+    even (a grid with both odd has no Hamiltonian cycle) and both at least 2.
+
+    Returns:
+        List where entry c is the cell that follows cell c on the cycle
+
+    Raises:
+        ValueError: If the grid has no Hamiltonian cycle
+    """
+    if width < 2 or height < 2:
+        raise ValueError(f"No Hamiltonian cycle on a {width}x{height} grid: both sides must be at least 2")
+    if width % 2 and height % 2:
+        raise ValueError(f"No Hamiltonian cycle on a {width}x{height} grid: one side must be even")
+
+    # Sweep along the lines of the even dimension: rows if height is even,
+    # otherwise columns (the same cycle, transposed)
+    if height % 2 == 0:
+        lines, length = height, width
+        cell = lambda line, i: line * width + i
+    else:
+        lines, length = width, height
+        cell = lambda line, i: i * width + line
+    order = []
+    # Position 0 of every line is the return path; lines snake back and forth over 1..length-1
+    for line in range(lines):
+        steps = range(1, length) if line % 2 == 0 else range(length - 1, 0, -1)
+        order.extend(cell(line, i) for i in steps)
+    order.extend(cell(line, 0) for line in range(lines - 1, -1, -1))
+
+    successor = [0] * (width * height)
+    for i, cell in enumerate(order):
+        successor[cell] = order[(i + 1) % len(order)]
+    return successor
+
+
+class Agent:
+    """Base class for snake policies."""
+
+    name = "agent"
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize the agent.
+
+        Args:
+            seed: Seed for the agent's private random generator
+        """
+        self.rng = random.Random(seed)
+
+    def reset(self, engine: SnakeEngine):
+        """Called once at the start of every game."""
+
+    def act(self, engine: SnakeEngine) -> Optional[Tuple[int, int]]:
+        """
+        Choose the next direction.
+
+        Returns:
+            Direction (dx, dy), or None to keep going straight
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def safe_moves(engine: SnakeEngine) -> List[Tuple[Tuple[int, int], int]]:
+        """Get (direction, cell) for every move that does not die this tick."""
+        board = engine.board
+        x, y = board.coords(board.head())
+        moves = []
+        for direction in DIRECTIONS:
+            if engine.is_reverse(direction, engine.direction):
+                continue
+            nx, ny = x + direction[0], y + direction[1]
+            if board.in_bounds(nx, ny):
+                cell = board.cell(nx, ny)
+                if not board.occupied[cell]:
+                    moves.append((direction, cell))
+        return moves
+
+
+class RandomAgent(Agent):
+    """Picks a random move that survives this tick."""
+
+    name = "random"
+
+    def act(self, engine):
+        moves = self.safe_moves(engine)
+        if not moves:
+            return None
+        return self.rng.choice(moves)[0]
+
+
+class GreedyAgent(Agent):
+    """Takes the surviving move that gets closest to the apple."""
+
+    name = "greedy"
+
+    def act(self, engine):
+        moves = self.safe_moves(engine)
+        if not moves or engine.apple is None:
+            return None
+        ax, ay = engine.board.coords(engine.apple)
+        coords = engine.board.coords
+
+        def distance(move):
+            x, y = coords(move[1])
+            return abs(x - ax) + abs(y - ay)
+
+        return min(moves, key=distance)[0]
+
+
+class BfsAgent(GreedyAgent):
+    """
+    Follows a shortest path to the apple through empty cells, falling back to
+    greedy when no path exists. The path is computed once per apple, since
+    cells on it can only be entered by the head until the apple is eaten.
+    """
+
+    name = "bfs"
+
+    def reset(self, engine):
+        self.path = deque()
+        self.target = None
+
+    def act(self, engine):
+        if engine.apple != self.target or not self.path:
+            self.target = engine.apple
+            self.path = self._find_path(engine)
+        if self.path:
+            return self.path.popleft()
+        return super().act(engine)
+
+    def _find_path(self, engine: SnakeEngine) -> deque:
+        """Breadth-first search from the head to the apple."""
+        if engine.apple is None:
+            return deque()
+        board = engine.board
+        width, height = board.width, board.height
+        occupied = board.occupied
+        start = board.head()
+        came_from: Dict[int, Tuple[int, Tuple[int, int]]] = {start: None}
+        frontier = deque([start])
+        reverse = (-engine.direction[0], -engine.direction[1])
+
+        while frontier:
+            cell = frontier.popleft()
+            if cell == engine.apple:
+                break
+            x, y = cell % width, cell // width
+            for direction in DIRECTIONS:
+                if cell == start and direction == reverse:
+                    continue
+                nx, ny = x + direction[0], y + direction[1]
+                if 0 <= nx < width and 0 <= ny < height:
+                    nxt = ny * width + nx
+                    if nxt not in came_from and not occupied[nxt]:
+                        came_from[nxt] = (cell, direction)
+                        frontier.append(nxt)
+        else:
+            return deque()
+
+        path = deque()
+        cell = engine.apple
+        while cell != start:
+            cell, direction = came_from[cell]
+            path.appendleft(direction)
+        return path
+
+
+class HamiltonianAgent(Agent):
+    """Follows a fixed Hamiltonian cycle; slow but never dies."""
+
+    name = "hamiltonian"
+
+    def reset(self, engine):
+        board = engine.board
+        successor = hamiltonian_cycle(board.width, board.height)
+        if len(board) > 1 and successor[board.head()] == board.body[1]:
+            # The body lies along the cycle the other way round; walk it backwards
+            predecessor = [0] * board.size
+            for cell, nxt in enumerate(successor):
+                predecessor[nxt] = cell
+            successor = predecessor
+        self.successor = successor
+
+    def act(self, engine):
+        board = engine.board
+        head = board.head()
+        x, y = board.coords(head)
+        nx, ny = board.coords(self.successor[head])
+        return (nx - x, ny - y)
+
+
+AGENTS = {
+    agent.name: agent
+    for agent in (GreedyAgent, BfsAgent, HamiltonianAgent, RandomAgent)
+}
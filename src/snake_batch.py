@@ -0,0 +1,224 @@
+"""
+BatchSnakeEngine - Many independent snake games stepped in lockstep with NumPy.
+
+Follows the same rules as SnakeEngine (wall/self collision, growth, apple
+spawning) but keeps every board in arrays so one step() call advances all of
+them. Used for AI-opponent training and balancing sweeps.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from snake_engine import (
+    DIRECTIONS, REWARD_APPLE, REWARD_DEATH,
+    DEATH_WALL, DEATH_SELF, DEATH_BOARD_FULL
+)
+
+
+# Action index meaning "keep going straight"
+NO_ACTION = -1
+
+# Direction index of RIGHT in DIRECTIONS (UP, RIGHT, DOWN, LEFT)
+_RIGHT = 1
+_DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+_DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+
+# Death cause codes stored in BatchSnakeEngine.death_cause
+CAUSE_NONE = 0
+CAUSE_WALL = 1
+CAUSE_SELF = 2
+CAUSE_BOARD_FULL = 3
+CAUSE_NAMES = (None, DEATH_WALL, DEATH_SELF, DEATH_BOARD_FULL)
+
+
+class BatchSnakeEngine:
+    """
+    N snake boards held as NumPy arrays:
+
+    - head: (N,) head cell id
+    - body: (N, W*H) ring buffer of body cells, tail at tail_pos
+    - occupied: (N, W*H) occupancy grid
+    - apple: (N,) apple cell id (-1 when the board is full)
+    - score, steps, length, direction, done, death_cause: (N,)
+
+    Actions are indices into DIRECTIONS, or NO_ACTION to keep going straight.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        width: int = 40,
+        height: int = 30,
+        seed: Optional[int] = None,
+        auto_reset: bool = True
+    ):
+        """
+        Initialize n boards and start a game on each.
+
+        Args:
+            n: Number of boards
+            width: Board width in cells
+            height: Board height in cells
+            seed: Seed for the NumPy random generator
+            auto_reset: If True, finished boards restart at the end of step()
+        """
+        self.n = n
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        self.head = np.zeros(n, dtype=np.int32)
+        self.body = np.zeros((n, self.size), dtype=np.int32)
+        self.tail_pos = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.occupied = np.zeros((n, self.size), dtype=bool)
+        self.apple = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        self.death_cause = np.zeros(n, dtype=np.int8)
+
+        # Score of the last finished game on each board (kept across auto-resets)
+        self.final_score = np.zeros(n, dtype=np.int32)
+        self.games_finished = 0
+
+        self._rows = np.arange(n)
+        self.reset()
+
+    def reset(self, indices: Optional[np.ndarray] = None):
+        """
+        Restart the given boards (default: all) with a 3-segment snake in the
+        middle, moving right.
+        """
+        if indices is None:
+            indices = self._rows
+        if len(indices) == 0:
+            return
+
+        start_x = self.width // 2
+        start_y = self.height // 2
+        start = start_y * self.width + start_x
+        tail_first = np.array([start - 2, start - 1, start], dtype=np.int32)
+
+        self.occupied[indices] = False
+        self.occupied[indices[:, None], tail_first[None, :]] = True
+        self.body[indices, :3] = tail_first
+        self.tail_pos[indices] = 0
+        self.length[indices] = 3
+        self.head[indices] = start
+        self.direction[indices] = _RIGHT
+        self.score[indices] = 0
+        self.steps[indices] = 0
+        self.done[indices] = False
+        self.death_cause[indices] = CAUSE_NONE
+        self.apple[indices] = self._spawn_apples(indices)
+
+    def _spawn_apples(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Pick a uniformly random empty cell on each of the given boards.
+
+        Returns:
+            Cell ids, -1 where the board is full
+        """
+        m = len(indices)
+        cells = self.rng.integers(0, self.size, size=m, dtype=np.int32)
+
+        # One round of rejection sampling handles almost every board cheaply
+        missed = self.occupied[indices, cells]
+        if missed.any():
+            rows = indices[missed]
+            free = ~self.occupied[rows]
+            counts = free.sum(axis=1)
+            k = (self.rng.random(len(rows)) * counts).astype(np.int64)
+            # The k-th free cell in row-major order
+            picked = np.argmax(np.cumsum(free, axis=1) > k[:, None], axis=1)
+            cells[missed] = np.where(counts > 0, picked, -1)
+        return cells
+
+    def step(self, actions=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance every unfinished board by one tick.
+
+        Args:
+            actions: (N,) direction indices or NO_ACTION; None keeps every
+                     snake going straight. Direct reversals are ignored.
+
+        Returns:
+            (rewards, dones): per-board REWARD_APPLE / REWARD_DEATH / 0, and
+            which boards finished on this tick
+        """
+        alive = ~self.done
+        direction = self.direction
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (actions != (direction + 2) % 4) & alive
+            direction = np.where(turn, actions, direction).astype(np.int32)
+            self.direction = direction
+
+        width = self.width
+        x = self.head % width + _DX[direction]
+        y = self.head // width + _DY[direction]
+        self.steps += alive
+
+        # Check wall collision
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < self.height)
+        wall = alive & ~inside
+        new_head = np.where(inside, y * width + x, 0).astype(np.int32)
+
+        # Check self collision (against the body before the tail moves)
+        hit_self = alive & ~wall & self.occupied[self._rows, new_head]
+
+        rewards = np.zeros(self.n, dtype=np.int8)
+        dones = wall | hit_self
+        rewards[dones] = REWARD_DEATH
+        self.death_cause[wall] = CAUSE_WALL
+        self.death_cause[hit_self] = CAUSE_SELF
+
+        # Add new heads
+        movers = np.flatnonzero(alive & ~dones)
+        heads = new_head[movers]
+        self.body[movers, (self.tail_pos[movers] + self.length[movers]) % self.size] = heads
+        self.occupied[movers, heads] = True
+        self.length[movers] += 1
+        self.head[movers] = heads
+
+        # Check apple collision
+        ate = heads == self.apple[movers]
+        eaters = movers[ate]
+        rewards[eaters] = REWARD_APPLE
+        self.score[eaters] += 1
+        if len(eaters):
+            apples = self._spawn_apples(eaters)
+            self.apple[eaters] = apples
+            full = eaters[apples < 0]
+            dones[full] = True
+            self.death_cause[full] = CAUSE_BOARD_FULL
+
+        # Remove tails where no apple was eaten
+        shrink = movers[~ate]
+        tails = self.body[shrink, self.tail_pos[shrink]]
+        self.occupied[shrink, tails] = False
+        self.tail_pos[shrink] = (self.tail_pos[shrink] + 1) % self.size
+        self.length[shrink] -= 1
+
+        self.done |= dones
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            self.final_score[finished] = self.score[finished]
+            self.games_finished += len(finished)
+            if self.auto_reset:
+                self.reset(finished)
+
+        return rewards, dones
+
+    def body_cells(self, i: int) -> List[int]:
+        """Get the body of board i as cell ids from head to tail."""
+        positions = (self.tail_pos[i] + np.arange(self.length[i])) % self.size
+        return self.body[i, positions][::-1].tolist()
+
+    def cause_of_death(self, i: int) -> Optional[str]:
+        """Get the death cause of board i as a SnakeEngine DEATH_* string."""
+        return CAUSE_NAMES[self.death_cause[i]]
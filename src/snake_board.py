@@ -0,0 +1,138 @@
+"""
+SnakeBoard - Grid occupancy for the snake body with constant-time lookups
+"""
+import random
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+class SnakeBoard:
+    """
+    Tracks which cells of a width x height grid are covered by the snake.
+
+    Cells are stored as integer ids (``y * width + x``). The body lives in a
+    deque (head at index 0), occupancy in a bytearray, and the empty cells in a
+    free list with a reverse index, so moving, collision checks and picking a
+    random empty cell for the apple are all O(1) no matter how long the snake is.
+    """
+
+    def __init__(self, width: int, height: int):
+        """
+        Initialize an empty board.
+
+        Args:
+            width: Number of columns
+            height: Number of rows
+        """
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        self.body = deque()
+        self.occupied = bytearray(self.size)
+
+        # Free-cell index: free[pos[c]] == c for every empty cell c
+        self.free = list(range(self.size))
+        self.pos = list(range(self.size))
+
+    # Coordinate helpers
+
+    def cell(self, x: int, y: int) -> int:
+        """Convert grid coordinates to a cell id."""
+        return y * self.width + x
+
+    def coords(self, cell: int) -> Tuple[int, int]:
+        """Convert a cell id to grid coordinates (x, y)."""
+        return cell % self.width, cell // self.width
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Check whether grid coordinates are on the board."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    # Occupancy
+
+    def _occupy(self, cell: int):
+        """Mark a cell as covered and drop it from the free list."""
+        self.occupied[cell] = 1
+        free = self.free
+        i = self.pos[cell]
+        last = free.pop()
+        if last != cell:
+            free[i] = last
+            self.pos[last] = i
+
+    def _vacate(self, cell: int):
+        """Mark a cell as empty and add it back to the free list."""
+        self.occupied[cell] = 0
+        self.pos[cell] = len(self.free)
+        self.free.append(cell)
+
+    def is_occupied(self, cell: int) -> bool:
+        """Check whether a cell is covered by the snake."""
+        return self.occupied[cell] == 1
+
+    def free_count(self) -> int:
+        """Get the number of empty cells."""
+        return len(self.free)
+
+    # Body operations
+
+    def reset(self, cells: Iterable[int]):
+        """
+        Clear the board and place a new body.
+
+        Args:
+            cells: Cell ids from head to tail
+        """
+        self.clear()
+        for cell in cells:
+            self._occupy(cell)
+            self.body.append(cell)
+
+    def clear(self):
+        """Remove the whole body. Cost is proportional to its length."""
+        while self.body:
+            self._vacate(self.body.pop())
+
+    def push_head(self, cell: int):
+        """Add a new head segment."""
+        self._occupy(cell)
+        self.body.appendleft(cell)
+
+    def pop_tail(self) -> int:
+        """Remove the tail segment and return its cell id."""
+        cell = self.body.pop()
+        self._vacate(cell)
+        return cell
+
+    def head(self) -> int:
+        """Get the cell id of the head."""
+        return self.body[0]
+
+    def tail(self) -> int:
+        """Get the cell id of the tail."""
+        return self.body[-1]
+
+    def random_free_cell(self, rng: Optional[random.Random] = None) -> Optional[int]:
+        """
+        Pick a uniformly random empty cell.
+
+        Args:
+            rng: Random generator to draw from (default: the global random module)
+
+        Returns:
+            Cell id, or None if the board is full
+        """
+        if not self.free:
+            return None
+        rng = rng or random
+        return self.free[int(rng.random() * len(self.free))]
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.body)
+
+    def __contains__(self, cell: int) -> bool:
+        return self.occupied[cell] == 1
@@ -0,0 +1,147 @@
+"""
+SnakeEngine - Pure-Python snake rules with no pygame dependency, so games can
+be simulated headlessly (tests, balancing, AI opponents) as fast as possible.
+"""
+import random
+from typing import Optional, Tuple
+
+from snake_board import SnakeBoard
+
+
+# Directions as (dx, dy) in grid cells
+UP = (0, -1)
+RIGHT = (1, 0)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+
+# Step rewards
+REWARD_APPLE = 1
+REWARD_DEATH = -1
+
+# Causes of death
+DEATH_WALL = "wall"
+DEATH_SELF = "self"
+DEATH_BOARD_FULL = "board_full"
+
+
+class SnakeEngine:
+    """
+    Game state and rules for one snake: movement, collisions, growth, apple
+    spawning and score. Rendering, input and coins are left to the caller.
+    """
+
+    def __init__(
+        self,
+        width: int = 40,
+        height: int = 30,
+        seed: Optional[int] = None,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Initialize the engine and start a new game.
+
+        Args:
+            width: Board width in cells
+            height: Board height in cells
+            seed: Seed for a private random generator (ignored if rng is given)
+            rng: Random generator used for apple placement
+        """
+        self.width = width
+        self.height = height
+        self.rng = rng or random.Random(seed)
+        self.board = SnakeBoard(width, height)
+        self.reset()
+
+    def reset(self):
+        """Reset to a 3-segment snake in the middle, moving right."""
+        start_x = self.width // 2
+        start_y = self.height // 2
+        cell = self.board.cell
+        self.board.reset([
+            cell(start_x, start_y),
+            cell(start_x - 1, start_y),
+            cell(start_x - 2, start_y)
+        ])
+        self.direction = RIGHT
+        self.apple = self.board.random_free_cell(self.rng)
+        self.score = 0
+        self.steps = 0
+        self.game_over = False
+        self.death_cause = None
+
+    @staticmethod
+    def is_reverse(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """Check whether direction a points straight back along direction b."""
+        return a[0] == -b[0] and a[1] == -b[1]
+
+    def step(self, action: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Advance the game by one tick.
+
+        Args:
+            action: New direction (dx, dy), one of DIRECTIONS, or None to keep
+                    going straight. A direct reversal is ignored.
+
+        Returns:
+            REWARD_APPLE if an apple was eaten, REWARD_DEATH if the snake died,
+            0 otherwise
+
+        Raises:
+            ValueError: If action is not one of DIRECTIONS
+        """
+        direction = self.direction
+        if action is not None and action != direction and action not in DIRECTIONS:
+            action = tuple(action)
+            if action not in DIRECTIONS:
+                raise ValueError(f"Invalid action {action!r}: must be one of {DIRECTIONS}")
+
+        if self.game_over:
+            return 0
+
+        if action is not None and action != direction:
+            if not (action[0] == -direction[0] and action[1] == -direction[1]):
+                direction = self.direction = action
+
+        board = self.board
+        width = self.width
+        head = board.body[0]
+        x = head % width + direction[0]
+        y = head // width + direction[1]
+        self.steps += 1
+
+        # Check wall collision
+        if x < 0 or x >= width or y < 0 or y >= self.height:
+            return self._die(DEATH_WALL)
+
+        # Check self collision
+        head = y * width + x
+        if board.occupied[head]:
+            return self._die(DEATH_SELF)
+
+        board.push_head(head)
+
+        # Check apple collision
+        if head == self.apple:
+            self.score += 1
+            self.apple = board.random_free_cell(self.rng)
+            if self.apple is None:
+                # Snake fills the whole board - nothing left to eat
+                self.game_over = True
+                self.death_cause = DEATH_BOARD_FULL
+            return REWARD_APPLE
+
+        # Remove tail if no apple eaten
+        board.pop_tail()
+        return 0
+
+    def _die(self, cause: str) -> int:
+        """End the game with the given cause of death."""
+        self.game_over = True
+        self.death_cause = cause
+        return REWARD_DEATH
+
+    @property
+    def length(self) -> int:
+        """Get the current snake length."""
+        return len(self.board)
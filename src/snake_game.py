@@ -3,22 +3,39 @@ Snake Game with Quiz Integration - A Pygame-based Snake game that shows quizzes
 every few minutes and includes an in-game store.
 """
 import pygame
+import argparse
 import random
 import sys
 import os
+import time
+from typing import Callable, Optional
 
 # Add src directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
+from frame_profiler import FrameProfiler, INPUT, UPDATE, DRAW, WAIT, profiling_requested
+from events import (AppleEaten, EventBus, GameOver, ItemPurchased, PurchaseFailed, QuizAnswered, QuizStarted,
+                    ThreadedSubscriber)
 from quiz.quiz_manager import QuizManager
 from store import Store
+from storage import FileStorage, SqliteStorage, StorageBackend
+from telemetry import NdjsonSink, PrometheusSink, TelemetryExporter, metrics
+from text_cache import TextCache
+from input_queue import TurnQueue
+from replay import MAX_SEED, Replay, ReplayRecorder, ReplayPlayer, check_seed
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, REWARD_APPLE
 
 
 # Game Configuration
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 GRID_SIZE = 20
-GAME_SPEED = 10  # FPS
+GAME_SPEED = 10  # Simulation ticks per second
+RENDER_FPS = 60  # Frames (and input polls) per second, 0 = uncapped
+INTERPOLATE = False  # Set to True to slide the head/tail smoothly between ticks
+MAX_FRAME_SECONDS = 0.25  # Longest frame the simulation catches up on (avoids a spiral after a stall)
+GRID_WIDTH = WINDOW_WIDTH // GRID_SIZE
+GRID_HEIGHT = WINDOW_HEIGHT // GRID_SIZE
 
 # Colors
 BLACK = (0, 0, 0)
@@ -30,17 +47,75 @@ YELLOW = (255, 255, 0)
 GRAY = (128, 128, 128)
 DARK_GRAY = (64, 64, 64)
 
+# Minimum width of a HUD line's redraw region, so short values don't leave stale pixels
+HUD_REGION_WIDTH = 190
+
 # Quiz Configuration
 QUIZ_INTERVAL_SECONDS = 180  # 3 minutes - Change to 20 for quick demo
 DEMO_MODE = False  # Set to True to show first quiz after 10 seconds
 
+# Replays of every session are saved here (see src/replay.py)
+REPLAY_DIR = "replays"
+
+# Frame profiles (--profile or SNAKE_PROFILE=1) are saved here
+PROFILE_DIR = "profiles"
+
+# Telemetry: "off", "file" (rotating NDJSON in TELEMETRY_DIR) or "http"
+# (Prometheus text at http://127.0.0.1:TELEMETRY_PORT/metrics)
+TELEMETRY = "off"
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_PORT = 9464
+TELEMETRY_INTERVAL = 10.0  # Seconds between exported snapshots
+
+# Persistence: "files" (JSON/JSONL in the working directory) or "sqlite"
+STORAGE = "files"
+SQLITE_DB = "snake_game.db"
+PLAYER_NAME = "local"  # Player whose rows are used in a shared SQLite database
+
+
+# Arrow keys to snake directions
+ARROW_KEYS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT
+}
+
 
 class SnakeGame:
     """Main Snake Game class with quiz and store integration."""
     
-    def __init__(self):
-        """Initialize the game."""
+    def __init__(self, tick_rate: float = GAME_SPEED, render_fps: int = RENDER_FPS,
+                 interpolate: bool = INTERPOLATE, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.perf_counter,
+                 replay: Optional[Replay] = None, storage: Optional[StorageBackend] = None,
+                 profile: Optional[bool] = None, telemetry: Optional[TelemetryExporter] = None):
+        """
+        Initialize the game.
+        
+        Args:
+            tick_rate: Simulation ticks per second
+            render_fps: Render and input frames per second (0 = uncapped)
+            interpolate: If True, draw the head and tail part-way between cells
+            seed: Seed for apple placement and quiz questions, 0 to 2**64 - 1 (random if None)
+            clock: Monotonic function returning the current time in seconds,
+                   used for the game loop, input latency and quiz timing
+            replay: If given, watch this recorded session instead of playing
+            storage: Where quiz results and inventory are saved (default: FileStorage)
+            profile: Time each frame phase, show it on screen and save it at exit
+                     (default: the SNAKE_PROFILE environment variable)
+            telemetry: Exporter for counters and timings (game events, frame time,
+                       ticks); the game closes it at exit
+        """
         pygame.init()
+        self.now = clock
+        self.tick_rate = tick_rate
+        self.render_fps = render_fps
+        self.interpolate = interpolate
+        self.render_alpha = 0.0  # Fraction of the current tick that has elapsed
+        if profile is None:
+            profile = profiling_requested()
+        self.profiler = FrameProfiler(clock=clock) if profile else None
         
         # Setup display
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -50,77 +125,192 @@ class SnakeGame:
         # Setup fonts
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
-        
-        # Game state
-        self.reset_game()
+        self.text_cache = TextCache()
+        
+        # Overlays are built once and blitted, not re-allocated every frame
+        self.overlays = {
+            'quiz': self.build_overlay(BLACK, 230),
+            'store': self.build_overlay(DARK_GRAY, 230),
+            'game_over': self.build_overlay(BLACK, 200)
+        }
+        # Wrapped question text per question id
+        self.question_layouts = {}
+        
+        # Game state (rules live in the headless engine; this class renders it).
+        # Every session is recorded so it can be replayed exactly from its seed.
+        if replay:
+            self.seed = replay.seed
+            self.player = ReplayPlayer(replay)
+            self.recorder = None
+        else:
+            self.seed = seed if seed is not None else random.randrange(2 ** 63)
+            self.player = None
+            self.recorder = ReplayRecorder(self.seed, GRID_WIDTH, GRID_HEIGHT, tick_rate)
+        self.engine = SnakeEngine(GRID_WIDTH, GRID_HEIGHT, seed=self.seed)
+        self.turn_queue = TurnQueue()
+        self.reset_view()
         
         # Coins (earned from eating apples and quizzes)
         self.coins = 0
         
+        # Persistence shared by the quiz and the store
+        self.storage = storage or FileStorage()
+        
+        # Game events: coins and pausing follow them here; console messages
+        # are printed off the game thread
+        self.events = EventBus()
+        self.events.subscribe(AppleEaten, self.on_apple_eaten)
+        self.events.subscribe(QuizStarted, self.pause_for_quiz)
+        self.events.subscribe(QuizAnswered, self.on_quiz_answer)
+        self.events.subscribe(ItemPurchased, self.on_item_purchased)
+        self.console_log = ThreadedSubscriber(self.log_event, name="console-log").attach(
+            self.events, (QuizStarted, QuizAnswered, ItemPurchased, PurchaseFailed, GameOver))
+        
         # Quiz manager
         questions_file = os.path.join(os.path.dirname(__file__), 'quiz', 'questions.json')
         self.quiz_manager = QuizManager(
             questions_file=questions_file,
             quiz_interval=QUIZ_INTERVAL_SECONDS,
-            pause_callback=self.pause_for_quiz,
-            resume_callback=self.resume_from_quiz,
-            on_answer_callback=self.on_quiz_answer,
+            events=self.events,
             server_url=None,  # Set to your Google Apps Script URL if you deployed it
-            demo_mode=DEMO_MODE
+            demo_mode=DEMO_MODE,
+            rng=random.Random(self.seed + 1),
+            clock=self.now,
+            storage=self.storage
         )
         
         # Store
-        self.store = Store()
+        self.store = Store(storage=self.storage, rng=random.Random(self.seed + 2), events=self.events)
         self.show_store = False
         
         # Game states
         self.running = True
         self.paused = False
-        self.game_over = False
+        
+        # Telemetry: game events are counted here, frame times and ticks in run()
+        self.telemetry = telemetry
+        if telemetry:
+            metrics.attach(self.events)
+            metrics.gauge("score", "Apples eaten in the current game", fn=lambda: self.score)
+            metrics.gauge("snake_length", "Length of the snake", fn=lambda: self.engine.length)
+            metrics.gauge("coins", "Coins the player has", fn=lambda: self.coins)
+            metrics.gauge("console_log_pending", "Console messages not printed yet",
+                          fn=self.console_log.pending_count)
+            if self.quiz_manager.uploader:
+                metrics.gauge("upload_pending", "Quiz results waiting in memory for upload",
+                              fn=self.quiz_manager.uploader.pending_count)
     
     def reset_game(self):
         """Reset game state for new game."""
-        # Snake starts in the middle, moving right
-        start_x = WINDOW_WIDTH // 2
-        start_y = WINDOW_HEIGHT // 2
-        self.snake = [
-            [start_x, start_y],
-            [start_x - GRID_SIZE, start_y],
-            [start_x - 2 * GRID_SIZE, start_y]
-        ]
-        self.direction = [GRID_SIZE, 0]
-        self.next_direction = [GRID_SIZE, 0]
-        
-        # Spawn first apple
-        self.apple = self.spawn_apple()
-        
-        # Score
-        self.score = 0
+        self.engine.reset()
+        if self.recorder:
+            self.recorder.reset()
+        self.reset_view()
+        if not self.show_store:
+            self.quiz_manager.resume_timer()
     
-    def spawn_apple(self):
-        """Spawn apple at random location not on snake."""
-        while True:
-            x = random.randint(0, (WINDOW_WIDTH - GRID_SIZE) // GRID_SIZE) * GRID_SIZE
-            y = random.randint(0, (WINDOW_HEIGHT - GRID_SIZE) // GRID_SIZE) * GRID_SIZE
-            
-            if [x, y] not in self.snake:
-                return [x, y]
+    def reset_view(self):
+        """Clear pending input and renderer state for a new game."""
+        self.turn_queue.clear()
+        
+        # Renderer state: cells changed since the last frame, last overlay shown
+        self.dirty_cells = []
+        self.vacated_tail = None
+        self.hud_regions = {}
+        self.overlay_key = None
+        self.full_redraw = True
+    
+    @property
+    def board(self):
+        """Snake body and occupancy grid of the current game."""
+        return self.engine.board
+    
+    @property
+    def direction(self):
+        """Direction the snake moved on the last tick."""
+        return self.engine.direction
+    
+    @property
+    def apple(self):
+        """Cell id of the apple (None if the board is full)."""
+        return self.engine.apple
     
-    def pause_for_quiz(self):
-        """Callback to pause game when quiz starts."""
+    @property
+    def score(self):
+        """Apples eaten in the current game."""
+        return self.engine.score
+    
+    @property
+    def game_over(self):
+        """True once the snake has died."""
+        return self.engine.game_over
+    
+    @staticmethod
+    def build_overlay(color, alpha: int):
+        """Create a full-screen semi-transparent overlay surface."""
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        overlay.set_alpha(alpha)
+        overlay.fill(color)
+        return overlay
+    
+    def cell_rect(self, cell: int):
+        """Get the screen rectangle (x, y, w, h) of a grid cell."""
+        x, y = self.board.coords(cell)
+        return (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+    
+    def cell_part_rect(self, cell: int, side, fraction: float):
+        """
+        Get the part of a cell that touches one edge.
+        
+        Args:
+            cell: Grid cell id
+            side: Direction (dx, dy) of the edge the part is attached to
+            fraction: Share of the cell to cover, 0.0 - 1.0
+        """
+        x, y, w, h = self.cell_rect(cell)
+        size = int(GRID_SIZE * fraction)
+        if side[0] > 0:
+            return (x + w - size, y, size, h)
+        if side[0] < 0:
+            return (x, y, size, h)
+        if side[1] > 0:
+            return (x, y + h - size, w, size)
+        return (x, y, w, size)
+    
+    def on_apple_eaten(self, event: AppleEaten):
+        """1 coin per apple."""
+        self.coins += 1
+    
+    def pause_for_quiz(self, event: QuizStarted):
+        """Pause the game while a quiz is up."""
         self.paused = True
     
-    def resume_from_quiz(self):
-        """Callback to resume game after quiz ends."""
+    def on_quiz_answer(self, event: QuizAnswered):
+        """Resume the game and pay out the quiz reward."""
         self.paused = False
+        self.coins += event.coins_earned
     
-    def on_quiz_answer(self, correct: bool, coins: int):
-        """Callback when quiz answer is submitted."""
-        self.coins += coins
-        if correct:
-            print(f"Correct! +{coins} coins. Total: {self.coins}")
-        else:
-            print(f"Wrong answer. Total coins: {self.coins}")
+    def on_item_purchased(self, event: ItemPurchased):
+        """Pay for a store item."""
+        self.coins -= event.cost
+    
+    def log_event(self, event):
+        """Console messages (runs on the console-log thread, not the game thread)."""
+        if isinstance(event, QuizStarted):
+            print(f"\n{'='*50}")
+            print("QUIZ TIME!")
+            print(f"{'='*50}")
+        elif isinstance(event, QuizAnswered):
+            if event.correct:
+                print(f"Correct! +{event.coins_earned} coins.")
+            else:
+                print("Wrong answer.")
+        elif isinstance(event, ItemPurchased):
+            print(f"Purchased: {event.item}! (-{event.cost} coins)")
+        elif isinstance(event, PurchaseFailed):
+            print(f"Not enough coins! Need {event.cost} coins.")
+        elif isinstance(event, GameOver):
+            print(f"Game over ({event.cause}), score {event.score}")
     
     def handle_input(self):
         """Handle keyboard and event input."""
@@ -129,46 +319,53 @@ class SnakeGame:
                 self.running = False
             
             elif event.type == pygame.KEYDOWN:
+                # Watching a replay: the recording drives the game
+                if self.player:
+                    continue
+                
                 # Handle quiz answer selection
                 if self.quiz_manager.quiz_active:
                     if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]:
                         choice = event.key - pygame.K_1  # Convert to 0-3
+                        self.recorder.quiz_answer(choice)
                         self.quiz_manager.submit_answer(choice)
                     continue
                 
                 # Handle store toggle
                 if event.key == pygame.K_s and not self.paused:
                     self.show_store = not self.show_store
+                    # Time spent shopping doesn't count toward the next quiz
+                    if self.show_store:
+                        self.quiz_manager.pause_timer()
+                    elif not self.game_over:
+                        self.quiz_manager.resume_timer()
                     continue
                 
                 # Handle store purchase
                 if self.show_store and event.key == pygame.K_p:
                     if self.coins >= 20:
-                        self.coins -= 20
-                        prize = self.store.purchase_item()
-                        print(f"Purchased: {prize}! Remaining coins: {self.coins}")
+                        self.recorder.purchase()
+                        self.store.purchase_item(coin_cost=20)
                     else:
-                        print("Not enough coins! Need 20 coins.")
+                        self.events.emit(PurchaseFailed, 20, self.coins)
                     continue
                 
-                # Handle snake direction
+                # Handle snake direction (queued, one turn applied per tick)
                 if not self.paused and not self.game_over:
-                    if event.key == pygame.K_UP and self.direction[1] != GRID_SIZE:
-                        self.next_direction = [0, -GRID_SIZE]
-                    elif event.key == pygame.K_DOWN and self.direction[1] != -GRID_SIZE:
-                        self.next_direction = [0, GRID_SIZE]
-                    elif event.key == pygame.K_LEFT and self.direction[0] != GRID_SIZE:
-                        self.next_direction = [-GRID_SIZE, 0]
-                    elif event.key == pygame.K_RIGHT and self.direction[0] != -GRID_SIZE:
-                        self.next_direction = [GRID_SIZE, 0]
+                    direction = ARROW_KEYS.get(event.key)
+                    if direction:
+                        self.turn_queue.push(direction, self.direction, self.now())
                 
                 # Handle restart
                 if event.key == pygame.K_r and self.game_over:
                     self.reset_game()
-                    self.game_over = False
     
     def update(self):
         """Update game state."""
+        if self.player:
+            self.update_replay()
+            return
+        
         if self.paused or self.game_over:
             return
         
@@ -178,86 +375,207 @@ class SnakeGame:
         if self.quiz_manager.quiz_active:
             return
         
-        # Update direction
-        self.direction = self.next_direction
+        # Remember which cells change so draw() only repaints those
+        board = self.board
+        tail = board.tail()
         
-        # Move snake
-        head = self.snake[0].copy()
-        head[0] += self.direction[0]
-        head[1] += self.direction[1]
-        
-        # Check wall collision
-        if (head[0] < 0 or head[0] >= WINDOW_WIDTH or
-            head[1] < 0 or head[1] >= WINDOW_HEIGHT):
-            self.game_over = True
-            return
+        # Move snake, check collisions and apple
+        turn = self.turn_queue.pop(self.now())
+        self.recorder.step(turn)
+        if self.engine.step(turn) == REWARD_APPLE:
+            self.events.emit(AppleEaten, self.score, self.engine.length)
+        if self.game_over:
+            self.quiz_manager.pause_timer()
+            self.events.emit(GameOver, self.score, self.engine.death_cause)
         
-        # Check self collision
-        if head in self.snake:
-            self.game_over = True
+        self.mark_moved(tail)
+    
+    def update_replay(self):
+        """Advance the replay being watched by one tick."""
+        tail = self.board.tail()
+        score = self.score
+        resets = self.player.resets
+        if not self.player.advance(self.engine):
             return
         
-        # Add new head
-        self.snake.insert(0, head)
-        
-        # Check apple collision
-        if head == self.apple:
-            self.score += 1
-            self.coins += 1  # 1 coin per apple
-            self.apple = self.spawn_apple()
+        if self.player.resets != resets:
+            self.reset_view()
         else:
-            # Remove tail if no apple eaten
-            self.snake.pop()
+            self.coins += self.score - score
+            self.mark_moved(tail)
+    
+    def mark_moved(self, tail: int):
+        """Record the cells a tick touched, given the tail before the tick."""
+        board = self.board
+        self.dirty_cells.append(board.head())
+        self.dirty_cells.append(tail)
+        if self.apple is not None:
+            self.dirty_cells.append(self.apple)
+        self.vacated_tail = None if board.is_occupied(tail) else tail
+    
+    def get_overlay_key(self):
+        """
+        Describe the overlay on screen and the values it shows.
+        
+        Returns:
+            None during normal play, otherwise a tuple that changes whenever
+            the overlay needs to be redrawn
+        """
+        if self.quiz_manager.quiz_active:
+            question = self.quiz_manager.get_current_question()
+            return ('quiz', question['id'] if question else None)
+        if self.show_store:
+            return ('store', self.coins, self.store.get_inventory_count())
+        if self.game_over:
+            return ('game_over', self.score, self.coins)
+        return None
     
     def draw(self):
-        """Draw everything on screen."""
+        """
+        Draw the frame. During play only the cells and HUD lines that changed
+        are repainted and pushed with pygame.display.update(rects); the whole
+        screen is redrawn only when an overlay (quiz, store, game over) opens,
+        closes or changes.
+        """
+        overlay_key = self.get_overlay_key()
+        if self.full_redraw or overlay_key != self.overlay_key:
+            self.overlay_key = overlay_key
+            self.draw_full()
+        elif overlay_key is None:
+            self.draw_changes()
+    
+    def draw_full(self):
+        """Redraw the whole screen and flip."""
         # Clear screen
         self.screen.fill(BLACK)
+        self.full_redraw = False
+        self.dirty_cells.clear()
+        self.hud_regions.clear()
         
         # Draw quiz if active
         if self.quiz_manager.quiz_active:
             self.draw_quiz()
-            return
         
         # Draw store if active
-        if self.show_store:
+        elif self.show_store:
             self.draw_store()
-            return
-        
-        # Draw snake
-        for segment in self.snake:
-            pygame.draw.rect(self.screen, GREEN, (*segment, GRID_SIZE, GRID_SIZE))
-        
-        # Draw apple
-        pygame.draw.rect(self.screen, RED, (*self.apple, GRID_SIZE, GRID_SIZE))
-        
-        # Draw HUD
-        self.draw_hud()
         
-        # Draw game over
-        if self.game_over:
-            self.draw_game_over()
+        else:
+            # Draw snake
+            for segment in self.board:
+                pygame.draw.rect(self.screen, GREEN, self.cell_rect(segment))
+            
+            # Draw apple
+            if self.apple is not None:
+                pygame.draw.rect(self.screen, RED, self.cell_rect(self.apple))
+            
+            # Draw HUD
+            self.draw_hud()
+            
+            # Draw game over
+            if self.game_over:
+                self.draw_game_over()
         
         pygame.display.flip()
     
+    def draw_changes(self):
+        """Repaint changed cells and HUD lines, updating only their rectangles."""
+        rects = []
+        for cell in self.dirty_cells:
+            rects.append(self.draw_cell(cell))
+        self.dirty_cells.clear()
+        
+        if self.interpolate and not self.paused:
+            rects.extend(self.draw_interpolated())
+        
+        for text, color, pos in self.get_hud_lines():
+            previous = self.hud_regions.get(pos)
+            if previous and previous[0] == text and previous[1].collidelist(rects) < 0:
+                continue
+            rects.append(self.draw_hud_line(text, color, pos))
+        
+        if rects:
+            pygame.display.update(rects)
+    
+    def draw_interpolated(self):
+        """
+        Draw the head sliding into its cell and the last tail cell sliding out,
+        by how far the current tick has progressed (render_alpha).
+        
+        Returns:
+            Rects that were repainted
+        """
+        alpha = self.render_alpha
+        head = self.board.head()
+        dx, dy = self.direction
+        rects = [self.screen.fill(BLACK, self.cell_rect(head))]
+        pygame.draw.rect(self.screen, GREEN, self.cell_part_rect(head, (-dx, -dy), alpha))
+        
+        if self.vacated_tail is not None:
+            tx, ty = self.board.coords(self.vacated_tail)
+            nx, ny = self.board.coords(self.board.tail())
+            rects.append(self.screen.fill(BLACK, self.cell_rect(self.vacated_tail)))
+            pygame.draw.rect(self.screen, GREEN,
+                             self.cell_part_rect(self.vacated_tail, (nx - tx, ny - ty), 1.0 - alpha))
+        return rects
+    
+    def draw_cell(self, cell: int):
+        """Paint one grid cell from the current game state and return its rect."""
+        if self.board.is_occupied(cell):
+            color = GREEN
+        elif cell == self.apple:
+            color = RED
+        else:
+            color = BLACK
+        return pygame.draw.rect(self.screen, color, self.cell_rect(cell))
+    
+    def get_hud_lines(self):
+        """Get (text, color, position) for each HUD line."""
+        lines = [
+            (f"Score: {self.score}", WHITE, (10, 10)),
+            (f"Coins: {self.coins}", YELLOW, (10, 40)),
+            (f"Items: {self.store.get_inventory_count()}", BLUE, (10, 70)),
+            ("Press S for Store", GRAY, (WINDOW_WIDTH - 200, 10))
+        ]
+        if self.profiler:
+            lines.append((self.profiler.overlay_text(), GRAY, (10, WINDOW_HEIGHT - 30)))
+        return lines
+    
+    def draw_hud_line(self, text: str, color, pos):
+        """
+        Repaint one HUD line: the cells underneath it, then the text.
+        
+        Returns:
+            The screen region that was repainted
+        """
+        surface = self.text_cache.render(self.small_font, text, color)
+        region = pygame.Rect(pos, (max(HUD_REGION_WIDTH, surface.get_width()), surface.get_height()))
+        previous = self.hud_regions.get(pos)
+        if previous:
+            region.union_ip(previous[1])
+        region = region.clip(self.screen.get_rect())
+        
+        # Cells under the region (the snake can pass beneath the HUD)
+        self.screen.fill(BLACK, region)
+        x0, x1 = region.left // GRID_SIZE, (region.right - 1) // GRID_SIZE
+        y0, y1 = region.top // GRID_SIZE, (region.bottom - 1) // GRID_SIZE
+        self.screen.set_clip(region)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                self.draw_cell(self.board.cell(x, y))
+        self.screen.set_clip(None)
+        
+        self.screen.blit(surface, pos)
+        self.hud_regions[pos] = (text, region)
+        return region
+    
     def draw_hud(self):
         """Draw heads-up display (score, coins, etc.)."""
-        # Score
-        score_text = self.small_font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
-        
-        # Coins
-        coins_text = self.small_font.render(f"Coins: {self.coins}", True, YELLOW)
-        self.screen.blit(coins_text, (10, 40))
-        
-        # Inventory count
-        inv_count = self.store.get_inventory_count()
-        inv_text = self.small_font.render(f"Items: {inv_count}", True, BLUE)
-        self.screen.blit(inv_text, (10, 70))
-        
-        # Instructions
-        help_text = self.small_font.render("Press S for Store", True, GRAY)
-        self.screen.blit(help_text, (WINDOW_WIDTH - 200, 10))
+        for text, color, pos in self.get_hud_lines():
+            surface = self.text_cache.render(self.small_font, text, color)
+            self.screen.blit(surface, pos)
+            region = pygame.Rect(pos, (max(HUD_REGION_WIDTH, surface.get_width()), surface.get_height()))
+            self.hud_regions[pos] = (text, region)
     
     def draw_quiz(self):
         """Draw quiz overlay."""
@@ -266,21 +584,18 @@ class SnakeGame:
             return
         
         # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.set_alpha(230)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlays['quiz'], (0, 0))
         
         # Quiz title
-        title = self.font.render("QUIZ TIME!", True, YELLOW)
+        title = self.text_cache.render(self.font, "QUIZ TIME!", YELLOW)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 100))
         self.screen.blit(title, title_rect)
         
         # Question
-        question_lines = self.wrap_text(question['question'], 700)
+        question_lines = self.get_question_lines(question)
         y_offset = 160
         for line in question_lines:
-            q_text = self.small_font.render(line, True, WHITE)
+            q_text = self.text_cache.render(self.small_font, line, WHITE)
             q_rect = q_text.get_rect(center=(WINDOW_WIDTH // 2, y_offset))
             self.screen.blit(q_text, q_rect)
             y_offset += 30
@@ -288,45 +603,42 @@ class SnakeGame:
         # Choices
         y_offset += 20
         for i, choice in enumerate(question['choices']):
-            choice_text = self.small_font.render(f"{i+1}. {choice}", True, WHITE)
+            choice_text = self.text_cache.render(self.small_font, f"{i+1}. {choice}", WHITE)
             choice_rect = choice_text.get_rect(center=(WINDOW_WIDTH // 2, y_offset))
             self.screen.blit(choice_text, choice_rect)
             y_offset += 40
         
         # Instructions
-        inst_text = self.small_font.render("Press 1-4 to answer", True, GRAY)
+        inst_text = self.text_cache.render(self.small_font, "Press 1-4 to answer", GRAY)
         inst_rect = inst_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 50))
         self.screen.blit(inst_text, inst_rect)
     
     def draw_store(self):
         """Draw store overlay."""
         # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.set_alpha(230)
-        overlay.fill(DARK_GRAY)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlays['store'], (0, 0))
         
         # Store title
-        title = self.font.render("STORE", True, YELLOW)
+        title = self.text_cache.render(self.font, "STORE", YELLOW)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 80))
         self.screen.blit(title, title_rect)
         
         # Your coins
-        coins_text = self.small_font.render(f"Your Coins: {self.coins}", True, WHITE)
+        coins_text = self.text_cache.render(self.small_font, f"Your Coins: {self.coins}", WHITE)
         coins_rect = coins_text.get_rect(center=(WINDOW_WIDTH // 2, 140))
         self.screen.blit(coins_text, coins_rect)
         
         # Purchase option
-        purchase_text = self.small_font.render("Random Prize: 20 coins", True, WHITE)
+        purchase_text = self.text_cache.render(self.small_font, "Random Prize: 20 coins", WHITE)
         purchase_rect = purchase_text.get_rect(center=(WINDOW_WIDTH // 2, 200))
         self.screen.blit(purchase_text, purchase_rect)
         
-        buy_text = self.small_font.render("Press P to Purchase", True, GREEN if self.coins >= 20 else RED)
+        buy_text = self.text_cache.render(self.small_font, "Press P to Purchase", GREEN if self.coins >= 20 else RED)
         buy_rect = buy_text.get_rect(center=(WINDOW_WIDTH // 2, 240))
         self.screen.blit(buy_text, buy_rect)
         
         # Inventory
-        inv_title = self.small_font.render("Your Inventory:", True, WHITE)
+        inv_title = self.text_cache.render(self.small_font, "Your Inventory:", WHITE)
         inv_title_rect = inv_title.get_rect(center=(WINDOW_WIDTH // 2, 300))
         self.screen.blit(inv_title, inv_title_rect)
         
@@ -334,49 +646,54 @@ class SnakeGame:
         if inventory:
             y_offset = 340
             for item, count in sorted(inventory.items()):
-                item_text = self.small_font.render(f"{item} x{count}", True, WHITE)
+                item_text = self.text_cache.render(self.small_font, f"{item} x{count}", WHITE)
                 item_rect = item_text.get_rect(center=(WINDOW_WIDTH // 2, y_offset))
                 self.screen.blit(item_text, item_rect)
                 y_offset += 30
                 if y_offset > WINDOW_HEIGHT - 100:
                     break
         else:
-            empty_text = self.small_font.render("(empty)", True, GRAY)
+            empty_text = self.text_cache.render(self.small_font, "(empty)", GRAY)
             empty_rect = empty_text.get_rect(center=(WINDOW_WIDTH // 2, 340))
             self.screen.blit(empty_text, empty_rect)
         
         # Close instructions
-        close_text = self.small_font.render("Press S to close", True, GRAY)
+        close_text = self.text_cache.render(self.small_font, "Press S to close", GRAY)
         close_rect = close_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 40))
         self.screen.blit(close_text, close_rect)
     
     def draw_game_over(self):
         """Draw game over overlay."""
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlays['game_over'], (0, 0))
         
         # Game Over text
-        game_over_text = self.font.render("GAME OVER", True, RED)
+        game_over_text = self.text_cache.render(self.font, "GAME OVER", RED)
         game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
         self.screen.blit(game_over_text, game_over_rect)
         
         # Score
-        score_text = self.small_font.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = self.text_cache.render(self.small_font, f"Final Score: {self.score}", WHITE)
         score_rect = score_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
         self.screen.blit(score_text, score_rect)
         
         # Coins
-        coins_text = self.small_font.render(f"Total Coins: {self.coins}", True, YELLOW)
+        coins_text = self.text_cache.render(self.small_font, f"Total Coins: {self.coins}", YELLOW)
         coins_rect = coins_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 40))
         self.screen.blit(coins_text, coins_rect)
         
         # Restart
-        restart_text = self.small_font.render("Press R to Restart", True, WHITE)
+        restart_text = self.text_cache.render(self.small_font, "Press R to Restart", WHITE)
         restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 80))
         self.screen.blit(restart_text, restart_rect)
     
+    def get_question_lines(self, question):
+        """Get the wrapped lines of a question, measuring the text only once."""
+        lines = self.question_layouts.get(question['id'])
+        if lines is None:
+            lines = self.wrap_text(question['question'], 700)
+            self.question_layouts[question['id']] = lines
+        return lines
+    
     def wrap_text(self, text: str, max_width: int):
         """Wrap text to fit within max_width."""
         words = text.split()
@@ -398,15 +715,67 @@ class SnakeGame:
         return lines
     
     def run(self):
-        """Main game loop."""
+        """
+        Main game loop. The simulation advances in fixed ticks of
+        1 / tick_rate seconds using an accumulator, while input is polled and
+        the screen drawn once per frame at render_fps, so rendering and input
+        latency don't depend on game speed.
+        """
+        tick_seconds = 1.0 / self.tick_rate
+        accumulator = 0.0
+        previous = self.now()
+        profiler = self.profiler
+        telemetry = self.telemetry
+        if telemetry:
+            frame_times = metrics.timing("frame_seconds", "Time from one frame to the next")
+            ticks = metrics.counter("game_ticks", "Simulation ticks run")
+        
         while self.running:
+            now = self.now()
+            if profiler:
+                profiler.begin_frame()
+            if telemetry:
+                frame_times.record(now - previous)
+            accumulator += min(now - previous, MAX_FRAME_SECONDS)
+            previous = now
+            
+            # Poll input every frame; turns are applied on the next tick
             self.handle_input()
-            self.update()
+            if profiler:
+                profiler.lap(INPUT)
+            
+            # Run as many fixed ticks as the elapsed time covers
+            while accumulator >= tick_seconds and self.running:
+                self.update()
+                accumulator -= tick_seconds
+                if telemetry:
+                    ticks.inc()
+            if profiler:
+                profiler.lap(UPDATE)
+            
+            self.render_alpha = accumulator / tick_seconds
             self.draw()
-            self.clock.tick(GAME_SPEED)
-        
-        # Show stats before quitting
+            if profiler:
+                profiler.lap(DRAW)
+            self.clock.tick(self.render_fps)
+            if profiler:
+                profiler.lap(WAIT)
+                profiler.end_frame(self.overlay_key[0] if self.overlay_key else "play")
+        
+        # Show stats before quitting (after any queued console messages)
+        self.console_log.close()
         stats = self.quiz_manager.get_quiz_stats()
+        latency = self.turn_queue.latency.summary()
+        
+        # Flush quiz and store state first, so a failure below can't lose it
+        self.quiz_manager.close()
+        self.store.close()
+        replay_file = None
+        if self.recorder:
+            try:
+                replay_file = self.recorder.save(REPLAY_DIR)
+            except Exception as e:
+                print(f"Error saving replay: {e}")
         print("\n" + "="*50)
         print("Game Statistics:")
         print(f"Final Score: {self.score}")
@@ -416,15 +785,74 @@ class SnakeGame:
         print(f"Accuracy: {stats['accuracy']:.1f}%")
         print(f"Quiz Coins Earned: {stats['total_coins']}")
         print(f"Items Purchased: {self.store.get_inventory_count()}")
+        print(f"Input Latency: avg {latency['mean_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, "
+              f"max {latency['max_ms']:.1f} ms ({latency['count']} turns)")
+        if replay_file:
+            print(f"Replay saved: {replay_file} (seed {self.seed})")
+        if profiler:
+            phases = profiler.summary()['phases']
+            frame, work = phases['frame'], phases['work']
+            print(f"Frame Time: p50 {frame['p50_ms']:.1f} ms, p95 {frame['p95_ms']:.1f} ms, "
+                  f"p99 {frame['p99_ms']:.1f} ms, max {frame['max_ms']:.1f} ms ({frame['count']} frames)")
+            print(f"Frame Work (excluding wait): p99 {work['p99_ms']:.1f} ms, max {work['max_ms']:.1f} ms")
+            profile_file = profiler.dump(PROFILE_DIR, seed=self.seed, tick_rate=self.tick_rate,
+                                         render_fps=self.render_fps)
+            print(f"Frame profile saved: {profile_file}")
         print("="*50)
         
+        if telemetry:
+            # After the final saves, so their timings are in the last snapshot
+            telemetry.close()
+        self.storage.close()
         pygame.quit()
         sys.exit()
 
 
+def seed_arg(text: str) -> int:
+    """argparse type for --seed: an int that fits in a replay header."""
+    try:
+        return check_seed(int(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def main():
     """Entry point for the game."""
-    game = SnakeGame()
+    parser = argparse.ArgumentParser(description="Snake Game with Quiz")
+    parser.add_argument("--speed", type=float, default=GAME_SPEED, help="simulation ticks per second")
+    parser.add_argument("--fps", type=int, default=RENDER_FPS, help="render frames per second (0 = uncapped)")
+    parser.add_argument("--interpolate", action="store_true", default=INTERPOLATE,
+                        help="animate the snake smoothly between ticks")
+    parser.add_argument("--seed", type=seed_arg, default=None,
+                        help=f"seed for a reproducible game (0 to {MAX_SEED - 1})")
+    parser.add_argument("--storage", choices=("files", "sqlite"), default=STORAGE,
+                        help="where quiz results and inventory are saved")
+    parser.add_argument("--db", default=SQLITE_DB, help="SQLite database for --storage sqlite")
+    parser.add_argument("--player", default=PLAYER_NAME, help="player name for --storage sqlite")
+    parser.add_argument("--profile", action="store_true", default=profiling_requested(),
+                        help="time each frame phase, show it on screen and save it at exit "
+                             "(also SNAKE_PROFILE=1)")
+    parser.add_argument("--telemetry", choices=("off", "file", "http"), default=TELEMETRY,
+                        help="export counters and timings to rotating NDJSON files or a local "
+                             "Prometheus endpoint")
+    parser.add_argument("--telemetry-port", type=int, default=TELEMETRY_PORT,
+                        help="port for --telemetry http")
+    parser.add_argument("--telemetry-interval", type=float, default=TELEMETRY_INTERVAL,
+                        help="seconds between telemetry snapshots")
+    args = parser.parse_args()
+    
+    telemetry = None
+    if args.telemetry == "file":
+        sink = NdjsonSink(os.path.join(TELEMETRY_DIR, "metrics.ndjson"))
+        telemetry = TelemetryExporter([sink], interval=args.telemetry_interval)
+    elif args.telemetry == "http":
+        sink = PrometheusSink(port=args.telemetry_port)
+        telemetry = TelemetryExporter([sink], interval=args.telemetry_interval)
+        print(f"Serving metrics at http://127.0.0.1:{sink.port}/metrics")
+    
+    storage = SqliteStorage(args.db, args.player) if args.storage == "sqlite" else FileStorage()
+    game = SnakeGame(tick_rate=args.speed, render_fps=args.fps, interpolate=args.interpolate,
+                     seed=args.seed, storage=storage, profile=args.profile, telemetry=telemetry)
     game.run()
 
 
@@ -0,0 +1,609 @@
+"""
+Storage - Pluggable persistence for quiz results and store inventory.
+
+QuizManager and Store keep their working state in memory and hand every
+change to a StorageBackend:
+
+    FileStorage    quiz_results.jsonl + stats/schedule snapshots, store_state.json (default)
+    SqliteStorage  one indexed SQLite database, any number of players
+
+Store writes go through InventoryWriteBehind, so purchases never touch the
+disk on the game thread.
+
+Usage (migrate existing JSON files into SQLite):
+    python src/storage.py migrate --db snake_game.db [--player NAME]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from quiz.result_log import ResultLog
+from quiz.quiz_stats import QuizStats
+from quiz.scheduler import QuestionScheduler
+from telemetry import metrics
+
+_INVENTORY_SAVES = metrics.timing("inventory_save_seconds", "Time to write a batch of inventory changes")
+_INVENTORY_SAVE_ERRORS = metrics.counter("inventory_save_errors", "Inventory writes that failed")
+
+
+class StorageBackend:
+    """
+    Interface for persisting quiz results and inventory.
+
+    Results are addressed by an opaque, increasing position (a byte offset,
+    a row id...). QuizStats and QuestionScheduler snapshots record the
+    position they cover, so loading them only reads results stored after
+    the snapshot.
+    """
+
+    # Quiz results
+
+    def add_results(self, results: List[Dict]):
+        """Store quiz results in one write."""
+        raise NotImplementedError
+
+    def iter_results(self, after: int = 0) -> Iterator[Dict]:
+        """Stream stored results past a position (0 = all of them)."""
+        raise NotImplementedError
+
+    def results_position(self) -> int:
+        """Get the position just past the last stored result."""
+        raise NotImplementedError
+
+    def load_quiz_stats(self) -> Optional[QuizStats]:
+        """Load the stats snapshot, or None if there isn't one."""
+        raise NotImplementedError
+
+    def save_quiz_stats(self, stats: QuizStats):
+        """Save the stats snapshot."""
+        raise NotImplementedError
+
+    def quiz_stats(self) -> QuizStats:
+        """
+        Get up-to-date stats: the snapshot plus any results stored after it.
+        Rebuilds from all results if the snapshot is missing or ahead of the store.
+        """
+        position = self.results_position()
+        stats = self.load_quiz_stats()
+        if stats is None or stats.log_offset > position:
+            stats = QuizStats()
+
+        if stats.log_offset < position:
+            for result in self.iter_results(stats.log_offset):
+                stats.add(result)
+            stats.log_offset = position
+            self.save_quiz_stats(stats)
+        return stats
+
+    def load_quiz_schedule(self) -> Optional[bytes]:
+        """Load the question schedule snapshot, or None if there isn't one."""
+        raise NotImplementedError
+
+    def save_quiz_schedule(self, data: bytes):
+        """Save the question schedule snapshot (QuestionScheduler.to_bytes())."""
+        raise NotImplementedError
+
+    def quiz_schedule(self, bank, rng=None) -> QuestionScheduler:
+        """
+        Get an up-to-date question schedule: the snapshot plus any results
+        stored after it, without cards for questions since removed from the
+        bank. Rebuilds from all results if the snapshot is missing or ahead
+        of the store.
+        """
+        position = self.results_position()
+        data = self.load_quiz_schedule()
+        schedule = QuestionScheduler.from_bytes(data, bank, rng) if data else None
+        if schedule is None or schedule.log_offset > position:
+            schedule = QuestionScheduler(bank, rng)
+
+        if schedule.log_offset < position:
+            schedule.add_all(self.iter_results(schedule.log_offset))
+            schedule.log_offset = position
+            self.save_quiz_schedule(schedule.to_bytes())
+        schedule.prune()
+        return schedule
+
+    # Inventory
+
+    def load_inventory(self) -> Dict[str, int]:
+        """Load the inventory as item name -> count."""
+        raise NotImplementedError
+
+    def add_items(self, items: Dict[str, int]):
+        """Store newly purchased items (name -> how many were added) in one write."""
+        raise NotImplementedError
+
+    def iter_purchases(self) -> Iterator[Tuple[float, str, int]]:
+        """Stream (timestamp, item, count) for each purchase, if history is kept."""
+        return iter(())
+
+    # Lifecycle
+
+    def flush(self):
+        """Make everything written so far durable."""
+
+    def close(self):
+        """Flush and release files."""
+        self.flush()
+
+
+class FileStorage(StorageBackend):
+    """The original file formats: a JSON Lines result log and a JSON inventory file."""
+
+    def __init__(
+        self,
+        results_file: str = "quiz_results.jsonl",
+        legacy_results_file: Optional[str] = "quiz_results.json",
+        stats_file: str = "quiz_results.stats.json",
+        state_file: str = "store_state.json",
+        history_file: Optional[str] = None,
+        schedule_file: str = "quiz_schedule.bin"
+    ):
+        """
+        Args:
+            results_file: Quiz result log (.jsonl)
+            legacy_results_file: Old JSON-array results imported when the log doesn't exist yet
+            stats_file: Quiz stats snapshot
+            state_file: Store inventory file
+            history_file: If set, purchases are also appended here as "timestamp<TAB>item<TAB>count" lines
+            schedule_file: Question schedule snapshot
+        """
+        self.results_file = results_file
+        self.legacy_results_file = legacy_results_file
+        self.stats_file = stats_file
+        self.state_file = state_file
+        self.history_file = history_file
+        self.schedule_file = schedule_file
+        self._result_log = None
+        self._counts: Dict[str, int] = {}
+
+    @property
+    def result_log(self) -> ResultLog:
+        """The result log, opened on first use so a Store alone doesn't create it."""
+        if self._result_log is None:
+            self._result_log = ResultLog(self.results_file, legacy_file=self.legacy_results_file)
+        return self._result_log
+
+    def add_results(self, results: List[Dict]):
+        for result in results:
+            self.result_log.append(result)
+
+    def iter_results(self, after: int = 0) -> Iterator[Dict]:
+        return self.result_log.iter_from(after)
+
+    def results_position(self) -> int:
+        return self.result_log.size()
+
+    def load_quiz_stats(self) -> Optional[QuizStats]:
+        return QuizStats.load(self.stats_file)
+
+    def save_quiz_stats(self, stats: QuizStats):
+        stats.save(self.stats_file)
+
+    def load_quiz_schedule(self) -> Optional[bytes]:
+        try:
+            with open(self.schedule_file, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save_quiz_schedule(self, data: bytes):
+        tmp_path = self.schedule_file + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.schedule_file)
+
+    @property
+    def backup_file(self) -> str:
+        return self.state_file + ".bak"
+
+    def load_inventory(self) -> Dict[str, int]:
+        """
+        Read {"counts": {...}}, or the old {"inventory": [names...]} list format.
+        Falls back to the backup if the state file is missing or damaged.
+        """
+        self._counts = {}
+        for path in (self.state_file, self.backup_file):
+            if not os.path.exists(path):
+                continue
+            try:
+                self._counts = self._read_inventory(path)
+                break
+            except (OSError, ValueError, AttributeError, TypeError) as e:
+                print(f"Error loading inventory from {path}: {e}")
+        return dict(self._counts)
+
+    @staticmethod
+    def _read_inventory(path: str) -> Dict[str, int]:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if 'counts' in data:
+            return {item: int(count) for item, count in data['counts'].items()}
+        counts = {}
+        for item in data.get('inventory', []):
+            counts[item] = counts.get(item, 0) + 1
+        return counts
+
+    def add_items(self, items: Dict[str, int]):
+        """
+        Write the new totals atomically: temp file + fsync + os.replace, with
+        the previous state rotated to the .bak file first. Raises OSError.
+        """
+        counts = dict(self._counts)
+        for item, count in items.items():
+            counts[item] = counts.get(item, 0) + count
+
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'counts': counts}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.state_file):
+            os.replace(self.state_file, self.backup_file)
+        os.replace(tmp_path, self.state_file)
+        self._counts = counts
+
+        if self.history_file:
+            now = time.time()
+            with open(self.history_file, 'a') as f:
+                f.writelines(f"{now:.3f}\t{item}\t{count}\n" for item, count in items.items())
+
+    def iter_purchases(self) -> Iterator[Tuple[float, str, int]]:
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, 'r') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    yield float(parts[0]), parts[1], int(parts[2])
+
+    def flush(self):
+        if self._result_log is not None:
+            if self._result_log.damaged_lines:
+                self._result_log.compact()
+            self._result_log.sync()
+
+    def close(self):
+        if self._result_log is not None:
+            self._result_log.close()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    question_id,
+    question TEXT,
+    correct INTEGER NOT NULL,
+    coins_earned INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_player_timestamp ON results (player, timestamp);
+CREATE INDEX IF NOT EXISTS results_player_question ON results (player, question_id);
+CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    player TEXT NOT NULL,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player, item)
+);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS purchases_player ON purchases (player);
+
+CREATE TABLE IF NOT EXISTS quiz_stats (
+    player TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS quiz_schedule (
+    player TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# Fixed SQL text, so sqlite3's statement cache compiles each one only once
+_INSERT_RESULT = ("INSERT INTO results (player, timestamp, question_id, question, correct, coins_earned) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+_SELECT_RESULTS = ("SELECT timestamp, question_id, question, correct, coins_earned "
+                   "FROM results WHERE id > ? AND player = ? ORDER BY id")
+_LAST_RESULT = "SELECT MAX(id) FROM results"
+_ADD_ITEMS = ("INSERT INTO inventory (player, item, count) VALUES (?, ?, ?) "
+              "ON CONFLICT (player, item) DO UPDATE SET count = count + excluded.count")
+_SELECT_INVENTORY = "SELECT item, count FROM inventory WHERE player = ?"
+_INSERT_PURCHASE = "INSERT INTO purchases (player, timestamp, item, count) VALUES (?, ?, ?, ?)"
+_SELECT_PURCHASES = "SELECT timestamp, item, count FROM purchases WHERE player = ? ORDER BY id"
+_LOAD_STATS = "SELECT data FROM quiz_stats WHERE player = ?"
+_SAVE_STATS = "INSERT OR REPLACE INTO quiz_stats (player, data) VALUES (?, ?)"
+_LOAD_SCHEDULE = "SELECT data FROM quiz_schedule WHERE player = ?"
+_SAVE_SCHEDULE = "INSERT OR REPLACE INTO quiz_schedule (player, data) VALUES (?, ?)"
+
+
+class SqliteStorage(StorageBackend):
+    """
+    Results, inventory counts, purchase history and stats snapshots in one
+    SQLite database (WAL mode). Several players can share a database; each
+    instance reads and writes one player's rows. Result positions are row ids.
+    Safe to use from several threads (calls are serialized by a lock).
+    """
+
+    def __init__(self, path: str = "snake_game.db", player: str = "local", history: bool = True):
+        """
+        Args:
+            path: SQLite database file
+            player: Player whose results and inventory this instance handles
+            history: Also log each purchase with its time
+        """
+        self.path = path
+        self.player = player
+        self.history = history
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade()
+        self.db.executescript(_SCHEMA)
+        self._position = None
+
+    def _upgrade(self):
+        """Bring a database from before inventory counts up to date."""
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(purchases)")]
+        if columns and 'count' not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE purchases ADD COLUMN count INTEGER NOT NULL DEFAULT 1")
+                self.db.executescript(_SCHEMA)
+                self.db.execute("INSERT INTO inventory (player, item, count) "
+                                "SELECT player, item, COUNT(*) FROM purchases GROUP BY player, item")
+
+    def add_results(self, results: List[Dict]):
+        rows = [(self.player, r['timestamp'], r['question_id'], r.get('question'),
+                 1 if r['correct'] else 0, r['coins_earned']) for r in results]
+        with self.lock, self.db:
+            self.db.executemany(_INSERT_RESULT, rows)
+            self._position = None
+
+    def import_results(self, results: Iterable[Dict], batch_size: int = 10000) -> int:
+        """
+        Bulk-load results, committing every batch_size rows.
+
+        Returns:
+            Number of results imported
+        """
+        count = 0
+        batch = []
+        for result in results:
+            batch.append(result)
+            if len(batch) >= batch_size:
+                self.add_results(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.add_results(batch)
+            count += len(batch)
+        return count
+
+    def iter_results(self, after: int = 0) -> Iterator[Dict]:
+        with self.lock:
+            cursor = self.db.execute(_SELECT_RESULTS, (after, self.player))
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for timestamp, question_id, question, correct, coins in rows:
+                yield {
+                    'timestamp': timestamp,
+                    'question_id': question_id,
+                    'question': question,
+                    'correct': bool(correct),
+                    'coins_earned': coins
+                }
+
+    def results_position(self) -> int:
+        with self.lock:
+            if self._position is None:
+                self._position = self.db.execute(_LAST_RESULT).fetchone()[0] or 0
+            return self._position
+
+    def load_quiz_stats(self) -> Optional[QuizStats]:
+        with self.lock:
+            row = self.db.execute(_LOAD_STATS, (self.player,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return QuizStats.from_dict(json.loads(row[0]))
+        except (ValueError, KeyError):
+            return None
+
+    def save_quiz_stats(self, stats: QuizStats):
+        with self.lock, self.db:
+            self.db.execute(_SAVE_STATS, (self.player, json.dumps(stats.to_dict(), separators=(',', ':'))))
+
+    def load_quiz_schedule(self) -> Optional[bytes]:
+        with self.lock:
+            row = self.db.execute(_LOAD_SCHEDULE, (self.player,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def save_quiz_schedule(self, data: bytes):
+        with self.lock, self.db:
+            self.db.execute(_SAVE_SCHEDULE, (self.player, data))
+
+    def load_inventory(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.db.execute(_SELECT_INVENTORY, (self.player,)).fetchall())
+
+    def add_items(self, items: Dict[str, int]):
+        rows = [(self.player, item, count) for item, count in items.items()]
+        with self.lock, self.db:
+            self.db.executemany(_ADD_ITEMS, rows)
+            if self.history:
+                now = time.time()
+                self.db.executemany(_INSERT_PURCHASE, [(self.player, now, item, count)
+                                                       for item, count in items.items()])
+
+    def iter_purchases(self) -> Iterator[Tuple[float, str, int]]:
+        with self.lock:
+            rows = self.db.execute(_SELECT_PURCHASES, (self.player,)).fetchall()
+        return iter(rows)
+
+    def has_data(self) -> bool:
+        """Check whether this player already has results or purchases stored."""
+        for table in ("results", "inventory"):
+            if self.db.execute(f"SELECT 1 FROM {table} WHERE player = ? LIMIT 1", (self.player,)).fetchone():
+                return True
+        return False
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class InventoryWriteBehind:
+    """
+    Collects inventory changes on the game thread and writes them to a
+    storage backend from a background thread. Purchases made within `delay`
+    seconds of each other are merged into one add_items() call. A failed
+    write is kept and retried with the next flush.
+    """
+
+    def __init__(self, storage: StorageBackend, delay: float = 0.5):
+        """
+        Args:
+            storage: Backend the inventory is written to
+            delay: Seconds to wait for more purchases before writing
+        """
+        self.storage = storage
+        self.delay = delay
+        self.writes = 0
+
+        self._pending: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._writing = False
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, items: Dict[str, int]):
+        """Queue items for saving. Only merges into a dict - no I/O."""
+        with self._cond:
+            first = not self._pending
+            for item, count in items.items():
+                self._pending[item] = self._pending.get(item, 0) + count
+            if first:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write queued changes now and wait for them to reach storage.
+
+        Returns:
+            True if everything was written within the timeout
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: not self._pending and not self._writing, timeout=timeout)
+            self._flush_requested = False
+            return done
+
+    def close(self, timeout: float = 5.0):
+        """Write what's queued and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                # Let rapid purchases pile up into one write
+                self._cond.wait_for(lambda: self._stopping or self._flush_requested, timeout=self.delay)
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            try:
+                with _INVENTORY_SAVES.time():
+                    self.storage.add_items(batch)
+                self.writes += 1
+                failed = False
+            except Exception as e:
+                _INVENTORY_SAVE_ERRORS.inc()
+                print(f"Error saving inventory: {e}")
+                failed = True
+            with self._cond:
+                self._writing = False
+                if failed:
+                    for item, count in batch.items():
+                        self._pending[item] = self._pending.get(item, 0) + count
+                self._cond.notify_all()
+            if failed:
+                if self._stopping:
+                    return
+                time.sleep(self.delay)
+
+
+def migrate(db_path: str, player: str, results_file: str, legacy_results_file: str,
+            state_file: str, force: bool = False):
+    """Import the JSON/JSONL quiz results and store inventory into SQLite."""
+    target = SqliteStorage(db_path, player)
+    if target.has_data() and not force:
+        target.close()
+        print(f"{db_path} already has data for player '{player}'; use --force to import again")
+        return
+
+    source = FileStorage(results_file, legacy_results_file, state_file=state_file)
+    start = time.perf_counter()
+    results = 0
+    if os.path.exists(results_file) or os.path.exists(legacy_results_file):
+        results = target.import_results(source.iter_results())
+    items = source.load_inventory()
+    if items:
+        target.add_items(items)
+    item_count = sum(items.values())
+    stats = target.quiz_stats()
+    source.close()
+    target.close()
+
+    print(f"Imported {results} quiz results and {item_count} items into {db_path} "
+          f"for player '{player}' in {time.perf_counter() - start:.2f}s")
+    print(f"Quiz totals: {stats.total} answered, {stats.correct} correct, {stats.coins} coins")
+
+
+def main():
+    """Entry point for the storage tool."""
+    parser = argparse.ArgumentParser(description="Snake game storage tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    mig = sub.add_parser("migrate", help="import JSON quiz results and inventory into SQLite")
+    mig.add_argument("--db", default="snake_game.db")
+    mig.add_argument("--player", default="local")
+    mig.add_argument("--results", default="quiz_results.jsonl")
+    mig.add_argument("--legacy-results", default="quiz_results.json")
+    mig.add_argument("--store", default="store_state.json")
+    mig.add_argument("--force", action="store_true", help="import even if the player already has data")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate(args.db, args.player, args.results, args.legacy_results, args.store, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,70 @@
 """
 Store - In-game store for purchasing random prizes with coins
 """
-import json
 import random
-import os
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from events import EventBus, ItemPurchased
+from storage import FileStorage, InventoryWriteBehind, StorageBackend
+
+
+class AliasSampler:
+    """
+    Draws items with given relative weights in O(1) per draw (Vose's alias
+    method), however many items the table has. Building the table is O(n).
+    """
+    
+    def __init__(self, weights: Dict[str, float], rng: Optional[random.Random] = None):
+        """
+        Build the alias table.
+        
+        Args:
+            weights: Item -> relative weight (need not sum to 1; zero means never drawn)
+            rng: Random generator to draw with
+        """
+        self.items = [item for item, weight in weights.items() if weight > 0]
+        if not self.items:
+            raise ValueError("Prize table needs at least one item with a positive weight")
+        self.rng = rng or random.Random()
+        
+        n = len(self.items)
+        total = sum(weights[item] for item in self.items)
+        scaled = [weights[item] * n / total for item in self.items]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding and keeps prob 1.0
+    
+    def draw(self) -> str:
+        """Draw one item."""
+        u = self.rng.random() * len(self.items)
+        i = int(u)
+        return self.items[i if u - i < self.prob[i] else self.alias[i]]
+    
+    def draw_counts(self, n: int) -> Dict[str, int]:
+        """
+        Draw n items.
+        
+        Returns:
+            Item -> how many times it was drawn (items never drawn are left out)
+        """
+        size = len(self.items)
+        prob = self.prob
+        alias = self.alias
+        rand = self.rng.random
+        hits = [0] * size
+        for _ in range(n):
+            u = rand() * size
+            i = int(u)
+            hits[i if u - i < prob[i] else alias[i]] += 1
+        return {self.items[i]: count for i, count in enumerate(hits) if count}
 
 
 class Store:
@@ -26,34 +86,41 @@ class Store:
         "Magic Potion"
     ]
     
-    def __init__(self, state_file: str = "store_state.json"):
+    # Relative chance of each prize; None draws every PRIZES entry equally.
+    # Example rarity table: {"Golden Apple": 50, "Star Badge": 30, "Treasure Chest": 5}
+    PRIZE_WEIGHTS: Optional[Dict[str, float]] = None
+    
+    def __init__(
+        self,
+        state_file: str = "store_state.json",
+        storage: Optional[StorageBackend] = None,
+        prize_weights: Optional[Dict[str, float]] = None,
+        rng: Optional[random.Random] = None,
+        events: Optional[EventBus] = None
+    ):
         """
         Initialize the store.
         
         Args:
-            state_file: Path to JSON file for persisting inventory
+            state_file: Path to JSON file for persisting inventory (when no storage is given)
+            storage: Where the inventory is persisted (default: FileStorage using state_file)
+            prize_weights: Prize -> relative weight (default: PRIZE_WEIGHTS)
+            rng: Random generator for prize draws
+            events: Bus to publish ItemPurchased on
         """
         self.state_file = state_file
-        self.inventory = self._load_inventory()
-    
-    def _load_inventory(self) -> List[str]:
-        """Load inventory from file."""
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('inventory', [])
-            except:
-                return []
-        return []
-    
-    def save_inventory(self):
-        """Save current inventory to file."""
-        try:
-            with open(self.state_file, 'w') as f:
-                json.dump({'inventory': self.inventory}, f, indent=2)
-        except Exception as e:
-            print(f"Error saving inventory: {e}")
+        self.events = events or EventBus()
+        self.storage = storage or FileStorage(state_file=state_file)
+        
+        weights = prize_weights or self.PRIZE_WEIGHTS or dict.fromkeys(self.PRIZES, 1.0)
+        self.sampler = AliasSampler(weights, rng)
+        
+        # Item name -> count, plus the running total
+        self.counts = self.storage.load_inventory()
+        self.total_items = sum(self.counts.values())
+        
+        # Saves happen on a background thread, coalescing rapid purchases
+        self.writer = InventoryWriteBehind(self.storage)
     
     def purchase_item(self, coin_cost: int = 20) -> str:
         """
@@ -66,32 +133,55 @@ class Store:
             Name of the purchased item
         """
         # Select random prize
-        prize = random.choice(self.PRIZES)
+        prize = self.sampler.draw()
         
         # Add to inventory
-        self.inventory.append(prize)
+        self.counts[prize] = self.counts.get(prize, 0) + 1
+        self.total_items += 1
         
-        # Save inventory
-        self.save_inventory()
+        # Save inventory (in the background)
+        self.writer.add({prize: 1})
         
+        self.events.emit(ItemPurchased, prize, coin_cost)
         return prize
     
+    def purchase_many(self, n: int) -> Dict[str, int]:
+        """
+        Draw n prizes at once (e.g. an event handing out rewards), applied as
+        one inventory update and saved with one write. These are rewards,
+        not purchases, so no ItemPurchased is published.
+        
+        Args:
+            n: Number of prizes
+            
+        Returns:
+            Dictionary mapping each prize drawn to how many were drawn
+        """
+        prizes = self.sampler.draw_counts(n)
+        for prize, count in prizes.items():
+            self.counts[prize] = self.counts.get(prize, 0) + count
+        self.total_items += n
+        self.writer.add(prizes)
+        return prizes
+    
     def get_inventory(self) -> List[str]:
-        """Get current inventory."""
-        return self.inventory.copy()
+        """Get current inventory as a list of item names (grouped by item)."""
+        return [item for item, count in self.counts.items() for _ in range(count)]
     
     def get_inventory_summary(self) -> Dict[str, int]:
         """
-        Get inventory summary with item counts.
+        Get inventory summary with item counts. Costs O(distinct items),
+        not O(items owned).
         
         Returns:
             Dictionary mapping item names to counts
         """
-        summary = {}
-        for item in self.inventory:
-            summary[item] = summary.get(item, 0) + 1
-        return summary
+        return dict(self.counts)
     
     def get_inventory_count(self) -> int:
-        """Get total number of items in inventory."""
-        return len(self.inventory)
+        """Get total number of items in inventory (O(1))."""
+        return self.total_items
+    
+    def close(self):
+        """Write any unsaved purchases. Call when the game exits."""
+        self.writer.close()
@@ -0,0 +1,455 @@
+"""
+Telemetry - Counters, gauges and timings, exported off the game thread
+
+Code that does something worth measuring records it in the shared registry:
+
+    from telemetry import metrics
+    _SAVES = metrics.timing("results_save_seconds", "Time to store one quiz result")
+    with _SAVES.time():
+        storage.add_results([result])
+
+Recording only updates fixed-size aggregates in memory (a counter, or a
+log-linear histogram from frame_profiler), so it costs about a
+microsecond and nothing grows per event. A TelemetryExporter thread takes a
+snapshot every `interval` seconds and hands it to its sinks:
+
+    NdjsonSink        one JSON line per snapshot, rotating files
+    PrometheusSink    the latest snapshot as Prometheus text on a local port
+
+A slow sink only delays the next snapshot: snapshots are taken one at a time
+and never queued, so memory stays bounded however far behind a sink falls.
+
+Enable with `python src/snake_game.py --telemetry file` (or http).
+"""
+import json
+import operator
+import os
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, Iterable, List, Optional
+
+from events import AppleEaten, EventBus, GameOver, ItemPurchased, QuizAnswered, QuizStarted
+from frame_profiler import Histogram
+
+
+class Counter:
+    """A total that only goes up. Increment it from one thread."""
+
+    __slots__ = ('name', 'help', 'value')
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        """Add n."""
+        self.value += n
+
+
+class Gauge:
+    """A value that goes up and down: set() it, or read it from fn at snapshot time."""
+
+    __slots__ = ('name', 'help', 'value', 'fn')
+
+    def __init__(self, name: str, help: str = "", fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value: float):
+        """Set the current value."""
+        self.value = value
+
+    def read(self) -> float:
+        """Current value (fn runs on the exporter thread, so it must be safe to call there)."""
+        return self.fn() if self.fn is not None else self.value
+
+
+class _Timer:
+    """Context manager that records the time spent in its block."""
+
+    __slots__ = ('timing', 'start')
+
+    def __init__(self, timing: "Timing"):
+        self.timing = timing
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.record(time.perf_counter() - self.start)
+
+
+class Timing:
+    """
+    Durations in a session-long histogram. Record from one thread; the
+    exporter reads percentiles per interval by diffing the bucket counts
+    against its previous snapshot, so recording takes no lock.
+    """
+
+    __slots__ = ('name', 'help', 'histogram', '_last_counts', '_last_count', '_last_total_us')
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.histogram = Histogram()
+        self._last_counts = array('Q', self.histogram.counts)
+        self._last_count = 0
+        self._last_total_us = 0
+
+    def record(self, seconds: float):
+        """Add one duration."""
+        self.histogram.record(seconds)
+
+    def time(self) -> _Timer:
+        """Time a block: `with timing.time(): ...`"""
+        return _Timer(self)
+
+    def interval(self) -> Histogram:
+        """Samples recorded since the previous call, as a Histogram (exporter thread only)."""
+        histogram = self.histogram
+        recent = Histogram()
+        if histogram.count == self._last_count:
+            return recent
+        total_us = histogram.total_us
+        counts = array('Q', histogram.counts)
+        recent.counts = array('Q', map(operator.sub, counts, self._last_counts))
+        recent.count = sum(recent.counts)
+        recent.total_us = total_us - self._last_total_us
+        # The max isn't kept per interval: use the top of the highest bucket hit
+        for index in range(len(counts) - 1, -1, -1):
+            if recent.counts[index]:
+                recent.max_us = min(Histogram.bucket_value(index + 1), histogram.max_us)
+                break
+        self._last_counts = counts
+        self._last_count = sum(counts)
+        self._last_total_us = total_us
+        return recent
+
+
+class Telemetry:
+    """
+    Registry of named metrics. counter(), gauge() and timing() return the
+    existing metric when the name is taken, so modules can look theirs up
+    at import time.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            clock: High-resolution time source for event timings (quiz answer time)
+        """
+        self.clock = clock
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Gauge] = {}
+        self.timings: Dict[str, Timing] = {}
+        self._lock = threading.Lock()
+        self._last_values: Dict[str, int] = {}
+        self._last_snapshot = None
+        self._quiz_started_at = None
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        """Get or create a counter."""
+        with self._lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(name, help)
+            return self.counters[name]
+
+    def gauge(self, name: str, help: str = "", fn: Optional[Callable[[], float]] = None) -> Gauge:
+        """Get or create a gauge (a new fn replaces the old one)."""
+        with self._lock:
+            if name not in self.gauges:
+                self.gauges[name] = Gauge(name, help)
+            gauge = self.gauges[name]
+            if fn is not None:
+                gauge.fn = fn
+            return gauge
+
+    def timing(self, name: str, help: str = "") -> Timing:
+        """Get or create a timing."""
+        with self._lock:
+            if name not in self.timings:
+                self.timings[name] = Timing(name, help)
+            return self.timings[name]
+
+    def attach(self, bus: EventBus):
+        """
+        Count game events and time quiz answers. The handlers run on the game
+        thread but only bump counters, which is cheaper than queueing the
+        event for another thread.
+        """
+        apples = self.counter("apples_eaten", "Apples eaten")
+        quizzes = self.counter("quizzes_answered", "Quiz questions answered")
+        correct = self.counter("quizzes_correct", "Quiz questions answered correctly")
+        answer_time = self.timing("quiz_answer_seconds", "Time from a quiz appearing to its answer")
+        purchases = self.counter("items_purchased", "Store purchases")
+        spent = self.counter("coins_spent", "Coins spent in the store")
+        games_over = self.counter("games_over", "Games ended by the snake dying")
+
+        def quiz_started(event: QuizStarted):
+            self._quiz_started_at = self.clock()
+
+        def quiz_answered(event: QuizAnswered):
+            quizzes.inc()
+            if event.correct:
+                correct.inc()
+            if self._quiz_started_at is not None:
+                answer_time.record(self.clock() - self._quiz_started_at)
+                self._quiz_started_at = None
+
+        def item_purchased(event: ItemPurchased):
+            purchases.inc()
+            spent.inc(event.cost)
+
+        bus.subscribe(AppleEaten, lambda event: apples.inc())
+        bus.subscribe(QuizStarted, quiz_started)
+        bus.subscribe(QuizAnswered, quiz_answered)
+        bus.subscribe(ItemPurchased, item_purchased)
+        bus.subscribe(GameOver, lambda event: games_over.inc())
+
+    def snapshot(self) -> Dict:
+        """
+        Current values: counter totals and their rates per second since the
+        previous snapshot, gauges, and timing percentiles over the interval.
+        Call from one thread (the exporter).
+        """
+        now = time.monotonic()
+        elapsed = now - self._last_snapshot if self._last_snapshot is not None else 0.0
+        self._last_snapshot = now
+        with self._lock:
+            counters = list(self.counters.values())
+            gauges = list(self.gauges.values())
+            timings = list(self.timings.values())
+
+        totals, rates = {}, {}
+        for counter in counters:
+            value = counter.value
+            if elapsed > 0:
+                rates[counter.name] = round((value - self._last_values.get(counter.name, 0)) / elapsed, 3)
+            self._last_values[counter.name] = value
+            totals[counter.name] = value
+
+        gauge_values = {}
+        for gauge in gauges:
+            try:
+                gauge_values[gauge.name] = gauge.read()
+            except Exception:
+                gauge_values[gauge.name] = None
+
+        timing_values = {}
+        for timing in timings:
+            summary = timing.interval().summary()
+            summary['total_count'] = timing.histogram.count
+            summary['total_s'] = timing.histogram.total_us / 1e6
+            timing_values[timing.name] = summary
+
+        return {
+            'time': round(time.time(), 3),
+            'interval_s': round(elapsed, 3),
+            'counters': totals,
+            'rates': rates,
+            'gauges': gauge_values,
+            'timings': timing_values
+        }
+
+
+# Shared registry the game, quiz and storage code record into
+metrics = Telemetry()
+
+
+class NdjsonSink:
+    """
+    Appends each snapshot as one JSON line. When the file passes max_bytes it
+    becomes <path>.1 (older files shift up, the oldest beyond `backups` is
+    deleted), so the disk used is bounded too.
+    """
+
+    def __init__(self, path: str = os.path.join("telemetry", "metrics.ndjson"),
+                 max_bytes: int = 1_000_000, backups: int = 3):
+        """
+        Args:
+            path: File to append to (its directory is created)
+            max_bytes: Size at which the file is rotated
+            backups: Rotated files kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a')
+
+    def write(self, snapshot: Dict):
+        """Append a snapshot, rotating first if the file is full."""
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+        self._file.write(json.dumps(snapshot, separators=(',', ':')) + "\n")
+        self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a')
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+def prometheus_text(snapshot: Dict, helps: Optional[Dict[str, str]] = None, prefix: str = "snake_") -> str:
+    """
+    Render a snapshot in the Prometheus text format: counters as `_total`,
+    gauges as they are, timings as summaries (quantiles over the last
+    interval, `_sum` and `_count` over the session).
+    """
+    helps = helps or {}
+    lines = []
+
+    def header(name: str, metric: str, kind: str):
+        if name in helps:
+            lines.append(f"# HELP {metric} {helps[name]}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+    for name, value in snapshot['counters'].items():
+        metric = f"{prefix}{name}_total"
+        header(name, metric, "counter")
+        lines.append(f"{metric} {value}")
+    for name, value in snapshot['gauges'].items():
+        if value is None:
+            continue
+        metric = prefix + name
+        header(name, metric, "gauge")
+        lines.append(f"{metric} {value}")
+    for name, summary in snapshot['timings'].items():
+        metric = prefix + name
+        header(name, metric, "summary")
+        for quantile, key in (("0.5", 'p50_ms'), ("0.95", 'p95_ms'), ("0.99", 'p99_ms')):
+            # No samples this interval: NaN, as Prometheus client libraries report it
+            value = summary[key] / 1000 if summary['count'] else "NaN"
+            lines.append(f'{metric}{{quantile="{quantile}"}} {value}')
+        lines.append(f"{metric}_sum {summary['total_s']}")
+        lines.append(f"{metric}_count {summary['total_count']}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    """
+    Serves the latest snapshot at http://host:port/metrics for a Prometheus
+    scraper (or curl). The text is rendered once per snapshot on the exporter
+    thread; scrapes are answered one at a time from a single server thread,
+    and a client that stalls is dropped after `timeout` seconds.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, registry: Optional[Telemetry] = None,
+                 timeout: float = 5.0):
+        """
+        Args:
+            host: Interface to listen on (local only by default)
+            port: Port to listen on (0 picks a free one; see self.port)
+            registry: Metrics whose help text is included (default: the shared registry)
+            timeout: Seconds a scrape may take before its connection is closed
+        """
+        self.registry = registry or metrics
+        self._body = b""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def setup(self):
+                self.timeout = timeout
+                super().setup()
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink._body
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = HTTPServer((host, port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="telemetry-http", daemon=True)
+        self._thread.start()
+
+    def write(self, snapshot: Dict):
+        """Replace the text served to scrapers."""
+        registry = self.registry
+        helps = {}
+        for group in (registry.counters, registry.gauges, registry.timings):
+            helps.update((name, metric.help) for name, metric in list(group.items()) if metric.help)
+        self._body = prometheus_text(snapshot, helps).encode('utf-8')
+
+    def close(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TelemetryExporter:
+    """
+    Snapshots a registry every `interval` seconds on a background thread and
+    writes each snapshot to every sink. A sink that raises is counted in
+    `errors` and tried again next time; the others still get the snapshot.
+    """
+
+    def __init__(self, sinks: Iterable, registry: Optional[Telemetry] = None, interval: float = 10.0):
+        """
+        Args:
+            sinks: Objects with write(snapshot) and close()
+            registry: Metrics to export (default: the shared registry)
+            interval: Seconds between snapshots
+        """
+        self.sinks: List = list(sinks)
+        self.registry = registry or metrics
+        self.interval = interval
+        self.exports = 0
+        self.errors = 0
+        self.last_snapshot: Optional[Dict] = None
+        self.registry.snapshot()  # Start the first interval now
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Take a snapshot and write it to the sinks (exporter thread, or after close)."""
+        snapshot = self.registry.snapshot()
+        self.last_snapshot = snapshot
+        for sink in self.sinks:
+            try:
+                sink.write(snapshot)
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"Telemetry sink {type(sink).__name__} failed: {e}")
+        self.exports += 1
+
+    def close(self, timeout: float = 5.0):
+        """Stop the thread, write a final snapshot and close the sinks."""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.export()
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,55 @@
+"""
+TextCache - LRU cache of rendered text surfaces, so HUD and overlay strings are
+rendered by pygame once instead of on every frame.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    Caches font.render() results keyed by (font, text, color), evicting the
+    least recently used surface once max_size is reached.
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of surfaces to keep (0 disables caching)
+        """
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        """
+        Get the antialiased surface for text, rendering it only on a cache miss.
+
+        Returns:
+            Rendered surface (shared - do not draw on it)
+        """
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        if self.max_size > 0:
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop every cached surface."""
+        self.surfaces.clear()
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
@@ -0,0 +1,240 @@
+"""
+Tournament - Runs scripted snake agents over many seeded games on every core.
+
+Per-game results are streamed to <out>/results.ndjson as they finish, so an
+interrupted run picks up where it left off when started again with the same
+output directory. Aggregated stats are written to <out>/stats.json.
+
+Usage:
+    python src/tournament.py --agents greedy,bfs,hamiltonian,random --games 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Set, Tuple
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from snake_engine import SnakeEngine, REWARD_APPLE
+from snake_agents import AGENTS, hamiltonian_cycle
+
+
+# Cause recorded when an agent goes too long without eating
+DEATH_STARVED = "starved"
+
+
+def play_game(agent_name: str, seed: int, width: int, height: int, max_idle: int) -> Dict:
+    """
+    Play one game to the end.
+
+    Args:
+        agent_name: Key into AGENTS
+        seed: Seed for both the engine and the agent
+        width: Board width in cells
+        height: Board height in cells
+        max_idle: Steps without eating before the game is stopped
+
+    Returns:
+        Result record (agent, seed, score, length, steps, cause)
+    """
+    engine = SnakeEngine(width, height, seed=seed)
+    agent = AGENTS[agent_name](seed)
+    agent.reset(engine)
+
+    idle = 0
+    cause = None
+    while not engine.game_over:
+        if engine.step(agent.act(engine)) == REWARD_APPLE:
+            idle = 0
+        else:
+            idle += 1
+            if idle >= max_idle:
+                cause = DEATH_STARVED
+                break
+
+    return {
+        'agent': agent_name,
+        'seed': seed,
+        'score': engine.score,
+        'length': engine.length,
+        'steps': engine.steps,
+        'cause': cause or engine.death_cause
+    }
+
+
+def run_shard(agent_name: str, seeds: List[int], width: int, height: int, max_idle: int) -> List[Dict]:
+    """Play a batch of seeds in a worker process."""
+    return [play_game(agent_name, seed, width, height, max_idle) for seed in seeds]
+
+
+def load_results(path: str) -> List[Dict]:
+    """Load finished results, skipping a torn last line from an interrupted run."""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+    return results
+
+
+def aggregate(results: List[Dict]) -> Dict[str, Dict]:
+    """Compute per-agent summary statistics."""
+    by_agent: Dict[str, List[Dict]] = {}
+    for result in results:
+        by_agent.setdefault(result['agent'], []).append(result)
+
+    stats = {}
+    for agent_name, games in sorted(by_agent.items()):
+        scores = [g['score'] for g in games]
+        causes: Dict[str, int] = {}
+        for g in games:
+            causes[g['cause']] = causes.get(g['cause'], 0) + 1
+        stats[agent_name] = {
+            'games': len(games),
+            'mean_score': statistics.mean(scores),
+            'median_score': statistics.median(scores),
+            'max_score': max(scores),
+            'mean_length': statistics.mean(g['length'] for g in games),
+            'mean_steps': statistics.mean(g['steps'] for g in games),
+            'causes': causes
+        }
+    return stats
+
+
+def run_tournament(
+    agents: List[str],
+    seeds: List[int],
+    out_dir: str,
+    width: int = 40,
+    height: int = 30,
+    workers: int = 0,
+    shard_size: int = 4,
+    max_idle: int = 0
+) -> Dict[str, Dict]:
+    """
+    Run every agent on every seed, skipping games already in the results file.
+
+    Args:
+        agents: Agent names to play
+        seeds: Game seeds
+        out_dir: Directory for results.ndjson and stats.json
+        width: Board width in cells
+        height: Board height in cells
+        workers: Worker processes (0 = one per core)
+        shard_size: Seeds per task sent to a worker
+        max_idle: Steps without eating before a game is stopped (0 = 2x board size)
+
+    Returns:
+        Aggregated stats per agent
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results_file = os.path.join(out_dir, 'results.ndjson')
+    stats_file = os.path.join(out_dir, 'stats.json')
+    max_idle = max_idle or 2 * width * height
+
+    results = load_results(results_file)
+    done: Set[Tuple[str, int]] = {(r['agent'], r['seed']) for r in results}
+
+    shards = []
+    for agent_name in agents:
+        todo = [seed for seed in seeds if (agent_name, seed) not in done]
+        for i in range(0, len(todo), shard_size):
+            shards.append((agent_name, todo[i:i + shard_size]))
+
+    total = sum(len(s) for _, s in shards)
+    if done:
+        print(f"Resuming: {len(done)} games already finished, {total} to go")
+
+    start = time.perf_counter()
+    finished = 0
+    # Rewrite the file from parsed records first so a torn last line is dropped
+    with open(results_file, 'w') as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+        f.flush()
+
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        try:
+            futures = [
+                executor.submit(run_shard, agent_name, shard, width, height, max_idle)
+                for agent_name, shard in shards
+            ]
+            for future in as_completed(futures):
+                for result in future.result():
+                    f.write(json.dumps(result) + "\n")
+                    results.append(result)
+                    finished += 1
+                    print(f"[{finished}/{total}] {result['agent']:<12} seed={result['seed']:<6} "
+                          f"score={result['score']:<5} steps={result['steps']:<7} {result['cause']}")
+                f.flush()
+        except KeyboardInterrupt:
+            print("\nInterrupted - finished games are saved, run again to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    stats = aggregate(results)
+    with open(stats_file, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+    if finished:
+        print(f"\n{finished} games in {elapsed:.1f}s ({finished / elapsed:.1f} games/sec)")
+    return stats
+
+
+def print_stats(stats: Dict[str, Dict]):
+    """Print the aggregated stats as a table."""
+    print(f"\n{'agent':<12} {'games':>6} {'mean':>8} {'median':>8} {'max':>6} {'steps':>10}  causes")
+    for agent_name, s in stats.items():
+        causes = ", ".join(f"{c}={n}" for c, n in sorted(s['causes'].items()))
+        print(f"{agent_name:<12} {s['games']:>6} {s['mean_score']:>8.1f} {s['median_score']:>8.1f} "
+              f"{s['max_score']:>6} {s['mean_steps']:>10.0f}  {causes}")
+
+
+def main():
+    """Entry point for the tournament runner."""
+    parser = argparse.ArgumentParser(description="Snake agent tournament")
+    parser.add_argument("--agents", default=",".join(AGENTS),
+                        help=f"comma-separated agents ({', '.join(AGENTS)})")
+    parser.add_argument("--games", type=int, default=100, help="games per agent")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: all cores)")
+    parser.add_argument("--shard-size", type=int, default=4, help="games per worker task")
+    parser.add_argument("--max-idle", type=int, default=0,
+                        help="steps without eating before a game is stopped (default: 2x board size)")
+    parser.add_argument("--out", default="tournament_results", help="output directory")
+    args = parser.parse_args()
+
+    agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+    unknown = [a for a in agents if a not in AGENTS]
+    if unknown:
+        parser.error(f"unknown agents: {', '.join(unknown)}")
+    if "hamiltonian" in agents:
+        try:
+            hamiltonian_cycle(args.width, args.height)
+        except ValueError as e:
+            parser.error(f"hamiltonian agent: {e}")
+
+    seeds = list(range(args.seed_start, args.seed_start + args.games))
+    try:
+        stats = run_tournament(agents, seeds, args.out, args.width, args.height,
+                               args.workers, args.shard_size, args.max_idle)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    print_stats(stats)
+
+
+if __name__ == "__main__":
+    main()